@@ -1,8 +1,13 @@
 import os
-import requests
+import sys
 import json
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'n8n'))
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import get_client
+
 load_dotenv()
 
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
@@ -14,7 +19,7 @@ HEADERS = {
 
 def get_children(block_id):
     url = f"https://api.notion.com/v1/blocks/{block_id}/children"
-    resp = requests.get(url, headers=HEADERS)
+    resp = get_client().get(url, headers=HEADERS)
     if resp.status_code != 200:
         print(f"Error: {resp.status_code} - {resp.text}")
         return []
@@ -22,7 +27,7 @@ def get_children(block_id):
 
 def get_page_title(page_id):
     url = f"https://api.notion.com/v1/pages/{page_id}"
-    resp = requests.get(url, headers=HEADERS)
+    resp = get_client().get(url, headers=HEADERS)
     if resp.status_code == 200:
         props = resp.json().get("properties", {})
         # Title property name varies, usually "Name" or "title"
@@ -2,15 +2,33 @@
 """
 Analyze n8n execution logs and suggest optimizations.
 Uses OpenRouter API for intelligent analysis.
+Responses are cached on disk (see llm_cache.py); pass --no-cache to bypass.
+Executions are compacted into per-node aggregates and deduplicated errors
+within a token budget (prompt_compactor.py) before they reach the prompt.
+OpenRouter calls share the machine-wide rate limit (rate_limiter.py) in the
+background lane, so they yield to interactive intake.
 """
 
 import os
 import json
 import logging
 from dotenv import load_dotenv
-import requests
 from datetime import datetime, timedelta
 
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import get_client
+from rate_limiter import get_limiter
+
+try:
+    from execution.llm_cache import get_default_cache, prompt_key, cache_disabled
+    from execution.model_router import get_router
+    from execution.prompt_compactor import compact_executions, summarize_executions, DEFAULT_TOKEN_BUDGET
+except ImportError:
+    from llm_cache import get_default_cache, prompt_key, cache_disabled
+    from model_router import get_router
+    from prompt_compactor import compact_executions, summarize_executions, DEFAULT_TOKEN_BUDGET
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,36 +39,58 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-def call_openrouter(prompt, model=None):
-    """Call OpenRouter API with the given prompt."""
+def call_openrouter(prompt, model=None, use_cache=True, lane="background", task="optimization"):
+    """
+    Call OpenRouter API with the given prompt (cached unless use_cache is False, rate-limited in `lane`).
+    
+    Without an explicit model the task's fallback chain is routed (model_router.py).
+    """
+    cache = get_default_cache() if use_cache and not cache_disabled() else None
+    key = prompt_key(model or f"route:{task}", prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info("OpenRouter response served from cache")
+            return cached
+    
     api_key = os.getenv('OPENROUTER_API_KEY')
     if not api_key:
         raise ValueError("OPENROUTER_API_KEY not found in environment")
     
-    if model is None:
-        model = os.getenv('OPENROUTER_MODEL', 'google/gemini-2.0-flash-exp:free')
-    
     url = "https://openrouter.ai/api/v1/chat/completions"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
+    limiter = get_limiter("openrouter")
+    throttle = limiter.lane(lane) if limiter else None
     
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}]
-    }
+    def attempt(attempt_model, timeout, is_last):
+        payload = {
+            "model": attempt_model,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        # Completions have no side effects, so they are safe to resend
+        response = get_client().post(url, headers=headers, json=payload, timeout=timeout, idempotent=True,
+                                     throttle=throttle, max_retries=None if is_last else 0)
+        response.raise_for_status()
+        content = response.json()['choices'][0]['message']['content']
+        if not content:
+            raise ValueError(f"{attempt_model} returned an empty completion")
+        return content
     
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        return response.json()['choices'][0]['message']['content']
+        content = attempt(model, 60, True) if model is not None else get_router().run(task, attempt)
     except Exception as e:
         logger.error(f"OpenRouter API call failed: {e}")
         raise
+    
+    if cache is not None:
+        cache.put(key, model or f"route:{task}", content)
+    return content
 
-def get_workflow_executions(workflow_id, hours=24):
-    """Fetch execution history from n8n API."""
+def get_workflow_executions(workflow_id, hours=24, include_data=True):
+    """Fetch execution history from n8n API (with runData, for per-node timings, unless include_data is False)."""
     api_url = os.getenv('N8N_API_URL', '').rstrip('/')
     api_key = os.getenv('N8N_API_KEY')
     
@@ -66,10 +106,11 @@ def get_workflow_executions(workflow_id, hours=24):
         url = f"{api_url}/api/v1/executions"
         params = {
             "workflowId": workflow_id,
-            "limit": 100
+            "limit": 100,
+            "includeData": str(include_data).lower()
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        response = get_client().get(url, headers=headers, params=params, timeout=30)
         response.raise_for_status()
         
         executions = response.json().get('data', [])
@@ -81,7 +122,7 @@ def get_workflow_executions(workflow_id, hours=24):
         logger.error(f"Failed to fetch executions: {e}")
         raise
 
-def analyze_logs(workflow_id, hours=24, output_dir=".tmp"):
+def analyze_logs(workflow_id, hours=24, output_dir=".tmp", use_cache=True):
     """
     Analyze workflow executions and generate optimization suggestions.
     
@@ -89,6 +130,7 @@ def analyze_logs(workflow_id, hours=24, output_dir=".tmp"):
         workflow_id (str): n8n workflow ID
         hours (int): Hours of execution history to analyze
         output_dir (str): Directory to save reports
+        use_cache (bool): Reuse cached OpenRouter responses
         
     Returns:
         dict: Performance report
@@ -119,11 +161,9 @@ def analyze_logs(workflow_id, hours=24, output_dir=".tmp"):
     
     avg_duration = sum(durations) / len(durations) if durations else 0
     
-    # Identify error patterns
-    error_messages = []
-    for e in executions:
-        if e.get('data', {}).get('resultData', {}).get('error'):
-            error_messages.append(e['data']['resultData']['error'])
+    # Identify error patterns (deduplicated, with per-node aggregates)
+    digest = summarize_executions(executions)
+    error_count = sum(1 for e in executions if e.get('data', {}).get('resultData', {}).get('error'))
     
     # Build performance report
     performance_report = {
@@ -134,8 +174,10 @@ def analyze_logs(workflow_id, hours=24, output_dir=".tmp"):
         "failed_executions": failed,
         "success_rate_percent": round(success_rate, 2),
         "average_duration_seconds": round(avg_duration, 2),
-        "error_count": len(error_messages),
-        "sample_errors": error_messages[:5] if error_messages else []
+        "error_count": error_count,
+        "distinct_errors": len(digest["errors"]),
+        "sample_errors": [{"node": e["node"], "message": e["message"][:500], "count": e["count"]}
+                          for e in digest["errors"][:5]]
     }
     
     # Save performance report
@@ -146,7 +188,7 @@ def analyze_logs(workflow_id, hours=24, output_dir=".tmp"):
     logger.info(f"Saved performance report to {report_path}")
     
     # Generate AI-powered optimization suggestions
-    suggestions = generate_optimization_suggestions(performance_report, executions[:10])
+    suggestions = generate_optimization_suggestions(performance_report, executions, use_cache=use_cache)
     
     suggestions_path = os.path.join(output_dir, "optimization_suggestions.md")
     with open(suggestions_path, 'w') as f:
@@ -155,16 +197,25 @@ def analyze_logs(workflow_id, hours=24, output_dir=".tmp"):
     
     return performance_report
 
-def generate_optimization_suggestions(performance_report, sample_executions):
-    """Use AI to analyze performance and suggest improvements."""
+def generate_optimization_suggestions(performance_report, sample_executions, use_cache=True,
+                                      token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Use AI to analyze performance and suggest improvements.
+    
+    Args:
+        performance_report (dict): Output of analyze_logs
+        sample_executions (list): Executions to summarize (any number; they are compacted)
+        use_cache (bool): Reuse cached OpenRouter responses
+        token_budget (int): Estimated tokens allowed for the execution digest
+    """
     
     prompt = f"""You are an n8n workflow optimization expert. Analyze this performance data and suggest specific improvements.
 
 Performance Report:
 {json.dumps(performance_report, indent=2)}
 
-Sample Executions (most recent):
-{json.dumps(sample_executions, indent=2)}
+Execution Digest (per-node timings, deduplicated errors, most recent runs):
+{compact_executions(sample_executions, token_budget)}
 
 Provide actionable optimization suggestions in markdown format. Include:
 1. Performance assessment (good/needs improvement)
@@ -177,7 +228,7 @@ Be specific and practical. Focus on changes that can be implemented in n8n."""
     
     try:
         logger.info("Generating AI-powered optimization suggestions")
-        response = call_openrouter(prompt)
+        response = call_openrouter(prompt, use_cache=use_cache)
         
         # Add header
         suggestions = f"""# Workflow Optimization Suggestions
@@ -206,7 +257,10 @@ def main():
     """Main execution for testing."""
     import sys
     
-    if len(sys.argv) < 2:
+    use_cache = '--no-cache' not in sys.argv
+    argv = [sys.argv[0]] + [a for a in sys.argv[1:] if a != '--no-cache']
+    
+    if len(argv) < 2:
         # Try to load from deployment info
         deployment_path = ".tmp/deployment_info.json"
         if os.path.exists(deployment_path):
@@ -214,19 +268,20 @@ def main():
                 deployment_info = json.load(f)
             workflow_id = deployment_info.get('workflow_id')
         else:
-            print("Usage: python analyze_logs.py <workflow_id> [hours]")
+            print("Usage: python analyze_logs.py <workflow_id> [hours] [--no-cache]")
             print("   or: ensure .tmp/deployment_info.json exists")
             sys.exit(1)
     else:
-        workflow_id = sys.argv[1]
+        workflow_id = argv[1]
     
-    hours = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    hours = int(argv[2]) if len(argv) > 2 else 24
     
-    report = analyze_logs(workflow_id, hours)
+    report = analyze_logs(workflow_id, hours, use_cache=use_cache)
     
     print("\n=== Performance Report ===")
     print(json.dumps(report, indent=2))
     print("\nSee .tmp/optimization_suggestions.md for detailed recommendations")
+    get_client().log_metrics()
 
 if __name__ == "__main__":
     main()
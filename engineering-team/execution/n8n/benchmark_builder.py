@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Benchmark the n8n_builder graph core on large synthetic workflows.
+Builds linear chains of HTTP Request nodes and times construction,
+name/id lookups and serialization (dict + json.dumps vs. streaming,
+full vs. incremental re-serialization after editing 1% of the nodes)
+the layered auto-layout and structural validator on branching graphs
+with AI sub-nodes, spec compilation (cold compile vs. cached plan),
+sub-workflow partitioning and deploy payload sanitization (per-key list
+checks with a log line per removal vs. the single-pass frozenset sanitizer).
+
+Usage:
+    python benchmark_builder.py
+    python benchmark_builder.py --sizes 1000 10000
+    python benchmark_builder.py --incremental-size 20000
+    python benchmark_builder.py --layout-sizes 10000
+    python benchmark_builder.py --validate-size 50000
+    python benchmark_builder.py --spec-clients 500
+    python benchmark_builder.py --partition-size 20000
+    python benchmark_builder.py --sanitize-size 10000
+"""
+
+import argparse
+import copy
+import io
+import json
+import logging
+import os
+import time
+
+import spec_compiler
+from partition_workflow import partition_workflow
+from payload_sanitizer import sanitize_workflow
+from n8n_builder import N8NWorkflow, orjson, validate_workflow_dict
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_INCREMENTAL_SIZE = 20000
+DEFAULT_LAYOUT_SIZES = [1000, 10000]
+DEFAULT_VALIDATE_SIZE = 50000
+DEFAULT_SPEC_CLIENTS = 500
+DEFAULT_PARTITION_SIZE = 20000
+DEFAULT_SANITIZE_SIZE = 10000
+SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs", "employee_onboarding.yaml")
+
+
+def build_chain(size: int) -> N8NWorkflow:
+    """Build a workflow of `size` nodes wired into one main chain."""
+    wf = N8NWorkflow(f"Benchmark {size}")
+    previous = None
+    for i in range(size):
+        node = wf.create_node(f"Step {i}", "n8n-nodes-base.httpRequest", {
+            "url": f"https://api.example.com/items/{i}",
+            "method": "GET"
+        })
+        if previous is not None:
+            wf.connect(previous, node)
+        previous = node
+    return wf
+
+
+def build_branching(size: int) -> N8NWorkflow:
+    """
+    Build a 4-way Switch tree of `size` main nodes; every 10th node is an
+    AI Agent with its own chat model attached.
+    """
+    wf = N8NWorkflow(f"Branching {size}")
+    nodes = []
+    for i in range(size):
+        if i % 10 == 9:
+            node = wf.create_node(f"Agent {i}", "@n8n/n8n-nodes-langchain.agent")
+            model = wf.create_node(f"Model {i}", "@n8n/n8n-nodes-langchain.lmChatOpenAi")
+            wf.connect(model, node, type="ai_languageModel")
+        else:
+            node = wf.create_node(f"Route {i}", "n8n-nodes-base.switch")
+        if i:
+            wf.connect(nodes[(i - 1) // 4], node, index=(i - 1) % 4)
+        nodes.append(node)
+    return wf
+
+
+def timed(fn, *args):
+    """Run fn(*args) and return (result, seconds)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_graph_core(size: int, lookups: int = 1000) -> dict:
+    """Time build, indexed lookups vs. a linear scan, and to_json."""
+    wf, build_s = timed(build_chain, size)
+
+    step = max(1, size // lookups)
+    names = [f"Step {i}" for i in range(0, size, step)][:lookups]
+    ids = [wf.get_node(name).id for name in names]
+
+    _, name_s = timed(lambda: [wf.get_node(n) for n in names])
+    _, id_s = timed(lambda: [wf.get_node_by_id(i) for i in ids])
+    # Baseline: what every lookup cost before the indexes existed
+    scan_names = names[:min(len(names), 50)]
+    _, scan_s = timed(lambda: [next(n for n in wf.nodes if n.name == name) for name in scan_names])
+
+    _, json_s = timed(wf.to_json)
+
+    return {
+        "nodes": size,
+        "build_s": build_s,
+        "lookup_name_us": name_s / len(names) * 1e6,
+        "lookup_id_us": id_s / len(ids) * 1e6,
+        "linear_scan_us": scan_s / len(scan_names) * 1e6,
+        "to_json_s": json_s,
+    }
+
+
+def bench_serializer(size: int) -> dict:
+    """Time the full-dict serializer against the streaming writer modes."""
+    wf = build_chain(size)
+    results = {"nodes": size}
+
+    _, results["dict_dumps_s"] = timed(lambda: json.dumps(wf.to_dict(), indent=2))
+    with open(os.devnull, 'w', encoding='utf-8') as sink:
+        _, results["stream_s"] = timed(wf.write_json, sink)
+        _, results["stream_compact_s"] = timed(lambda: wf.write_json(sink, compact=True))
+        if orjson is not None:
+            _, results["stream_orjson_s"] = timed(lambda: wf.write_json(sink, backend="orjson"))
+    return results
+
+
+def bench_incremental(size: int, edit_ratio: float = 0.01) -> dict:
+    """Edit `edit_ratio` of the nodes via set_option, then re-serialize."""
+    wf = build_chain(size)
+    wf.to_json()  # Warm the fragment caches, as after a first build
+
+    step = max(1, int(1 / edit_ratio))
+    edited = wf.nodes[::step]
+    for node in edited:
+        node.set_option("method", "POST")
+
+    _, full_s = timed(lambda: json.dumps(wf.to_dict(), indent=2))
+    _, incremental_s = timed(wf.to_json)
+    return {
+        "nodes": size,
+        "edited": len(edited),
+        "full_s": full_s,
+        "incremental_s": incremental_s,
+    }
+
+
+def bench_layout(size: int) -> dict:
+    """Time compute + apply of the layered layout on a branching graph."""
+    wf = build_branching(size)
+    _, layout_s = timed(wf.layout)
+    return {"nodes": len(wf.nodes), "layout_s": layout_s}
+
+
+def bench_validate(size: int) -> dict:
+    """Time validate() on the graph and validate_workflow_dict() on its JSON."""
+    wf = build_branching(size)
+    issues, graph_s = timed(wf.validate)
+    data = json.loads(wf.to_json(compact=True))
+    _, dict_s = timed(validate_workflow_dict, data)
+    return {"nodes": len(wf.nodes), "issues": len(issues), "graph_s": graph_s, "dict_s": dict_s}
+
+
+def bench_spec(clients: int) -> dict:
+    """Instantiate the onboarding spec once per client, cold vs. with the plan cache."""
+    spec = spec_compiler.yaml.safe_load(open(SPEC_PATH, encoding='utf-8'))
+    names = [{"client": f"Client {i}"} for i in range(clients)]
+
+    def cold():
+        for variables in names:
+            spec_compiler._PLAN_CACHE.clear()
+            spec_compiler.compile_spec(spec).instantiate(variables)
+
+    def cached():
+        plan = spec_compiler.compile_spec(spec)
+        for variables in names:
+            plan.instantiate(variables)
+
+    _, cold_s = timed(cold)
+    _, cached_s = timed(cached)
+    return {"clients": clients, "cold_s": cold_s, "cached_s": cached_s}
+
+
+def bench_partition(size: int, max_nodes: int = 200) -> dict:
+    """Time partition_workflow() on a chain and on a branching graph of `size` nodes."""
+    result = {"nodes": size, "max_nodes": max_nodes}
+    for label, builder in (("chain", build_chain), ("branching", build_branching)):
+        wf = builder(size)
+        (parts, _), seconds = timed(partition_workflow, wf, max_nodes)
+        result[f"{label}_s"] = seconds
+        result[f"{label}_parts"] = len(parts)
+    return result
+
+
+def _list_sanitize(workflow, log):
+    """The per-key sanitizer deploy_to_n8n used before payload_sanitizer.py (baseline)."""
+    for key in ('active', 'tags'):
+        if key in workflow:
+            del workflow[key]
+    valid_node_keys = ['id', 'name', 'type', 'typeVersion', 'position', 'parameters', 'credentials',
+                       'disabled', 'notes', 'continueOnFail', 'retryOnFail']
+    for node in workflow.get('nodes', []):
+        for k in [k for k in node.keys() if k not in valid_node_keys]:
+            log.info(f"Removing invalid key '{k}' from node '{node.get('name')}'")
+            del node[k]
+
+
+def bench_sanitize(size: int, dirty_ratio: float = 0.2) -> dict:
+    """Time both sanitizers on an exported-style payload where `dirty_ratio` of nodes carry UI-only keys."""
+    payload = build_chain(size).to_dict()
+    payload.update(active=True, tags=[{"name": "bench"}], id="wf1", meta={"instanceId": "x"}, pinData={})
+    step = max(1, int(1 / dirty_ratio))
+    for node in payload["nodes"][::step]:
+        node.update(selected=True, issues={}, pinData=[])
+    # Log lines go to memory, as they would to a file handler
+    log = logging.getLogger("benchmark_builder.list_sanitize")
+    log.propagate = False
+    log.addHandler(logging.StreamHandler(io.StringIO()))
+    log.setLevel(logging.INFO)
+
+    list_copy, set_copy = copy.deepcopy(payload), copy.deepcopy(payload)
+    _, list_s = timed(_list_sanitize, list_copy, log)
+    report, set_s = timed(sanitize_workflow, set_copy, "legacy")
+    return {"nodes": size, "removed": sum(report["nodes"].values()), "list_s": list_s, "set_s": set_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the n8n_builder graph core')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Workflow sizes (node counts) to benchmark')
+    parser.add_argument('--incremental-size', type=int, default=DEFAULT_INCREMENTAL_SIZE,
+                        help='Workflow size for the 1%% edit re-serialization benchmark')
+    parser.add_argument('--layout-sizes', type=int, nargs='+', default=DEFAULT_LAYOUT_SIZES,
+                        help='Main-flow node counts for the auto-layout benchmark')
+    parser.add_argument('--validate-size', type=int, default=DEFAULT_VALIDATE_SIZE,
+                        help='Main-flow node count for the validation benchmark')
+    parser.add_argument('--spec-clients', type=int, default=DEFAULT_SPEC_CLIENTS,
+                        help='Clients to instantiate the onboarding spec for (needs PyYAML)')
+    parser.add_argument('--partition-size', type=int, default=DEFAULT_PARTITION_SIZE,
+                        help='Main-flow node count for the partitioning benchmark')
+    parser.add_argument('--sanitize-size', type=int, default=DEFAULT_SANITIZE_SIZE,
+                        help='Node count for the deploy payload sanitizer benchmark')
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'build s':>9} {'name µs':>9} {'id µs':>8} {'scan µs':>10} {'to_json s':>10}")
+    for size in args.sizes:
+        r = bench_graph_core(size)
+        print(f"{r['nodes']:>8} {r['build_s']:>9.3f} {r['lookup_name_us']:>9.2f} "
+              f"{r['lookup_id_us']:>8.2f} {r['linear_scan_us']:>10.1f} {r['to_json_s']:>10.3f}")
+
+    print(f"\n{'nodes':>8} {'dict+dumps s':>13} {'stream s':>9} {'compact s':>10} {'orjson s':>9}")
+    for size in args.sizes:
+        r = bench_serializer(size)
+        orjson_s = f"{r['stream_orjson_s']:>9.3f}" if 'stream_orjson_s' in r else f"{'n/a':>9}"
+        print(f"{r['nodes']:>8} {r['dict_dumps_s']:>13.3f} {r['stream_s']:>9.3f} "
+              f"{r['stream_compact_s']:>10.3f} {orjson_s}")
+
+    r = bench_incremental(args.incremental_size)
+    print(f"\nEdited {r['edited']} of {r['nodes']} nodes: full {r['full_s']:.3f}s, "
+          f"incremental {r['incremental_s']:.3f}s ({r['full_s'] / r['incremental_s']:.1f}x)")
+
+    print(f"\n{'nodes':>8} {'layout s':>9}")
+    for size in args.layout_sizes:
+        r = bench_layout(size)
+        print(f"{r['nodes']:>8} {r['layout_s']:>9.3f}")
+
+    r = bench_validate(args.validate_size)
+    print(f"\nValidated {r['nodes']} nodes ({r['issues']} issues): "
+          f"graph {r['graph_s']:.3f}s, JSON dict {r['dict_s']:.3f}s")
+
+    if spec_compiler.yaml is not None:
+        r = bench_spec(args.spec_clients)
+        print(f"\nSpec for {r['clients']} clients: compile every time {r['cold_s']:.3f}s, "
+              f"cached plan {r['cached_s']:.3f}s")
+
+    r = bench_partition(args.partition_size)
+    print(f"\nPartitioned {r['nodes']} nodes at {r['max_nodes']}/workflow: "
+          f"chain {r['chain_s']:.3f}s ({r['chain_parts']} parts), "
+          f"branching {r['branching_s']:.3f}s ({r['branching_parts']} parts)")
+
+    r = bench_sanitize(args.sanitize_size)
+    print(f"\nSanitized {r['nodes']} nodes ({r['removed']} keys removed): "
+          f"per-key list + log {r['list_s'] * 1000:.1f}ms, single-pass frozenset {r['set_s'] * 1000:.1f}ms "
+          f"({r['list_s'] / r['set_s']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,86 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+def deployment_callout(deployment_info):
+    """Callout block linking to the deployed workflow in the n8n editor."""
+    n8n_url = deployment_info.get('n8n_url', '').rstrip('/')
+    wf_id = deployment_info.get('workflow_id', '')
+    editor_url = f"{n8n_url}/workflow/{wf_id}"
+    
+    return {
+        "object": "block",
+        "type": "callout",
+        "callout": {
+            "rich_text": [
+                {"text": {"content": "🚀 Active in n8n - "}},
+                {"text": {"content": "Open Editor", "link": {"url": editor_url}}, "annotations": {"bold": True}}
+            ],
+            "icon": {"emoji": "⚡"}
+        }
+    }
+
+def add_deployment_link(page_id, deployment_path):
+    """
+    Append the n8n editor callout to an existing page.
+    
+    Used when documentation is created while deployment is still running,
+    so the page could not include the link up front.
+    
+    Args:
+        page_id (str): Notion page id from create_notion_docs
+        deployment_path (str): Path to deployment_info.json
+        
+    Returns:
+        bool: True if a link was added
+    """
+    if not page_id or not deployment_path or not os.path.exists(deployment_path):
+        return False
+    
+    with open(deployment_path, 'r') as f:
+        deployment_info = json.load(f)
+    
+    notion = Client(auth=os.getenv('NOTION_API_KEY'))
+    notion.blocks.children.append(block_id=page_id, children=[deployment_callout(deployment_info)])
+    logger.info(f"Added n8n editor link to Notion page {page_id}")
+    return True
+
+def link_deployment_docs(output_dir):
+    """
+    Add the n8n editor link to a project's Notion page once both exist.
+    
+    Called by the pipeline and by the deploy queue worker, whichever sees
+    both files first; notion_link.json records the linked deployment so the
+    callout is not added twice.
+    
+    Args:
+        output_dir (str): Project directory with notion_page_info.json and deployment_info.json
+        
+    Returns:
+        bool: True if a link was added
+    """
+    page_path = os.path.join(output_dir, "notion_page_info.json")
+    deployment_path = os.path.join(output_dir, "deployment_info.json")
+    marker_path = os.path.join(output_dir, "notion_link.json")
+    if not os.path.exists(page_path) or not os.path.exists(deployment_path):
+        return False
+    
+    with open(page_path, 'r') as f:
+        page_id = json.load(f).get('page_id')
+    with open(deployment_path, 'r') as f:
+        workflow_id = json.load(f).get('workflow_id')
+    if os.path.exists(marker_path):
+        with open(marker_path, 'r') as f:
+            marker = json.load(f)
+        if marker.get('page_id') == page_id and marker.get('workflow_id') == workflow_id:
+            return False
+    
+    linked = add_deployment_link(page_id, deployment_path)
+    if linked:
+        with open(marker_path, 'w') as f:
+            json.dump({"page_id": page_id, "workflow_id": workflow_id,
+                       "linked_at": datetime.now().isoformat()}, f, indent=2)
+    return linked
+
 def create_notion_docs(requirements_path, workflow_path, deployment_path=None, performance_path=None, output_dir=".tmp"):
     """
     Create comprehensive Notion documentation for a workflow.
@@ -88,21 +168,7 @@ def create_notion_docs(requirements_path, workflow_path, deployment_path=None, p
         
         # Callout with Link to n8n
         if deployment_info:
-            n8n_url = deployment_info.get('n8n_url', '').rstrip('/')
-            wf_id = deployment_info.get('workflow_id', '')
-            editor_url = f"{n8n_url}/workflow/{wf_id}"
-            
-            children.append({
-                "object": "block",
-                "type": "callout",
-                "callout": {
-                    "rich_text": [
-                        {"text": {"content": "🚀 Active in n8n - "}},
-                        {"text": {"content": "Open Editor", "link": {"url": editor_url}}, "annotations": {"bold": True}}
-                    ],
-                    "icon": {"emoji": "⚡"}
-                }
-            })
+            children.append(deployment_callout(deployment_info))
 
         # Overview section
         children.append({
@@ -10,6 +10,17 @@ import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import get_client
+
+try:
+    from execution.workflow_catalog import get_catalog
+    from execution.payload_sanitizer import sanitize_workflow, describe_removals
+except ImportError:
+    from workflow_catalog import get_catalog
+    from payload_sanitizer import sanitize_workflow, describe_removals
+
 # Load environment variables
 load_dotenv()
 
@@ -38,22 +49,10 @@ def load_workflow(workflow_file):
         raise FileNotFoundError(f"Workflow file not found: {workflow_file}")
 
 def check_existing_workflow(n8n_url, api_key, workflow_name):
-    """Check if workflow with this name already exists"""
-    headers = {
-        'X-N8N-API-KEY': api_key,
-        'Content-Type': 'application/json'
-    }
-    
+    """Check if workflow with this name already exists (via the local workflow catalog)"""
     try:
-        response = requests.get(f"{n8n_url}/api/v1/workflows", headers=headers)
-        response.raise_for_status()
-        
-        workflows = response.json()
-        for wf in workflows.get('data', []):
-            if wf.get('name') == workflow_name:
-                return wf.get('id')
-        
-        return None
+        existing = get_catalog(n8n_url, api_key).resolve(workflow_name)
+        return existing['id'] if existing else None
     except requests.exceptions.RequestException:
         # If we can't check, assume it doesn't exist
         return None
@@ -79,6 +78,11 @@ def deploy_workflow(workflow_file, update_existing=True):
     workflow = load_workflow(workflow_file)
     workflow_name = workflow['name']
     
+    # Strip properties the API rejects (read-only fields, UI-only node keys, extra settings)
+    removed = describe_removals(sanitize_workflow(workflow))
+    if removed:
+        print(f"  - Removed for the API: {removed}")
+    
     # Check if workflow exists
     existing_id = check_existing_workflow(n8n_url, api_key, workflow_name)
     
@@ -92,15 +96,16 @@ def deploy_workflow(workflow_file, update_existing=True):
             # Update existing workflow
             print(f"\n🔄 Updating existing workflow (ID: {existing_id})...")
             url = f"{n8n_url}/api/v1/workflows/{existing_id}"
-            response = requests.put(url, headers=headers, json=workflow)
+            response = get_client().put(url, headers=headers, json=workflow)
         else:
             # Create new workflow
             print(f"\n✨ Creating new workflow...")
             url = f"{n8n_url}/api/v1/workflows"
-            response = requests.post(url, headers=headers, json=workflow)
+            response = get_client().post(url, headers=headers, json=workflow)
         
         response.raise_for_status()
         result = response.json()
+        get_catalog(n8n_url, api_key).record(result)
         
         workflow_id = result.get('id')
         print(f"\n✅ Workflow deployed successfully!")
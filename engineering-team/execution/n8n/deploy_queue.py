@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Durable local queue for n8n deploy and activate jobs.
+The pipeline enqueues a deploy and returns; a pool of worker threads (in
+any process) drains the queue from a SQLite file under .tmp/cache/, so a
+slow n8n instance no longer holds up the pipeline and a crash loses nothing.
+
+- At-least-once: a worker leases a job while it runs and a heartbeat thread
+  keeps extending the lease; a job whose worker died is claimed again once
+  its lease lapses, until max_attempts (then it fails). Deploys are safe to repeat (the target is resolved by
+  name and unchanged workflows are skipped, see deploy_to_n8n.py).
+- Idempotency keys come from the canonical hash of the sanitized workflow
+  (plus kind, instance, environment and output directory): enqueueing the
+  same content for the same project again returns the existing job instead
+  of adding one. Failed jobs are re-queued by a new enqueue; done ones only
+  with force. Jobs writing the same workflow name on one instance run one
+  at a time, so identical projects cannot both create it.
+- Priorities are the rate limiter's lanes: interactive jobs (pipeline runs)
+  are claimed before batch before background, oldest first within a lane.
+- Transient failures are retried with exponential backoff up to
+  max_attempts; other errors fail the job at once.
+
+Usage:
+    python deploy_queue.py status
+    python deploy_queue.py list --status failed
+    python deploy_queue.py show 12
+    python deploy_queue.py enqueue .tmp/project_x/workflow.json --priority batch
+    python deploy_queue.py work --workers 4 [--drain]
+    python deploy_queue.py retry 12
+    python deploy_queue.py purge --days 7
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import sqlite3
+import hashlib
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import get_client, RETRY_STATUSES
+from rate_limiter import LANES
+
+try:
+    from execution.payload_sanitizer import sanitize_workflow
+    from execution.workflow_diff import canonical_hash
+    from execution.workflow_catalog import get_catalog
+except ImportError:
+    from payload_sanitizer import sanitize_workflow
+    from workflow_diff import canonical_hash
+    from workflow_catalog import get_catalog
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(".tmp", "cache", "deploy_queue.sqlite")
+KINDS = ("deploy", "activate")
+DEFAULT_MAX_ATTEMPTS = 5
+LEASE_SECONDS = 60.0  # A running job whose worker stops heartbeating is reclaimed after this
+HEARTBEAT_SECONDS = 5.0
+POLL_SECONDS = 1.0
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 300.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    priority INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    target TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, id);
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    threads INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+def is_transient(error: Exception) -> bool:
+    """True for failures worth another attempt: network errors, timeouts, 429/5xx."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUSES
+    return False
+
+
+def workflow_key(kind: str, workflow_path: str, environment: str, api_url: str, output_dir: str = "") -> str:
+    """
+    Idempotency key: kind, instance, environment, output directory and the
+    sanitized workflow's canonical hash. The output directory is part of it
+    because each project needs its own deployment_info.json and docs link,
+    even when two projects deploy identical content.
+    """
+    with open(workflow_path, 'r') as f:
+        workflow = json.load(f)
+    sanitize_workflow(workflow)
+    material = f"{kind}\n{api_url}\n{environment}\n{output_dir}\n{canonical_hash(workflow)}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def workflow_target(workflow_path: str, api_url: str) -> str:
+    """What a job writes to: the instance and workflow name (jobs on one target never run concurrently)."""
+    with open(workflow_path, 'r') as f:
+        return f"{api_url}\n{json.load(f).get('name')}"
+
+
+def _job_dict(row) -> Dict[str, Any]:
+    keys = ("id", "kind", "idempotency_key", "priority", "payload", "status", "attempts", "max_attempts",
+            "available_at", "lease_until", "worker", "result", "error", "created_at", "updated_at", "target")
+    job = dict(zip(keys, row))
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["priority"] = next((name for name, value in LANES.items() if value == job["priority"]), job["priority"])
+    return job
+
+
+class DeployQueue:
+    """SQLite-backed job queue shared by every process that opens the same file."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+                if "target" not in columns:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN target TEXT")
+                conn.execute("CREATE INDEX IF NOT EXISTS jobs_target ON jobs (target, status)")
+                self._initialized = True
+            with conn:
+                if immediate:
+                    # Take the write lock before reading, so two claimers cannot pick the same job
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: str, priority: str = "interactive",
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS, force: bool = False,
+                target: str = None) -> Dict[str, Any]:
+        """
+        Add a job unless one with the same idempotency key exists.
+
+        Args:
+            kind (str): 'deploy' or 'activate'
+            payload (dict): Job arguments (see run_job)
+            idempotency_key (str): Jobs with equal keys are the same job
+            priority (str): Lane name (interactive, batch, background)
+            max_attempts (int): Tries before the job is marked failed
+            force (bool): Re-queue the existing job even if it is done
+            target (str): Jobs with equal targets are claimed one at a time
+                (see workflow_target), so two projects deploying the same
+                workflow name cannot both create it
+
+        Returns:
+            dict: The job, with "enqueued" False when an existing one was returned as is
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        if priority not in LANES:
+            raise ValueError(f"Unknown priority '{priority}' (use {', '.join(LANES)})")
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO jobs (kind, idempotency_key, priority, payload, status, max_attempts, "
+                "available_at, created_at, updated_at, target) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (kind, idempotency_key, LANES[priority], json.dumps(payload), max_attempts, now, now, now, target)
+            ).rowcount
+            requeued = 0
+            if not inserted:
+                requeued = conn.execute(
+                    "UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, error = NULL, "
+                    "priority = MIN(priority, ?), payload = ?, max_attempts = ?, updated_at = ?, target = ? "
+                    "WHERE idempotency_key = ? AND (status = 'failed' OR (? AND status = 'done'))",
+                    (now, LANES[priority], json.dumps(payload), max_attempts, now, target, idempotency_key,
+                     int(force))
+                ).rowcount
+            row = conn.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        job = _job_dict(row)
+        job["enqueued"] = bool(inserted or requeued)
+        if job["enqueued"]:
+            logger.info(f"Queued {kind} job {job['id']} ({priority})")
+        else:
+            logger.info(f"{kind} job {job['id']} for this content already {job['status']}, not queued again")
+        return job
+
+    def enqueue_deploy(self, workflow_path: str, environment: str = "staging", output_dir: str = None,
+                       api_url: str = None, priority: str = "interactive", force: bool = False,
+                       max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Dict[str, Any]:
+        """Queue a deploy of workflow_path (deployment_info.json goes to output_dir, default its directory)."""
+        api_url = (api_url or os.getenv('N8N_API_URL') or "").rstrip('/')
+        payload = {
+            "workflow_path": os.path.abspath(workflow_path),
+            "environment": environment,
+            "output_dir": os.path.abspath(output_dir or os.path.dirname(workflow_path) or "."),
+            "api_url": api_url
+        }
+        key = workflow_key("deploy", workflow_path, environment, api_url, payload["output_dir"])
+        return self.enqueue("deploy", payload, key, priority, max_attempts, force,
+                            workflow_target(workflow_path, api_url))
+
+    def enqueue_activate(self, workflow_path: str, api_url: str = None, priority: str = "interactive",
+                         force: bool = False, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Dict[str, Any]:
+        """Queue activation of the deployed workflow with workflow_path's name."""
+        api_url = (api_url or os.getenv('N8N_API_URL') or "").rstrip('/')
+        payload = {"workflow_path": os.path.abspath(workflow_path), "api_url": api_url}
+        key = workflow_key("activate", workflow_path, "", api_url)
+        return self.enqueue("activate", payload, key, priority, max_attempts, force,
+                            workflow_target(workflow_path, api_url))
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next runnable job (highest priority, oldest first), or None.
+        Jobs whose target another job holds a live lease on wait their turn.
+        """
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            # A job whose lease lapsed on its last attempt most likely kills its worker; stop there
+            exhausted = conn.execute(
+                "UPDATE jobs SET status = 'failed', lease_until = NULL, updated_at = ?, "
+                "error = 'lease expired on attempt ' || attempts || '/' || max_attempts || ' (worker died?)' "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts", (now, now)
+            ).rowcount
+            if exhausted:
+                logger.error(f"{exhausted} job(s) failed: lease expired on their last attempt")
+            row = conn.execute(
+                "SELECT id FROM jobs AS j WHERE ((status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_until < ? AND attempts < max_attempts)) "
+                "AND (target IS NULL OR NOT EXISTS (SELECT 1 FROM jobs AS r WHERE r.target = j.target "
+                "AND r.id != j.id AND r.status = 'running' AND r.lease_until >= ?)) "
+                "ORDER BY priority, id LIMIT 1", (now, now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, "
+                         "lease_until = ?, updated_at = ? WHERE id = ?", (worker, now + LEASE_SECONDS, now, row[0]))
+            return _job_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (row[0],)).fetchone())
+
+    def complete(self, job_id: int, result: Dict[str, Any]):
+        """Mark a job done with its result."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, "
+                         "updated_at = ? WHERE id = ?", (json.dumps(result, default=str), time.time(), job_id))
+
+    def fail(self, job_id: int, error: str, retry: bool):
+        """Record a failed attempt: back off and re-queue if `retry` and attempts remain, else mark failed."""
+        now = time.time()
+        with self._connect() as conn:
+            attempts, max_attempts = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?",
+                                                  (job_id,)).fetchone()
+            if retry and attempts < max_attempts:
+                delay = random.uniform(0.5, 1.0) * min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+                conn.execute("UPDATE jobs SET status = 'queued', error = ?, available_at = ?, lease_until = NULL, "
+                             "updated_at = ? WHERE id = ?", (error, now + delay, now, job_id))
+                logger.warning(f"Job {job_id} attempt {attempts}/{max_attempts} failed ({error}), retry in {delay:.0f}s")
+            else:
+                conn.execute("UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, updated_at = ? "
+                             "WHERE id = ?", (error, now, job_id))
+                logger.error(f"Job {job_id} failed after {attempts} attempt(s): {error}")
+
+    def heartbeat(self, worker: str, threads: int, pid: int = None):
+        """Extend the leases of `worker`'s running jobs and mark the worker alive."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET lease_until = ? WHERE worker = ? AND status = 'running'",
+                         (now + LEASE_SECONDS, worker))
+            conn.execute("INSERT OR REPLACE INTO workers (name, pid, threads, heartbeat) VALUES (?, ?, ?, ?)",
+                         (worker, pid or os.getpid(), threads, now))
+
+    def retire(self, worker: str):
+        """Remove a worker that is shutting down."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE name = ?", (worker,))
+
+    def live_workers(self) -> List[Dict[str, Any]]:
+        """Workers that heartbeated within the lease period."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, pid, threads, heartbeat FROM workers WHERE heartbeat >= ?",
+                                (time.time() - LEASE_SECONDS,)).fetchall()
+        return [{"name": name, "pid": pid, "threads": threads, "heartbeat_age": round(time.time() - beat, 1)}
+                for name, pid, threads, beat in rows]
+
+    def pending(self) -> int:
+        """Jobs still to run: queued (now or after backoff) or running under a lapsed lease with attempts left."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' OR (status = 'running' "
+                                "AND lease_until < ? AND attempts < max_attempts)", (time.time(),)).fetchone()[0]
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """One job by id, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_dict(row) if row else None
+
+    def list(self, status: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally filtered by status."""
+        query, params = "SELECT * FROM jobs", ()
+        if status:
+            query, params = query + " WHERE status = ?", (status,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY id DESC LIMIT ?", params + (limit,)).fetchall()
+        return [_job_dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, Any]:
+        """Job counts by status and kind, plus live workers."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, kind, COUNT(*) FROM jobs GROUP BY status, kind").fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for status, kind, count in rows:
+            counts.setdefault(status, {})[kind] = count
+        return {"jobs": counts, "workers": self.live_workers(), "db_path": self.db_path}
+
+    def retry(self, job_id: int) -> bool:
+        """Re-queue a failed job now, with its attempts reset."""
+        with self._connect() as conn:
+            return conn.execute("UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, updated_at = ? "
+                                "WHERE id = ? AND status = 'failed'", (time.time(), time.time(), job_id)).rowcount > 0
+
+    def purge(self, older_than_days: float = 7) -> int:
+        """Delete done jobs older than the cutoff; returns how many."""
+        cutoff = time.time() - older_than_days * 86400
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM jobs WHERE status = 'done' AND updated_at < ?", (cutoff,)).rowcount
+
+
+def _link_docs(output_dir: str):
+    """Add the n8n link to the project's Notion page if documentation already exists."""
+    if not os.path.exists(os.path.join(output_dir, "notion_page_info.json")):
+        return False
+    try:
+        from execution.create_notion_docs import link_deployment_docs
+    except ImportError:
+        from create_notion_docs import link_deployment_docs
+    return link_deployment_docs(output_dir)
+
+
+def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute one job.
+
+    deploy: deploy_to_n8n(workflow_path, environment, output_dir, api_url), then
+    link the project's Notion page if the documentation is already there.
+    activate: resolve the workflow by name through the catalog and activate it.
+    """
+    payload = job["payload"]
+    api_key = os.getenv('N8N_API_KEY')
+    if job["kind"] == "deploy":
+        try:
+            from execution.deploy_to_n8n import deploy_to_n8n
+        except ImportError:
+            from deploy_to_n8n import deploy_to_n8n
+        info = deploy_to_n8n(payload["workflow_path"], payload["environment"], payload["output_dir"],
+                             api_url=payload["api_url"] or None, api_key=api_key)
+        try:
+            info["docs_linked"] = _link_docs(payload["output_dir"])
+        except Exception as e:
+            # The deploy itself succeeded; the pipeline's link stage can add it on --resume
+            logger.warning(f"Job {job['id']}: could not link Notion docs: {e}")
+        return info
+
+    with open(payload["workflow_path"], 'r') as f:
+        name = json.load(f).get('name')
+    api_url = payload["api_url"] or os.getenv('N8N_API_URL', '').rstrip('/')
+    existing = get_catalog(api_url, api_key).resolve(name)
+    if existing is None:
+        raise ValueError(f"No workflow named '{name}' on {api_url}; deploy it first")
+    response = get_client().post(f"{api_url}/api/v1/workflows/{existing['id']}/activate",
+                                 headers={"X-N8N-API-KEY": api_key}, timeout=30, idempotent=True)
+    response.raise_for_status()
+    return {"workflow_id": existing['id'], "workflow_name": name, "status": "active"}
+
+
+def work(queue: DeployQueue, workers: int = 4, drain: bool = False, stop: threading.Event = None) -> Dict[str, int]:
+    """
+    Drain the queue with a pool of worker threads.
+
+    Args:
+        queue (DeployQueue): Queue to work on
+        workers (int): Jobs run concurrently
+        drain (bool): Return once nothing is pending instead of polling forever
+        stop (threading.Event): Set to stop after the current jobs
+
+    Returns:
+        dict: Jobs done / retried / failed by this pool
+    """
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or threading.Event()
+    counts = {"done": 0, "retried": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def beat(finished):
+        while not finished.wait(HEARTBEAT_SECONDS) and not stop.is_set():
+            queue.heartbeat(name, workers)
+
+    def loop():
+        while not stop.is_set():
+            job = queue.claim(name)
+            if job is None:
+                if drain and queue.pending() == 0:
+                    return
+                stop.wait(POLL_SECONDS)
+                continue
+            logger.info(f"Running {job['kind']} job {job['id']} (attempt {job['attempts']}/{job['max_attempts']})")
+            try:
+                result = run_job(job)
+            except Exception as e:
+                retry = is_transient(e)
+                queue.fail(job["id"], f"{type(e).__name__}: {e}", retry)
+                with lock:
+                    counts["retried" if retry and job["attempts"] < job["max_attempts"] else "failed"] += 1
+                continue
+            queue.complete(job["id"], result)
+            logger.info(f"Job {job['id']} done: {result.get('workflow_id')}")
+            with lock:
+                counts["done"] += 1
+
+    while True:
+        queue.heartbeat(name, workers)
+        finished = threading.Event()
+        heartbeat_thread = threading.Thread(target=beat, args=(finished,), daemon=True)
+        heartbeat_thread.start()
+        threads = [threading.Thread(target=loop, name=f"deploy-worker-{i}") for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            logger.info("Stopping after the running jobs (their leases lapse if interrupted again)")
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finished.set()
+        heartbeat_thread.join()
+        queue.retire(name)
+        # A job enqueued while the threads were exiting saw this worker as live, so
+        # ensure_worker started none: look again now that we are retired
+        if stop.is_set() or not drain or queue.pending() == 0:
+            return counts
+        logger.info("Jobs arrived while draining finished, going round again")
+
+
+def ensure_worker(queue: DeployQueue, workers: int = 2) -> bool:
+    """
+    Start a detached draining worker process unless one is alive.
+
+    Set DEPLOY_QUEUE_AUTOSTART=0 to leave draining to a worker you run yourself.
+
+    Returns:
+        bool: True if a worker was started
+    """
+    if os.getenv("DEPLOY_QUEUE_AUTOSTART", "1").strip().lower() in ("0", "false", "off", "no"):
+        return False
+    if queue.live_workers():
+        return False
+    log_path = os.path.join(os.path.dirname(queue.db_path) or ".", "deploy_worker.log")
+    with open(log_path, 'a') as log:
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "work", "--drain",
+                                    "--workers", str(workers)],
+                                   stdout=log, stderr=log, stdin=subprocess.DEVNULL, start_new_session=True,
+                                   env=dict(os.environ, DEPLOY_QUEUE_PATH=os.path.abspath(queue.db_path)))
+    # Register it under the name work() will use, so callers right behind us see it alive
+    queue.heartbeat(f"{socket.gethostname()}:{process.pid}", workers, pid=process.pid)
+    logger.info(f"Started a deploy worker (log: {log_path})")
+    return True
+
+
+_default_queue = None
+
+
+def get_queue() -> DeployQueue:
+    """Process-wide queue (file from DEPLOY_QUEUE_PATH or .tmp/cache/deploy_queue.sqlite)."""
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = DeployQueue(os.getenv("DEPLOY_QUEUE_PATH", DEFAULT_DB_PATH))
+    return _default_queue
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Inspect and drain the n8n deploy job queue')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('status', help='Job counts and live workers')
+    list_parser = sub.add_parser('list', help='Recent jobs')
+    list_parser.add_argument('--status', choices=['queued', 'running', 'done', 'failed'])
+    list_parser.add_argument('--limit', type=int, default=20)
+    show_parser = sub.add_parser('show', help='One job with its payload and result')
+    show_parser.add_argument('job_id', type=int)
+    enqueue_parser = sub.add_parser('enqueue', help='Queue a deploy (or activation) of a workflow file')
+    enqueue_parser.add_argument('workflow', help='Path to workflow.json')
+    enqueue_parser.add_argument('--environment', default='staging', choices=['staging', 'production'])
+    enqueue_parser.add_argument('--priority', default='interactive', choices=list(LANES))
+    enqueue_parser.add_argument('--activate', action='store_true', help='Queue an activation instead of a deploy')
+    enqueue_parser.add_argument('--force', action='store_true', help='Queue again even if the same content is done')
+    work_parser = sub.add_parser('work', help='Run a worker pool')
+    work_parser.add_argument('--workers', type=int, default=4)
+    work_parser.add_argument('--drain', action='store_true', help='Exit once the queue is empty')
+    retry_parser = sub.add_parser('retry', help='Re-queue a failed job')
+    retry_parser.add_argument('job_id', type=int)
+    purge_parser = sub.add_parser('purge', help='Delete old done jobs')
+    purge_parser.add_argument('--days', type=float, default=7)
+    args = parser.parse_args()
+
+    queue = get_queue()
+    if args.command == 'status':
+        print(json.dumps(queue.counts(), indent=2))
+    elif args.command == 'list':
+        for job in queue.list(args.status, args.limit):
+            target = os.path.relpath(job["payload"].get("workflow_path", ""))
+            print(f"{job['id']:>6}  {job['kind']:<8} {job['status']:<8} {job['priority']:<11} "
+                  f"attempts {job['attempts']}/{job['max_attempts']}  {target}"
+                  + (f"  ({job['error']})" if job['status'] == 'failed' else ""))
+    elif args.command == 'show':
+        job = queue.get(args.job_id)
+        print(json.dumps(job, indent=2) if job else f"No job {args.job_id}")
+    elif args.command == 'enqueue':
+        if args.activate:
+            job = queue.enqueue_activate(args.workflow, priority=args.priority, force=args.force)
+        else:
+            job = queue.enqueue_deploy(args.workflow, args.environment, priority=args.priority, force=args.force)
+        print(json.dumps({k: job[k] for k in ("id", "kind", "status", "enqueued")}, indent=2))
+    elif args.command == 'work':
+        print(json.dumps(work(queue, args.workers, args.drain), indent=2))
+    elif args.command == 'retry':
+        print("Re-queued" if queue.retry(args.job_id) else f"Job {args.job_id} is not failed")
+    else:
+        print(f"Purged {queue.purge(args.days)} done jobs")
+
+
+if __name__ == "__main__":
+    main()
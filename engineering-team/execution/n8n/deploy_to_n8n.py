@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
 """
 Deploy n8n workflow programmatically via API.
+The target workflow is resolved by name from the local workflow catalog
+(workflow_catalog.py) instead of listing the instance on every deploy, and
+an update is only sent when the canonical hash of the payload differs from
+the deployed workflow's (workflow_diff.py); changes are logged node by node.
+A partition_manifest.json (partition_workflow.py) deploys as a group:
+children first, then the parents with their Execute Workflow nodes linked.
 """
 
 import os
@@ -9,6 +15,21 @@ import logging
 from dotenv import load_dotenv
 import requests
 
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import get_client
+
+try:
+    from execution.workflow_catalog import get_catalog
+    from execution.workflow_diff import canonical_hash, remote_hash, workflow_diff, describe_diff
+    from execution.payload_sanitizer import sanitize_workflow, describe_removals
+    from execution.partition_workflow import MANIFEST_NAME, link_partition_ids
+except ImportError:
+    from workflow_catalog import get_catalog
+    from workflow_diff import canonical_hash, remote_hash, workflow_diff, describe_diff
+    from payload_sanitizer import sanitize_workflow, describe_removals
+    from partition_workflow import MANIFEST_NAME, link_partition_ids
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,7 +40,43 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-def deploy_to_n8n(workflow_path, environment="staging", output_dir=".tmp"):
+def load_previous_deployment(output_dir):
+    """Return the last deployment_info.json in output_dir, or None."""
+    info_path = os.path.join(output_dir, "deployment_info.json")
+    if not os.path.exists(info_path):
+        return None
+    try:
+        with open(info_path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _fetch_workflow(client, api_url, headers, workflow_id, throttle=None):
+    """GET one workflow, or None if it no longer exists."""
+    response = client.get(f"{api_url}/api/v1/workflows/{workflow_id}", headers=headers, timeout=30,
+                          throttle=throttle)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+def _still_deployed(client, api_url, headers, previous, throttle=None):
+    """
+    True if the workflow recorded in a previous deployment_info.json is still
+    on the instance as that deploy left it (same n8n versionId, still active
+    for staging). One GET; a deleted or edited workflow returns False.
+    """
+    if not previous.get('workflow_id') or not previous.get('remote_version_id'):
+        return False
+    remote = _fetch_workflow(client, api_url, headers, previous['workflow_id'], throttle)
+    if remote is None:
+        return False
+    if remote.get('versionId') != previous['remote_version_id']:
+        return False
+    return previous.get('environment') != "staging" or bool(remote.get('active'))
+
+def deploy_to_n8n(workflow_path, environment="staging", output_dir=".tmp", skip_unchanged=False,
+                  api_url=None, api_key=None, throttle=None, diff=True, trust_cached_hash=False):
     """
     Deploy workflow to n8n instance.
     
@@ -27,6 +84,19 @@ def deploy_to_n8n(workflow_path, environment="staging", output_dir=".tmp"):
         workflow_path (str): Path to workflow.json
         environment (str): 'staging' or 'production'
         output_dir (str): Directory to save deployment info
+        skip_unchanged (bool): With diff=False, skip the deploy when the
+            workflow's versionId matches the last deployment recorded in
+            output_dir (only happens for builds with deterministic ids) and
+            the instance still has that deployment unedited. The diff path
+            already skips unchanged workflows and ignores this
+        api_url (str): n8n instance (defaults to N8N_API_URL)
+        api_key (str): API key (defaults to N8N_API_KEY)
+        throttle: Rate limit for the n8n calls (rate_limiter.py lane), if any
+        diff (bool): Compare with the deployed workflow first; skip the PUT
+            when nothing changed, otherwise record a node-level diff
+        trust_cached_hash (bool): Use the catalog's stored hash of the
+            deployed workflow instead of fetching it (right after a catalog
+            refresh, as bulk deploys do)
         
     Returns:
         dict: Deployment information
@@ -34,8 +104,8 @@ def deploy_to_n8n(workflow_path, environment="staging", output_dir=".tmp"):
     logger.info(f"Deploying workflow from {workflow_path} to {environment}")
     
     # Get n8n credentials
-    api_url = os.getenv('N8N_API_URL')
-    api_key = os.getenv('N8N_API_KEY')
+    api_url = api_url or os.getenv('N8N_API_URL')
+    api_key = api_key or os.getenv('N8N_API_KEY')
     
     if not api_url or not api_key:
         raise ValueError("N8N_API_URL and N8N_API_KEY must be set in .env")
@@ -46,84 +116,103 @@ def deploy_to_n8n(workflow_path, environment="staging", output_dir=".tmp"):
     # Load workflow
     with open(workflow_path, 'r') as f:
         workflow_data = json.load(f)
-    # Remove 'active' field if present (read-only in API)
-    if 'active' in workflow_data:
-        del workflow_data['active']
-        
-    # Remove 'tags' field if present (read-only in API)
-    if 'tags' in workflow_data:
-        del workflow_data['tags']
-    
-    # Sanitize nodes - remove extra properties that cause API errors
-    valid_node_keys = [
-        'id', 'name', 'type', 'typeVersion', 'position', 
-        'parameters', 'credentials', 'disabled', 'notes',
-        'continueOnFail', 'retryOnFail'
-    ]
-    
-    if 'nodes' in workflow_data:
-        for node in workflow_data['nodes']:
-            # Remove keys not in allowlist
-            keys_to_remove = [k for k in node.keys() if k not in valid_node_keys]
-            for k in keys_to_remove:
-                logger.info(f"Removing invalid key '{k}' from node '{node.get('name')}'")
-                del node[k]
-
-    # Valid keys sanitization is done above
-    
-    # Send request
-    logger.info("Creating new workflow")
-    # Tags removed to prevent read-only error
-    if 'tags' in workflow_data:
-        del workflow_data['tags']
+    version_id = workflow_data.get('versionId')
     
     # Prepare headers
     headers = {
         "X-N8N-API-KEY": api_key,
         "Content-Type": "application/json"
     }
+    client = get_client()
+    
+    if skip_unchanged and not diff and version_id:
+        previous = load_previous_deployment(output_dir)
+        # deployment_info.json only says what we sent; the instance decides whether it is still there
+        if (previous and previous.get('version_id') == version_id
+                and previous.get('workflow_name') == workflow_data.get('name')
+                and previous.get('environment') == environment
+                and previous.get('n8n_url') == api_url
+                and _still_deployed(client, api_url, headers, previous, throttle)):
+            logger.info(f"Workflow unchanged since last deploy (versionId {version_id}), skipping")
+            return dict(previous, skipped=True)
+    
+    # Strip properties the API rejects (read-only fields, UI-only node keys, extra settings)
+    removed = describe_removals(sanitize_workflow(workflow_data))
+    if removed:
+        logger.info(f"Sanitized payload, removed {removed}")
     
     try:
         # Create or update workflow
-        # First, try to find existing workflow by name
+        # First, resolve an existing workflow by name from the local catalog
         logger.info("Checking for existing workflow")
-        list_url = f"{api_url}/api/v1/workflows"
-        
-        response = requests.get(list_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        existing_workflows = response.json().get('data', [])
-        existing = None
-        for wf in existing_workflows:
-            if wf.get('name') == workflow_data.get('name'):
-                existing = wf
-                break
+        catalog = get_catalog(api_url, api_key)
+        existing = catalog.resolve(workflow_data.get('name'))
+        local_digest = canonical_hash(workflow_data)
+        result = None
+        unchanged = False
+        changes = None
 
         if existing:
-            # Update existing workflow
             workflow_id = existing['id']
+            remote = None
+            remote_digest = existing.get('content_hash') if trust_cached_hash else None
+            if diff and remote_digest != local_digest:
+                remote = _fetch_workflow(client, api_url, headers, workflow_id, throttle)
+                if remote is None:
+                    # Deleted since the catalog saw it
+                    logger.info(f"Workflow {workflow_id} no longer exists, creating it again")
+                    catalog.forget(workflow_id)
+                    existing = None
+                else:
+                    remote_digest = remote_hash(remote, workflow_data)
+                    catalog.record(remote, remote_digest)
+
+        if existing and diff and remote_digest == local_digest:
+            logger.info(f"Workflow {workflow_id} already matches the local payload, skipping update")
+            unchanged = True
+            result = remote or {"id": workflow_id, "name": existing['name'], "versionId": existing['version_id'],
+                                "updatedAt": existing['updated_at'], "active": existing['active']}
+        elif existing:
+            # Update existing workflow
+            if remote is not None:
+                changes = workflow_diff(workflow_data, remote)
+                logger.info(f"Changes for workflow {workflow_id}: {describe_diff(changes)}")
             logger.info(f"Updating existing workflow: {workflow_id}")
             update_url = f"{api_url}/api/v1/workflows/{workflow_id}"
             
-            response = requests.put(update_url, headers=headers, json=workflow_data, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-        else:
+            response = client.put(update_url, headers=headers, json=workflow_data, timeout=30,
+                                  throttle=throttle)
+            if response.status_code == 404:
+                # Deleted since the catalog saw it
+                logger.info(f"Workflow {workflow_id} no longer exists, creating it again")
+                catalog.forget(workflow_id)
+            else:
+                response.raise_for_status()
+                result = response.json()
+                catalog.record(result, local_digest)
+
+        if result is None:
             # Create new workflow
             logger.info("Creating new workflow")
             create_url = f"{api_url}/api/v1/workflows"
             
-            response = requests.post(create_url, headers=headers, json=workflow_data, timeout=30)
+            # Not retried after ambiguous failures: a resend could create a duplicate
+            response = client.post(create_url, headers=headers, json=workflow_data, timeout=30,
+                                   throttle=throttle)
             response.raise_for_status()
             result = response.json()
+            catalog.record(result, local_digest)
         
         workflow_id = result.get('id')
         
-        # Activate workflow if staging
-        if environment == "staging":
+        # Activate workflow if staging (and not already active)
+        if environment == "staging" and not result.get('active'):
             logger.info(f"Activating workflow {workflow_id}")
             activate_url = f"{api_url}/api/v1/workflows/{workflow_id}/activate"
-            requests.post(activate_url, headers=headers, timeout=30)
+            response = client.post(activate_url, headers=headers, timeout=30, idempotent=True, throttle=throttle)
+            if response.ok:
+                result = {**result, **(response.json() if response.content else {}), "active": True}
+                catalog.record(result)
         
         # Save deployment info
         deployment_info = {
@@ -132,7 +221,12 @@ def deploy_to_n8n(workflow_path, environment="staging", output_dir=".tmp"):
             "environment": environment,
             "n8n_url": api_url,
             "status": "active" if environment == "staging" else "inactive",
-            "tags": workflow_data.get('tags', [])
+            "tags": workflow_data.get('tags', []),
+            "version_id": version_id,
+            "remote_version_id": result.get('versionId'),
+            "content_hash": local_digest,
+            "unchanged": unchanged,
+            "diff": changes
         }
         
         os.makedirs(output_dir, exist_ok=True)
@@ -141,7 +235,7 @@ def deploy_to_n8n(workflow_path, environment="staging", output_dir=".tmp"):
             json.dump(deployment_info, f, indent=2)
         
         logger.info(f"Deployment successful! Workflow ID: {workflow_id}")
-        return deployment_info
+        return dict(deployment_info, skipped=unchanged)
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to deploy workflow: {e}")
@@ -152,6 +246,59 @@ def deploy_to_n8n(workflow_path, environment="staging", output_dir=".tmp"):
         logger.error(f"Deployment failed: {e}")
         raise
 
+def deploy_partitions(manifest_path, environment="staging", output_dir=".tmp", **kwargs):
+    """
+    Deploy the workflows of a partition manifest in its deploy_order.
+
+    Children are pushed before the workflows that call them; each parent is
+    deployed from a copy whose Execute Workflow nodes carry the ids its
+    children got on this instance.
+
+    Args:
+        manifest_path (str): partition_manifest.json written by save_partitions
+        environment (str): 'staging' or 'production'
+        output_dir (str): Directory for the linked copies and deployment info
+            (one subdirectory per partition)
+        **kwargs: Passed through to deploy_to_n8n
+
+    Returns:
+        dict: Root workflow's deployment info plus a 'partitions' list
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(manifest_path)
+    entries = {entry["name"]: entry for entry in manifest["workflows"]}
+    expected = {}
+    for link in manifest.get("links", []):
+        expected[link["workflow"]] = expected.get(link["workflow"], 0) + 1
+
+    ids = {}
+    results = {}
+    for name in manifest["deploy_order"]:
+        entry = entries[name]
+        workflow_path = os.path.join(base_dir, entry["file"])
+        part_dir = os.path.join(output_dir, os.path.splitext(entry["file"])[0])
+        if expected.get(name):
+            with open(workflow_path, 'r', encoding='utf-8') as f:
+                workflow_data = json.load(f)
+            linked = link_partition_ids({name: workflow_data}, manifest, ids)
+            if linked != expected[name]:
+                raise ValueError(f"Linked {linked} of {expected[name]} Execute Workflow nodes in '{name}'; "
+                                 f"a child was not deployed first")
+            os.makedirs(part_dir, exist_ok=True)
+            workflow_path = os.path.join(part_dir, "workflow.json")
+            with open(workflow_path, 'w', encoding='utf-8') as f:
+                json.dump(workflow_data, f, indent=2)
+        results[name] = deploy_to_n8n(workflow_path, environment, part_dir, **kwargs)
+        ids[name] = results[name]["workflow_id"]
+
+    root = manifest["workflows"][0]["name"]
+    logger.info(f"Deployed {len(results)} partitions of '{manifest.get('source_workflow', root)}'")
+    return dict(results[root],
+                skipped=all(info.get("skipped") for info in results.values()),
+                partitions=[{"name": name, "workflow_id": info["workflow_id"], "skipped": info.get("skipped", False)}
+                            for name, info in results.items()])
+
 def main():
     """Main execution for testing."""
     import sys
@@ -164,10 +311,14 @@ def main():
         print("Run generate_workflow.py first")
         sys.exit(1)
     
-    deployment_info = deploy_to_n8n(workflow_path, environment)
+    if os.path.basename(workflow_path) == MANIFEST_NAME:
+        deployment_info = deploy_partitions(workflow_path, environment)
+    else:
+        deployment_info = deploy_to_n8n(workflow_path, environment)
     
     print("\n=== Deployment Successful ===")
     print(json.dumps(deployment_info, indent=2))
+    get_client().log_metrics()
 
 if __name__ == "__main__":
     main()
@@ -6,11 +6,14 @@ Target: AI Agents, Security/Guardrails, CRM, Sales, Marketing.
 """
 
 import os
-import requests
 import json
 import logging
 import shutil
 
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import get_client
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -93,7 +96,7 @@ def main():
             filename = filename.lower()
             
             logger.info(f"Downloading {filename}...")
-            r = requests.get(url, timeout=10)
+            r = get_client().get(url, timeout=10)
             
             if r.status_code == 200:
                 # Verify it is valid JSON
@@ -111,6 +114,7 @@ def main():
             logger.error(f"Error downloading {url}: {e}")
 
     logger.info(f"Successfully downloaded {count} templates.")
+    get_client().log_metrics()
 
 if __name__ == "__main__":
     main()
@@ -7,21 +7,50 @@ programmatically, ensuring 100% valid JSON and correct topologies.
 
 import json
 import os
+import shutil
 import logging
 try:
     from execution.n8n_builder import N8NWorkflow, create_webhook, create_ai_agent, create_openai_model, create_window_memory, create_guardrails
+    from execution.workflow_cache import WorkflowBuildCache, requirements_key, DEFAULT_CACHE_DIR
 except ImportError:
     from n8n_builder import N8NWorkflow, create_webhook, create_ai_agent, create_openai_model, create_window_memory, create_guardrails
+    from workflow_cache import WorkflowBuildCache, requirements_key, DEFAULT_CACHE_DIR
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def generate_business_workflow(requirements, output_path):
+# Part of the build cache key: bump whenever the generated graph changes
+BUILDER_VERSION = "2"
+# Builder settings for fresh builds; cache hits are restored with the same ones
+BUILD_FLAGS = {"auto_layout": True, "deterministic_ids": True}
+
+def generate_business_workflow(requirements, output_path, use_cache=True, cache_dir=DEFAULT_CACHE_DIR):
     """
     Constructs a workflow based on the "Modern AI Agent" pattern.
+
+    Args:
+        requirements (dict): Structured requirements (requirements.json)
+        output_path (str): Where to write workflow.json
+        use_cache (bool): Reuse a previous build for identical requirements
+        cache_dir (str): Build cache directory
+        
+    Returns:
+        N8NWorkflow: The built (or cached) workflow
     """
+    cache = WorkflowBuildCache(cache_dir) if use_cache else None
+    if cache is not None:
+        cache_key = requirements_key(requirements, BUILDER_VERSION)
+        cached_path = cache.get(cache_key)
+        if cached_path:
+            logger.info(f"Build cache hit ({cache_key[:12]}), reusing cached workflow")
+            shutil.copyfile(cached_path, output_path)
+            with open(cached_path, 'r', encoding='utf-8') as f:
+                return N8NWorkflow.from_dict(json.load(f), **BUILD_FLAGS)
+
     wf_name = requirements.get("workflow_name", "AI Business Automation")
-    wf = N8NWorkflow(wf_name)
+    # Deterministic ids: identical requirements give byte-identical workflow.json,
+    # which lets deploy_to_n8n skip unchanged workflows
+    wf = N8NWorkflow(wf_name, **BUILD_FLAGS)
     
     logger.info(f"Building workflow: {wf_name}")
     
@@ -52,9 +81,14 @@ def generate_business_workflow(requirements, output_path):
     
     logger.info("Workflow graph constructed successfully.")
     
-    # 4. Save
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(wf.to_json())
+    # Structural check: raises on dangling edges, cycles, bad AI wiring
+    for issue in wf.validate(strict=True):
+        logger.warning(f"Workflow check [{issue.code}]: {issue.message}")
+    
+    # 4. Save (streamed node by node, no intermediate JSON string)
+    wf.save(output_path)
+    if cache is not None:
+        cache.put(cache_key, output_path)
         
     return wf
 
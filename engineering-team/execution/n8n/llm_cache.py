@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Persistent prompt/response cache for OpenRouter calls.
+Responses are stored in a SQLite file under .tmp/cache/ keyed by a hash of
+the model plus the normalized prompt, expire after a TTL, and are evicted
+least-recently-used first once the cache grows past its size budget.
+Hit/miss counters are kept in the database so they survive across runs.
+
+Set OPENROUTER_CACHE=0 (or pass use_cache=False / --no-cache) to bypass it.
+
+Usage:
+    python llm_cache.py stats
+    python llm_cache.py evict
+    python llm_cache.py clear
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(".tmp", "cache", "llm_cache.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Strip trailing whitespace and collapse runs of blank lines so cosmetic edits still hit."""
+    lines = []
+    for line in prompt.strip().splitlines():
+        line = line.rstrip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    """sha256 of the model name and normalized prompt."""
+    return hashlib.sha256(f"{model}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+def cache_disabled() -> bool:
+    """True when OPENROUTER_CACHE is set to 0/false/off."""
+    return os.getenv("OPENROUTER_CACHE", "1").strip().lower() in ("0", "false", "off", "no")
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with TTL expiry and LRU size-bounded eviction."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One short transaction; a connection per operation keeps the cache safe across processes."""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, conn: sqlite3.Connection, name: str):
+        conn.execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for `key` and mark it recently used, or None."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self._count(conn, "hits")
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        """Store a response, then evict if over budget."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (key, model, response, len(response.encode("utf-8")), now, now))
+        self.evict()
+
+    def delete(self, key: str):
+        """Drop one entry (e.g. a response that turned out to be unusable)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def evict(self) -> int:
+        """Remove expired entries, then least recently used ones until under max_bytes."""
+        removed = 0
+        with self._connect() as conn:
+            removed += conn.execute("DELETE FROM responses WHERE created_at < ?",
+                                    (time.time() - self.ttl_seconds,)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                doomed = []
+                for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((key,))
+                    total -= size
+                conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+                removed += len(doomed)
+        if removed:
+            logger.info(f"Evicted {removed} cached LLM response(s) from {self.db_path}")
+        return removed
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM counters")
+
+    def stats(self) -> Dict[str, int]:
+        """Persistent counters plus current entry count and size."""
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "entries": entries,
+            "bytes": size
+        }
+
+
+_default_cache: Optional[LLMResponseCache] = None
+
+
+def get_default_cache() -> LLMResponseCache:
+    """Process-wide cache configured from LLM_CACHE_PATH / LLM_CACHE_TTL / LLM_CACHE_MAX_BYTES."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMResponseCache(
+            os.getenv("LLM_CACHE_PATH", DEFAULT_DB_PATH),
+            float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+            int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        )
+    return _default_cache
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Inspect or clean the OpenRouter response cache')
+    parser.add_argument('command', choices=['stats', 'evict', 'clear'])
+    args = parser.parse_args()
+
+    cache = get_default_cache()
+    if args.command == 'evict':
+        print(f"Evicted {cache.evict()} entries")
+    elif args.command == 'clear':
+        cache.clear()
+        print(f"Cleared {cache.db_path}")
+    else:
+        print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
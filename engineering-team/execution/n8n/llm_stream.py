@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Streaming support for OpenRouter completions.
+iter_sse_deltas() turns a server-sent-events response into content chunks and
+IncrementalJSONParser consumes them as they arrive: every top-level field is
+decoded and validated the moment its value is complete, so callers see the
+first useful field early and a malformed or off-schema generation is aborted
+(StreamAbort) before the rest of it is paid for.
+"""
+
+import json
+import time
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Characters allowed before the opening '{' (markdown fence, a short preamble)
+MAX_PREAMBLE_CHARS = 2000
+
+_CLOSING = {"}": "{", "]": "["}
+
+
+class StreamAbort(Exception):
+    """The streamed output is malformed or violates the expected schema."""
+
+    def __init__(self, reason: str, partial: str = ""):
+        super().__init__(reason)
+        self.reason = reason
+        self.partial = partial
+
+
+def iter_sse_deltas(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Yield the content deltas of an OpenAI-style chat completion stream.
+
+    Args:
+        lines: Decoded SSE lines (e.g. response.iter_lines(decode_unicode=True))
+
+    Yields:
+        str: Content chunks, in order
+    """
+    for line in lines:
+        if not line or line.startswith(":"):
+            continue  # keep-alive comments such as ": OPENROUTER PROCESSING"
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        event = json.loads(data)
+        if "error" in event:
+            error = event["error"]
+            raise RuntimeError(f"Stream error: {error.get('message', error) if isinstance(error, dict) else error}")
+        for choice in event.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+class IncrementalJSONParser:
+    """
+    Parse a JSON object from a character stream, one top-level field at a time.
+
+    Only structure (strings, escapes, bracket nesting) is tracked per character;
+    each completed `"key": value` member is decoded once with json.loads, so the
+    whole parse stays linear in the output length.
+    """
+
+    def __init__(self, on_field: Callable[[str, Any], None] = None,
+                 validators: Dict[str, Callable[[Any], Optional[str]]] = None,
+                 required: Iterable[str] = (), max_preamble: int = MAX_PREAMBLE_CHARS):
+        """
+        Args:
+            on_field: Called with (key, value) as each top-level field completes
+            validators: key -> check(value) returning an error message or None
+            required: Keys that must be present once the object closes
+            max_preamble: Characters tolerated before the opening brace
+        """
+        self.on_field = on_field
+        self.validators = validators or {}
+        self.required = tuple(required)
+        self.max_preamble = max_preamble
+        self.fields: Dict[str, Any] = {}
+        self.text = []
+        self.done = False
+        self.first_field_seconds: Optional[float] = None
+        self._start = time.perf_counter()
+        self._preamble = 0
+        self._stack = []
+        self._segment = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str):
+        """Consume the next piece of streamed text; raises StreamAbort on bad output."""
+        self.text.append(chunk)
+        for ch in chunk:
+            if self.done:
+                return  # Trailing fence or chatter after the object
+            if not self._stack:
+                if ch == "{":
+                    self._stack.append("{")
+                    continue
+                self._preamble += 1
+                if self._preamble > self.max_preamble:
+                    self._abort("no JSON object in the first "
+                                f"{self.max_preamble} characters")
+                continue
+
+            if self._in_string:
+                self._segment.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._stack.append(ch)
+            elif ch in _CLOSING:
+                if self._stack[-1] != _CLOSING[ch]:
+                    self._abort(f"mismatched '{ch}'")
+                self._stack.pop()
+                if not self._stack:
+                    self._finish_member()
+                    self.done = True
+                    continue
+            elif ch == "," and len(self._stack) == 1:
+                self._finish_member()
+                continue
+            self._segment.append(ch)
+
+    def _finish_member(self):
+        member = "".join(self._segment).strip()
+        self._segment = []
+        if not member:
+            return
+        try:
+            decoded = json.loads("{" + member + "}")
+        except json.JSONDecodeError as e:
+            self._abort(f"malformed JSON near {member[:60]!r}: {e.msg}")
+        for key, value in decoded.items():
+            check = self.validators.get(key)
+            error = check(value) if check else None
+            if error:
+                self._abort(f"field '{key}': {error}")
+            self.fields[key] = value
+            if self.first_field_seconds is None:
+                self.first_field_seconds = time.perf_counter() - self._start
+            if self.on_field:
+                self.on_field(key, value)
+
+    def _abort(self, reason: str):
+        raise StreamAbort(reason, "".join(self.text))
+
+    def close(self) -> Dict[str, Any]:
+        """Finish the stream; raises StreamAbort if the object is incomplete or misses required keys."""
+        if not self.done:
+            self._abort("stream ended before the JSON object closed")
+        missing = [key for key in self.required if key not in self.fields]
+        if missing:
+            self._abort(f"missing required field(s): {', '.join(missing)}")
+        return self.fields
+
+
+def type_validators(types: Dict[str, type]) -> Dict[str, Callable[[Any], Optional[str]]]:
+    """Validators checking each key's value is an instance of the given type."""
+    def check_for(expected):
+        return lambda value: None if isinstance(value, expected) else f"expected {expected.__name__}, got {type(value).__name__}"
+    return {key: check_for(expected) for key, expected in types.items()}
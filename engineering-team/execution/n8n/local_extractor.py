@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Rule-based requirements extractor used as a fast path before the LLM.
+Recognizes the common intake shape "when <event> in <App>, <do X> in <App>
+and <do Y> in <App>" (plus schedules, webhooks and manual runs) and fills
+the same JSON schema parse_requirements asks the model for. Each extraction
+carries a confidence score; parse_requirements only calls OpenRouter when
+it is below the threshold. No network access, typically well under 1 ms.
+
+Usage:
+    python local_extractor.py extract "When a new email arrives in Gmail, log it to Google Sheets"
+    python local_extractor.py bench                       # bundled corpus + saved .tmp/*/requirements_input.txt
+    python local_extractor.py bench corpus.jsonl notes/*.txt --verbose
+"""
+
+import os
+import re
+import glob
+import json
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.75
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs", "intake_corpus.jsonl")
+
+# (name used as node_type/data source, pattern, credentials needed); more specific names first
+APPS = [
+    ("Gmail", r"g-?mail", True),
+    ("Microsoft Outlook", r"outlook", True),
+    ("Google Sheets", r"google sheets?|spreadsheet|\bsheets?\b", True),
+    ("Google Drive", r"google drive|\bdrive\b", True),
+    ("Google Calendar", r"google calendar|\bcalendar\b", True),
+    ("Google Forms", r"google forms?", True),
+    ("Typeform", r"type ?form", True),
+    ("Slack", r"slack", True),
+    ("Microsoft Teams", r"(?:microsoft|ms) teams", True),
+    ("Discord", r"discord", True),
+    ("Telegram", r"telegram", True),
+    ("WhatsApp", r"whats ?app", True),
+    ("Twilio", r"twilio|\bsms\b|text message", True),
+    ("Notion", r"notion", True),
+    ("Airtable", r"airtable", True),
+    ("HubSpot", r"hub ?spot", True),
+    ("Salesforce", r"salesforce", True),
+    ("Pipedrive", r"pipedrive", True),
+    ("Trello", r"trello", True),
+    ("Asana", r"asana", True),
+    ("Jira", r"jira", True),
+    ("GitHub", r"git ?hub", True),
+    ("Stripe", r"stripe", True),
+    ("Shopify", r"shopify", True),
+    ("Mailchimp", r"mail ?chimp", True),
+    ("Calendly", r"calendly", True),
+    ("Zendesk", r"zendesk", True),
+    ("Postgres", r"postgres(?:ql)?", True),
+    ("MySQL", r"mysql", True),
+    ("OpenAI", r"open ?ai|chat ?gpt|gpt-?\d|\bai\b|\bllm\b", True),
+    ("Webhook", r"webhook|contact form|web ?form|form submission", False),
+    ("HTTP Request", r"\bapi\b|http request|endpoint", False),
+    ("Send Email", r"\be-?mails?\b", True),
+]
+_APP_PATTERNS = [(name, re.compile(pattern, re.IGNORECASE), creds) for name, pattern, creds in APPS]
+_CREDENTIALS = {name: creds for name, _, creds in APPS}
+# A specific provider in the same text replaces the generic email node
+_EMAIL_PROVIDERS = ("Gmail", "Microsoft Outlook")
+
+# Leading verb -> (action kind, node used when the clause names no app)
+VERBS = {
+    "send": ("send", None), "post": ("notify", None), "notify": ("notify", None), "alert": ("notify", None),
+    "page": ("notify", None), "ping": ("notify", None), "message": ("notify", None), "reply": ("send", None), "email": ("send", "Send Email"),
+    "log": ("append", None), "append": ("append", None), "record": ("append", None), "save": ("append", None),
+    "write": ("append", None), "export": ("append", None), "store": ("append", None), "upload": ("append", None),
+    "add": ("create", None), "create": ("create", None), "open": ("create", None), "assign": ("update", None),
+    "update": ("update", None), "move": ("update", None), "mark": ("update", None),
+    "fetch": ("read", None), "pull": ("read", None), "read": ("read", None), "get": ("read", None),
+    "check": ("read", None), "look": ("read", None), "search": ("read", None), "download": ("read", None),
+    "summarize": ("transform", "OpenAI"), "summarise": ("transform", "OpenAI"), "classify": ("transform", "OpenAI"),
+    "extract": ("transform", "Code"), "parse": ("transform", "Code"), "format": ("transform", "Code"),
+    "convert": ("transform", "Code"), "filter": ("transform", "Code"), "remove": ("transform", "Code"),
+    "dedupe": ("transform", "Code"), "merge": ("transform", "Code"), "map": ("transform", "Code"),
+    "calculate": ("transform", "Code"), "tabulate": ("transform", "Code"), "translate": ("transform", "OpenAI"),
+}
+_VERB_ALT = "|".join(sorted(VERBS, key=len, reverse=True))
+# Clause boundaries: sentence ends always, commas/and/then only when an action verb follows
+_CLAUSE_SPLIT = re.compile(rf"[;]\s*|,?\s+(?:and\s+)?then\s+|(?:,\s*|\s+and\s+)(?=(?:also\s+)?(?:{_VERB_ALT})\b)",
+                           re.IGNORECASE)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_TRIGGER_START = re.compile(
+    r"^(?:when(?:ever)?|each time|every time|once|as soon as|on (?:new|each|every)|if a new|after|"
+    r"every|each|daily|hourly|weekly|monthly|nightly|on demand|manually|receive|on receipt of)\b", re.IGNORECASE)
+_SCHEDULE = re.compile(
+    r"\b(?:(?:every|each)\s+(?:(\d+)\s+)?(minute|hour|day|morning|evening|night|week|weekday|month|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday)s?|(daily|hourly|weekly|monthly|nightly))\b",
+    re.IGNORECASE)
+_AT_TIME = re.compile(r"\bat\s+(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)", re.IGNORECASE)
+_MANUAL = re.compile(r"\b(?:on demand|manually|button|by hand)\b", re.IGNORECASE)
+_CONDITIONAL = re.compile(r"\b(?:if|unless|otherwise|else|depending|in case)\b", re.IGNORECASE)
+# Exclusions and negated steps ("don't notify Slack, just email...") read as the opposite action
+_NEGATION = re.compile(r"\b(?:don'?t|do not|doesn'?t|does not|never|not|no longer|instead|rather than|except|"
+                       r"unless|only if|without|skip|exclude|excluding)\b", re.IGNORECASE)
+# Ceiling for parses the rules cannot vouch for, so parse_requirements always sends them to the LLM
+_UNSURE_CAP = 0.5
+_FAILURE = re.compile(r"\b(?:fail(?:s|ed|ure)?|errors?)\b", re.IGNORECASE)
+_NUMBERED_LINE = re.compile(r"^\s*\d+[.)]?\s", re.MULTILINE)
+_SLACK_CHANNEL = re.compile(r"#[\w-]+")
+_INTERVALS = {"minute": "minutes", "hour": "hours", "hourly": "hours", "day": "days", "daily": "days",
+              "morning": "days", "evening": "days", "night": "days", "nightly": "days", "weekday": "days",
+              "week": "weeks", "weekly": "weeks", "month": "months", "monthly": "months"}
+
+
+def find_apps(text):
+    """Apps mentioned in `text`, in order of first mention (generic email dropped when a provider is named)."""
+    found = []
+    for name, pattern, _ in _APP_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            found.append((match.start(), name))
+    names = [name for _, name in sorted(found)]
+    if "Send Email" in names and any(provider in names for provider in _EMAIL_PROVIDERS):
+        names.remove("Send Email")
+    return names
+
+
+def _split_clauses(sentence):
+    clauses = []
+    for part in _CLAUSE_SPLIT.split(sentence):
+        part = re.sub(r"^(?:and|then|also)\s+", "", part.strip(" ,.;"), flags=re.IGNORECASE)
+        if part:
+            clauses.append(part)
+    return clauses
+
+
+def _parse_trigger(clause, provider):
+    """Trigger dict and its confidence contribution (0-0.4) for the opening clause."""
+    schedule = _SCHEDULE.search(clause)
+    if schedule:
+        unit = (schedule.group(2) or schedule.group(3)).lower()
+        configuration = {"interval": _INTERVALS.get(unit, "weeks"), "every": int(schedule.group(1) or 1)}
+        if unit in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"):
+            configuration["weekday"] = unit
+        at = _AT_TIME.search(clause)
+        if at:
+            configuration["at"] = at.group(1).strip()
+        return {"type": "schedule", "description": clause, "configuration": configuration}, 0.4
+    if _MANUAL.search(clause):
+        return {"type": "manual", "description": clause, "configuration": {}}, 0.35
+    apps = [_email_provider(app, provider) for app in find_apps(clause)]
+    if "Webhook" in apps:
+        return {"type": "webhook", "description": clause, "configuration": {}}, 0.35
+    if apps:
+        return {"type": "event", "description": clause, "configuration": {"app": apps[0]}}, 0.4
+    return {"type": "event", "description": clause, "configuration": {}}, 0.1
+
+
+def _email_provider(app, provider):
+    return provider if app == "Send Email" and provider else app
+
+
+def extract_requirements(text, threshold=DEFAULT_THRESHOLD):
+    """
+    Extract structured requirements without calling an LLM.
+
+    Args:
+        text (str): Raw requirements from client
+        threshold (float): Fast-path threshold; negated/excluded steps and
+            actions that fell back to a Code node are scored below it
+
+    Returns:
+        tuple: (requirements dict in the parse_requirements schema, confidence 0-1)
+    """
+    text = text.strip().replace("\u2019", "'")
+    all_apps = find_apps(text)
+    provider = next((app for app in all_apps if app in _EMAIL_PROVIDERS), None)
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+
+    trigger, trigger_score, trigger_clause = None, 0.0, ""
+    error_handling = {"strategy": "stop", "notification_method": "none"}
+    action_clauses = []
+    for index, sentence in enumerate(sentences):
+        if _FAILURE.search(sentence) and index > 0:
+            # "Retry failed steps and email me if it still fails"
+            error_apps = find_apps(sentence)
+            method = "slack" if "Slack" in error_apps else "email" if any(
+                app in error_apps for app in _EMAIL_PROVIDERS + ("Send Email",)) else "none"
+            strategy = "retry" if re.search(r"\bretr(?:y|ies)\b", sentence, re.IGNORECASE) else \
+                "notify" if method != "none" else "stop"
+            error_handling = {"strategy": strategy, "notification_method": method}
+            continue
+        clauses = _split_clauses(sentence)
+        if index == 0 and clauses and _TRIGGER_START.match(sentence):
+            head, _, rest = sentence.partition(",")
+            if rest:
+                trigger_clause, clauses = head.strip(), _split_clauses(rest)
+            else:
+                trigger_clause, clauses = clauses[0], clauses[1:]
+            trigger, trigger_score = _parse_trigger(trigger_clause, provider)
+        action_clauses.extend(clauses)
+
+    actions, transformations, recognized, fallbacks = [], [], 0, 0
+    for clause in action_clauses:
+        verb_match = re.match(rf"(?:\w+\s+)?({_VERB_ALT})\b", clause, re.IGNORECASE)
+        kind, default_node = VERBS[verb_match.group(1).lower()] if verb_match else (None, None)
+        apps = [_email_provider(app, provider) for app in find_apps(clause)]
+        node_type = apps[0] if apps else _email_provider(default_node, provider) if default_node else "Code"
+        if apps or default_node:
+            recognized += 1
+        if not verb_match or not (apps or default_node):
+            fallbacks += 1  # Unknown verb, or unknown app ("create an invoice in QuickBooks") became a Code node
+        if kind == "transform":
+            transformations.append({"description": clause, "input": "", "output": ""})
+        actions.append({"step": len(actions) + 1, "description": clause[0].upper() + clause[1:],
+                        "node_type": node_type})
+
+    data_sources, seen = [], set()
+    if trigger and trigger["configuration"].get("app"):
+        app = trigger["configuration"]["app"]
+        seen.add(app)
+        data_sources.append({"name": app, "purpose": f"Trigger: {trigger['description']}",
+                             "credentials_needed": _CREDENTIALS.get(app, True)})
+    for action in actions:
+        app = action["node_type"]
+        if app not in seen and app != "Code":
+            seen.add(app)
+            data_sources.append({"name": app, "purpose": action["description"],
+                                 "credentials_needed": _CREDENTIALS.get(app, True)})
+
+    missing = []
+    if trigger is None:
+        missing.append("What starts the workflow (event, schedule or webhook)")
+    elif trigger["type"] == "event" and not trigger["configuration"].get("app"):
+        missing.append("Which app or service emits the triggering event")
+    if not actions:
+        missing.append("What the workflow should do")
+    if any(a["node_type"] == "Slack" for a in actions) and not _SLACK_CHANNEL.search(text):
+        missing.append("Slack channel to post to")
+
+    action_apps = [a["node_type"] for a in actions if a["node_type"] != "Code"]
+    target = " + ".join(dict.fromkeys(action_apps)) or "Automation"
+    source = (trigger or {}).get("configuration", {}).get("app") or \
+        {"schedule": "Scheduled", "webhook": "Webhook", "manual": "Manual"}.get((trigger or {}).get("type"), "")
+    requirements = {
+        "workflow_name": f"{source} to {target}" if source else target,
+        "goal": sentences[0] if sentences else "",
+        "triggers": [trigger] if trigger else [],
+        "data_sources": data_sources,
+        "actions": actions,
+        "data_transformations": transformations,
+        "error_handling": error_handling,
+        "success_metrics": "Every triggering item is processed without errors",
+        "missing_info": missing
+    }
+
+    # Score: trigger (0-0.4) + share of recognized actions (0-0.4) + brevity (0-0.2), minus shapes rules miss
+    words = len(text.split())
+    confidence = trigger_score
+    confidence += 0.4 * recognized / len(actions) if actions else 0.0
+    confidence += 0.2 * min(1.0, 60 / words) if words else 0.0
+    if _CONDITIONAL.search(" ".join(action_clauses)):
+        confidence -= 0.3  # Branching logic needs the model
+    if len(_NUMBERED_LINE.findall(text)) >= 4:
+        confidence -= 0.3  # Long step-by-step process documents
+    confidence -= 0.1 * len(missing)
+    # Apps named outside the error-handling sentence that no trigger or action picked up
+    # (e.g. a comma-less "when ... form add it to sheets" swallowing an action into the trigger)
+    used = {source["name"] for source in data_sources} | {"Code"}
+    if (trigger or {}).get("type") == "webhook":
+        used.add("Webhook")
+    dropped = {_email_provider(app, provider) for app in find_apps(" ".join([trigger_clause] + action_clauses))} - used
+    if fallbacks or dropped or _NEGATION.search(text):
+        # Wrong rather than incomplete: keep it off the fast path whatever the other signals say
+        confidence = min(confidence, _UNSURE_CAP, threshold - 0.05)
+    confidence = round(max(0.0, min(1.0, confidence)), 2)
+
+    logger.debug(f"Local extraction confidence {confidence} (threshold {threshold})")
+    return requirements, confidence
+
+
+def questions_for_missing(missing):
+    """Clarifying questions built from missing_info without an LLM call (same shape as the LLM's)."""
+    return {
+        "blocking_questions": [
+            {"question": f"{item}?", "reason": "Needed to configure the workflow", "suggested_default": ""}
+            for item in missing
+        ],
+        "optional_questions": []
+    }
+
+
+def load_corpus(paths):
+    """
+    Read requirement texts from JSONL files ({"id", "text", optional
+    "expect_fast_path"}), text files or directories (searched for
+    */requirements_input.txt saved by the pipeline).
+
+    Returns:
+        list: (doc_id, text, path of a saved requirements.json or None,
+        expected fast-path decision or None)
+    """
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            for saved in sorted(glob.glob(os.path.join(path, "*", "requirements_input.txt"))):
+                project = os.path.dirname(saved)
+                with open(saved, 'r', encoding='utf-8') as f:
+                    reference = os.path.join(project, "requirements.json")
+                    documents.append((os.path.basename(project), f.read(),
+                                      reference if os.path.exists(reference) else None, None))
+        elif path.endswith(".jsonl"):
+            with open(path, 'r', encoding='utf-8') as f:
+                for number, line in enumerate(f, 1):
+                    if line.strip():
+                        record = json.loads(line)
+                        documents.append((record.get("id", f"line_{number}"), record["text"], None,
+                                          record.get("expect_fast_path")))
+        elif os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                documents.append((os.path.splitext(os.path.basename(path))[0], f.read(), None, None))
+    return documents
+
+
+def _agreement(requirements, reference):
+    """Trigger type match and app-set Jaccard against an LLM-produced requirements.json."""
+    with open(reference, 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    apps = {s["name"].lower() for s in requirements.get("data_sources", [])}
+    expected_apps = {str(s.get("name", "")).lower() for s in expected.get("data_sources", [])}
+    union = apps | expected_apps
+    local_trigger = (requirements.get("triggers") or [{}])[0].get("type")
+    expected_trigger = (expected.get("triggers") or [{}])[0].get("type")
+    return local_trigger == expected_trigger, (len(apps & expected_apps) / len(union)) if union else 1.0
+
+
+def benchmark(paths, threshold=DEFAULT_THRESHOLD, repeat=50, verbose=False):
+    """
+    Time the extractor over a corpus and report how much of it would skip the LLM.
+
+    Returns:
+        dict: Latency (mean/p95/max ms), fast-path share, documents routed
+        against their "expect_fast_path" label and, where saved LLM outputs
+        exist, agreement with them
+    """
+    documents = load_corpus(paths)
+    if not documents:
+        raise ValueError(f"No requirement texts found in {paths}")
+
+    latencies, rows, trigger_matches, jaccards, misrouted = [], [], [], [], []
+    labelled = 0
+    for doc_id, text, reference, expected in documents:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            requirements, confidence = extract_requirements(text, threshold)
+        latencies.append((time.perf_counter() - start) / repeat)
+        row = {"id": doc_id, "confidence": confidence, "fast_path": confidence >= threshold,
+               "trigger": (requirements["triggers"] or [{}])[0].get("type"),
+               "apps": [s["name"] for s in requirements["data_sources"]]}
+        if reference:
+            row["trigger_match"], row["app_jaccard"] = _agreement(requirements, reference)
+            trigger_matches.append(row["trigger_match"])
+            jaccards.append(row["app_jaccard"])
+        if expected is not None:
+            labelled += 1
+            if row["fast_path"] != expected:
+                misrouted.append(doc_id)
+        rows.append(row)
+
+    latencies.sort()
+    fast = sum(1 for row in rows if row["fast_path"])
+    report = {
+        "documents": len(rows),
+        "threshold": threshold,
+        "fast_path": fast,
+        "fast_path_share": round(fast / len(rows), 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3)
+    }
+    if labelled:
+        report["labelled"] = labelled
+        report["misrouted"] = misrouted
+    if jaccards:
+        report["compared_with_llm"] = len(jaccards)
+        report["trigger_agreement"] = round(sum(trigger_matches) / len(trigger_matches), 3)
+        report["mean_app_jaccard"] = round(sum(jaccards) / len(jaccards), 3)
+    if verbose:
+        report["rows"] = rows
+    return report
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local (no-LLM) requirements extractor')
+    sub = parser.add_subparsers(dest='command', required=True)
+    extract = sub.add_parser('extract', help='Extract one requirements text or file')
+    extract.add_argument('requirements', help='Requirements text or file path')
+    bench = sub.add_parser('bench', help='Benchmark against a corpus')
+    bench.add_argument('paths', nargs='*', help='JSONL/text files or project dirs (default: bundled corpus + .tmp)')
+    bench.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    bench.add_argument('--repeat', type=int, default=50, help='Runs per document for timing')
+    bench.add_argument('--verbose', action='store_true', help='Include per-document rows')
+    args = parser.parse_args()
+
+    if args.command == 'extract':
+        text = args.requirements
+        if os.path.isfile(text):
+            with open(text, 'r', encoding='utf-8') as f:
+                text = f.read()
+        requirements, confidence = extract_requirements(text)
+        print(json.dumps({"confidence": confidence, "requirements": requirements}, indent=2))
+    else:
+        paths = args.paths or [DEFAULT_CORPUS, ".tmp"]
+        print(json.dumps(benchmark(paths, args.threshold, args.repeat, args.verbose), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Model routing for OpenRouter calls.
+Every task type (extraction, questions, optimization) has an ordered
+fallback chain of models. Each call's latency and outcome are recorded in a
+small SQLite file under .tmp/cache/, and the chain is re-ordered per task:
+healthy models without enough recent samples are tried first in chain order
+(a short warm-up so every model gets measured), then healthy models fastest
+first by rolling median latency, and models that recently failed or keep
+failing go last. A timeout, 429/5xx or unusable response fails over to the
+next model; auth errors do not.
+
+Chains come from OPENROUTER_MODELS_<TASK> or OPENROUTER_MODELS (comma
+separated); OPENROUTER_MODEL, if set, is tried first.
+
+Usage:
+    python model_router.py stats
+    python model_router.py stats --task extraction
+    python model_router.py clear
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+import requests
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(".tmp", "cache", "model_stats.sqlite")
+TASKS = ("extraction", "questions", "optimization")
+DEFAULT_CHAIN = [
+    "google/gemini-2.0-flash-exp:free",
+    "meta-llama/llama-3.3-70b-instruct:free",
+    "mistralai/mistral-small-3.1-24b-instruct:free",
+]
+# Per-attempt timeouts (seconds); a slow model fails over instead of stalling the run
+DEFAULT_TIMEOUTS = {"extraction": 45, "questions": 30, "optimization": 60}
+WINDOW = 20  # Samples per (task, model) used for the rolling stats
+MIN_SAMPLES = 3  # Below this the latency is not trusted for ranking
+STATS_TTL = 24 * 3600  # Older samples are ignored, so rankings get re-checked daily
+MAX_ERROR_RATE = 0.5
+COOLDOWN_SECONDS = 60.0
+# HTTP statuses that are specific to the model/provider, so another model may succeed
+FAILOVER_STATUSES = frozenset({400, 404, 408, 409, 429, 500, 502, 503, 504})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    model TEXT NOT NULL,
+    ts REAL NOT NULL,
+    latency REAL NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_lookup ON samples (task, model, id);
+"""
+
+
+class AllModelsFailed(Exception):
+    """Every model in the chain failed; `errors` maps model -> exception."""
+
+    def __init__(self, task: str, errors: Dict[str, Exception]):
+        summary = "; ".join(f"{model}: {type(e).__name__}: {e}" for model, e in errors.items())
+        super().__init__(f"All models failed for {task}: {summary}")
+        self.task = task
+        self.errors = errors
+
+
+def is_failover_error(error: Exception) -> bool:
+    """True if another model might succeed where this one failed."""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status in FAILOVER_STATUSES
+    # 200 responses without choices (provider errors) or empty content
+    return isinstance(error, (KeyError, IndexError, TypeError, ValueError))
+
+
+def chain_for(task: str) -> List[str]:
+    """Ordered fallback chain for a task, from the environment or DEFAULT_CHAIN."""
+    configured = os.getenv(f"OPENROUTER_MODELS_{task.upper()}") or os.getenv("OPENROUTER_MODELS")
+    chain = [m.strip() for m in configured.split(",") if m.strip()] if configured else list(DEFAULT_CHAIN)
+    preferred = os.getenv("OPENROUTER_MODEL")
+    if preferred:
+        chain = [preferred] + [m for m in chain if m != preferred]
+    return chain
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+class ModelRouter:
+    """Chooses and fails over between models per task using rolling latency/error stats."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, task: str, model: str, latency: float, ok: bool):
+        """Store one call outcome, keeping only a few windows of history per (task, model)."""
+        with self._connect() as conn:
+            conn.execute("INSERT INTO samples (task, model, ts, latency, ok) VALUES (?, ?, ?, ?, ?)",
+                         (task, model, time.time(), latency, int(ok)))
+            conn.execute("DELETE FROM samples WHERE task = ? AND model = ? AND id NOT IN "
+                         "(SELECT id FROM samples WHERE task = ? AND model = ? ORDER BY id DESC LIMIT ?)",
+                         (task, model, task, model, WINDOW * 5))
+
+    def stats(self, task: str, models: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Rolling per-model stats for a task: samples, error rate, p50/p95 latency, health."""
+        now = time.time()
+        models = models or chain_for(task)
+        result = {}
+        with self._connect() as conn:
+            for model in models:
+                rows = conn.execute("SELECT latency, ok, ts FROM samples WHERE task = ? AND model = ? AND ts >= ? "
+                                    "ORDER BY id DESC LIMIT ?", (task, model, now - STATS_TTL, WINDOW)).fetchall()
+                latencies = sorted(latency for latency, ok, _ in rows if ok)
+                errors = sum(1 for _, ok, _ in rows if not ok)
+                last_failure = max((ts for _, ok, ts in rows if not ok), default=0.0)
+                error_rate = errors / len(rows) if rows else 0.0
+                cooling = now - last_failure < COOLDOWN_SECONDS
+                result[model] = {
+                    "samples": len(rows),
+                    "successes": len(latencies),
+                    "error_rate": round(error_rate, 3),
+                    "p50_s": round(_median(latencies), 3) if latencies else None,
+                    "p95_s": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+                    if latencies else None,
+                    "healthy": not cooling and not (len(rows) >= MIN_SAMPLES and error_rate >= MAX_ERROR_RATE),
+                    "cooling_down": cooling
+                }
+        return result
+
+    def route(self, task: str) -> List[str]:
+        """
+        Models to try for a task, best first.
+
+        Returns:
+            list: Healthy models still warming up (fewer than MIN_SAMPLES successes)
+            in chain order, then healthy measured ones by rolling median latency,
+            then unhealthy ones in chain order
+        """
+        chain = chain_for(task)
+        stats = self.stats(task, chain)
+        warming = [m for m in chain if stats[m]["healthy"] and stats[m]["successes"] < MIN_SAMPLES]
+        measured = sorted((m for m in chain if stats[m]["healthy"] and m not in warming),
+                          key=lambda m: stats[m]["p50_s"])
+        unhealthy = [m for m in chain if not stats[m]["healthy"]]
+        return warming + measured + unhealthy
+
+    def run(self, task: str, attempt: Callable[[str, float, bool], Any]) -> Any:
+        """
+        Call attempt(model, timeout, is_last) for each routed model until one succeeds.
+
+        Args:
+            task (str): Task type (extraction, questions, optimization)
+            attempt (callable): Performs the request; raises on failure. is_last
+                tells it whether to use its own retries (no fallback remains).
+
+        Returns:
+            The first successful attempt's return value
+        """
+        models = self.route(task)
+        timeout = DEFAULT_TIMEOUTS.get(task, 60)
+        errors = {}
+        for index, model in enumerate(models):
+            is_last = index == len(models) - 1
+            start = time.perf_counter()
+            try:
+                result = attempt(model, timeout, is_last)
+            except Exception as e:
+                self.record(task, model, time.perf_counter() - start, False)
+                errors[model] = e
+                if not is_failover_error(e):
+                    raise
+                if not is_last:
+                    logger.warning(f"{task}: {model} failed ({type(e).__name__}), failing over to {models[index + 1]}")
+                continue
+            self.record(task, model, time.perf_counter() - start, True)
+            if index:
+                logger.info(f"{task}: served by fallback model {model}")
+            return result
+        raise AllModelsFailed(task, errors)
+
+    def clear(self):
+        """Forget all recorded samples."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM samples")
+
+
+_default_router = None
+
+
+def get_router() -> ModelRouter:
+    """Process-wide router (stats file from MODEL_STATS_PATH or .tmp/cache/model_stats.sqlite)."""
+    global _default_router
+    if _default_router is None:
+        _default_router = ModelRouter(os.getenv("MODEL_STATS_PATH", DEFAULT_DB_PATH))
+    return _default_router
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Inspect OpenRouter model routing stats')
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--task', choices=TASKS, help='Only this task type')
+    args = parser.parse_args()
+
+    router = get_router()
+    if args.command == 'clear':
+        router.clear()
+        print(f"Cleared {router.db_path}")
+        return
+    report = {}
+    for task in ([args.task] if args.task else TASKS):
+        report[task] = {"route": router.route(task), "models": router.stats(task)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,16 +11,66 @@ Enforces best practices:
 
 import json
 import uuid
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional, Union
+from collections import deque
+from typing import List, Dict, Any, Optional, Union, Iterator, TextIO
+
+try:
+    import orjson  # Optional fast encoder
+except ImportError:
+    orjson = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Flush streamed JSON to the target file/socket in chunks of roughly this many chars
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Auto-layout grid (matches the 220px step create_node has always used)
+LAYOUT_X_SPACING = 220
+LAYOUT_Y_SPACING = 200
+LAYOUT_SUBNODE_X_SPACING = 140
+
+# Namespace for deterministic (UUIDv5) node ids and versionIds
+ID_NAMESPACE = uuid.UUID("f648face-f778-40b5-89a9-d9c52a7f5e09")
+
+# Shared stdlib encoders (json.dumps would build a new encoder per call)
+_INDENT_ENCODER = json.JSONEncoder(indent=2)
+_COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+def _encode(value: Any, depth: int = 0, compact: bool = False, backend: str = "json") -> str:
+    """
+    Encode one JSON value as it would appear nested `depth` levels deep.
+
+    Indented output matches json.dumps(..., indent=2) of the enclosing
+    document byte for byte: encoded strings never contain raw newlines, so
+    re-indenting a fragment is a plain newline substitution.
+    """
+    if backend == "orjson" and orjson is not None:
+        option = 0 if compact else orjson.OPT_INDENT_2
+        text = orjson.dumps(value, option=option).decode("utf-8")
+    elif compact:
+        text = _COMPACT_ENCODER.encode(value)
+    else:
+        text = _INDENT_ENCODER.encode(value)
+    if depth and not compact:
+        text = text.replace("\n", "\n" + "  " * depth)
+    return text
+
 class N8NNode:
     """Represents a single n8n node with strict schema adherence."""
+
+    # Slots keep per-node memory flat for workflows with thousands of nodes
+    __slots__ = (
+        "id", "name", "type", "type_version", "_position", "_parameters",
+        "webhook_path", "retry_on_fail", "notes",
+        "_fragment", "_fragment_key", "_workflow",
+    )
     
     def __init__(self, name: str, node_type: str, position: List[int], parameters: Dict[str, Any] = None, webhook_path: str = None):
+        # Workflow the node was added to (set by add_node), told about renames
+        self._workflow = None
         self.id = str(uuid.uuid4())
         self.name = name
         self.type = node_type
@@ -40,20 +90,72 @@ class N8NNode:
             self.type_version = 4.0
         elif "@n8n/n8n-nodes-langchain.agent" in node_type:
             self.type_version = 1.6 # Modern Agent
+
+        # Serialized fragment cache (see _encoded); None means dirty
+        self._fragment_key = None
+
+    def __setattr__(self, key: str, value: Any):
+        previous = getattr(self, "name", None) if key == "name" else None
+        # Any attribute change invalidates the cached JSON fragment
+        object.__setattr__(self, key, value)
+        if key not in ("_fragment", "_fragment_key", "_workflow"):
+            object.__setattr__(self, "_fragment", None)
+        # The workflow indexes nodes by name, and its encoded connections spell names out
+        if key == "name" and self._workflow is not None and previous != value:
+            self._workflow._renamed(self, previous)
+
+    # Reading parameters/position hands out the mutable object, which the caller may edit
+    # in place (node.parameters["x"] = ...), so it also invalidates the cached fragment.
+    # Serialization and layout use the underscored slots to keep the cache.
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        self._fragment = None
+        return self._parameters
+
+    @parameters.setter
+    def parameters(self, value: Dict[str, Any]):
+        self._parameters = value
+
+    @property
+    def position(self) -> List[int]:
+        self._fragment = None
+        return self._position
+
+    @position.setter
+    def position(self, value: List[int]):
+        self._position = value
+
+    @property
+    def dirty(self) -> bool:
+        """True if the node changed since it was last serialized."""
+        return self._fragment is None
+
+    def mark_dirty(self):
+        """Force re-serialization (e.g. after editing a dict kept from before the last serialization)."""
+        self._fragment = None
             
     def set_option(self, key: str, value: Any):
         """Set a parameter value."""
         self.parameters[key] = value
+        self._fragment = None
+
+    def _encoded(self, compact: bool = False, backend: str = "json") -> str:
+        """This node's JSON as nested in the workflow `nodes` list, cached until dirty."""
+        key = (compact, backend)
+        if self._fragment is None or self._fragment_key != key:
+            self._fragment = _encode(self.to_dict(), 2, compact, backend)
+            self._fragment_key = key
+        return self._fragment
         
     def to_dict(self) -> Dict[str, Any]:
         """Convert to n8n JSON node format."""
         node_json = {
-            "parameters": self.parameters,
+            "parameters": self._parameters,
             "id": self.id,
             "name": self.name,
             "type": self.type,
             "typeVersion": self.type_version,
-            "position": self.position
+            "position": self._position
         }
         
         if self.webhook_path:
@@ -62,13 +164,47 @@ class N8NNode:
         return node_json
 
 class N8NWorkflow:
-    """Manages the graph of nodes and connections."""
+    """
+    Manages the graph of nodes and connections.
+
+    Nodes live in an insertion-ordered list and are addressed internally by
+    their index in that list. Name and id lookups go through hash indexes, and
+    edges are kept as adjacency arrays per connection type:
+
+        _adjacency[type][source_index][output_index] -> [target_index, ...]
+
+    The n8n-style nested ``connections`` dict is rebuilt from these arrays on
+    demand, in the same key order the old dict-based builder produced.
+    """
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, auto_layout: bool = False, deterministic_ids: bool = False, id_seed: str = ""):
         self.name = name
+        # When set, positions are recomputed by layout() at serialization time
+        self.auto_layout = auto_layout
+        # When set, node ids are UUIDv5(workflow name, node name, seed) and the
+        # versionId is a UUIDv5 of the serialized content, so identical builds
+        # produce identical bytes
+        self.deterministic_ids = deterministic_ids
+        self.id_seed = id_seed
+        # Pinned versionId (e.g. from a loaded workflow); None derives one
+        self.version_id: Optional[str] = None
+        self._name_counts: Dict[str, int] = {}
         self.nodes: List[N8NNode] = []
-        self.connections: Dict[str, Any] = {}
         self.global_tags: List[str] = ["Generated-by-Antigravity"]
+
+        # Graph indexes
+        self._name_index: Dict[str, int] = {}
+        self._id_index: Dict[str, int] = {}
+        self._adjacency: Dict[str, List[Optional[List[List[int]]]]] = {}
+        # Connection key order, as first seen by connect()
+        self._source_order: List[int] = []
+        self._source_types: Dict[int, List[str]] = {}
+        # Encoded connection entries per (compact, backend) and source index;
+        # connect() only drops the entry of the source it touched
+        self._connections_cache: Dict[tuple, Dict[int, str]] = {}
+        # Set when nodes or edges are added, cleared after a full serialization
+        self._dirty = True
+        self._layout_dirty = True
         
         # Layout helper
         self.current_x = 0
@@ -76,9 +212,33 @@ class N8NWorkflow:
         
     def add_node(self, node: N8NNode) -> N8NNode:
         """Add a node to the workflow."""
+        index = len(self.nodes)
+        if self.deterministic_ids:
+            node.id = self._node_uuid(node.name)
         self.nodes.append(node)
+        object.__setattr__(node, "_workflow", self)  # Not a content change: keep the cached fragment
+        # First node wins on name collisions, matching how n8n resolves names
+        self._name_index.setdefault(node.name, index)
+        self._id_index.setdefault(node.id, index)
+        self._dirty = self._layout_dirty = True
         return node
 
+    def _renamed(self, node: N8NNode, old_name: str):
+        """Re-key the name index after `node.name` changed; drops every cached connection entry."""
+        index = next(i for i, n in enumerate(self.nodes) if n is node)
+        if self._name_index.get(old_name) == index:
+            del self._name_index[old_name]
+            # The next node with the old name (if any) now comes first
+            for i in range(index + 1, len(self.nodes)):
+                if self.nodes[i].name == old_name:
+                    self._name_index[old_name] = i
+                    break
+        if self._name_index.get(node.name, len(self.nodes)) > index:
+            self._name_index[node.name] = index
+        # Sources and targets are both encoded by name
+        self._connections_cache.clear()
+        self._dirty = True
+
     def create_node(self, name: str, node_type: str, parameters: Dict[str, Any] = None) -> N8NNode:
         """Factory: Create and add a node automatically updating position."""
         node = N8NNode(name, node_type, [self.current_x, self.current_y], parameters)
@@ -87,49 +247,686 @@ class N8NWorkflow:
         self.current_x += 220 
         return node
 
+    @classmethod
+    def from_dict(cls, workflow_data: Dict[str, Any], auto_layout: bool = False, deterministic_ids: bool = False,
+                  id_seed: str = "") -> "N8NWorkflow":
+        """
+        Rebuild a workflow from n8n JSON (e.g. a cached workflow.json).
+
+        Pass the flags the workflow was built with so later edits behave as
+        on a fresh build: with deterministic_ids, node ids are re-derived
+        and the versionId follows the content instead of staying pinned.
+        """
+        wf = cls(workflow_data.get("name", ""), auto_layout=auto_layout, deterministic_ids=deterministic_ids,
+                 id_seed=id_seed)
+        for nd in workflow_data.get("nodes", []):
+            webhook_path = None
+            if "webhookId" in nd:
+                webhook_path = nd.get("parameters", {}).get("path") or nd["webhookId"]
+            node = N8NNode(nd["name"], nd["type"], nd.get("position", [0, 0]),
+                           nd.get("parameters"), webhook_path)
+            node.id = nd.get("id", node.id)
+            node.type_version = nd.get("typeVersion", node.type_version)
+            wf.add_node(node)
+        if not deterministic_ids:
+            wf.version_id = workflow_data.get("versionId")
+
+        by_name = {n.name: n for n in reversed(wf.nodes)}  # First node wins on collisions
+        for src_name, by_type in workflow_data.get("connections", {}).items():
+            for conn_type, outputs in by_type.items():
+                for output_index, output in enumerate(outputs):
+                    for item in output:
+                        wf.connect(by_name[src_name], by_name[item["node"]], conn_type, output_index)
+                    # Keep empty outputs (e.g. unused Switch branches) in place
+                    if not output:
+                        wf._ensure_output(by_name[src_name], conn_type, output_index)
+        return wf
+
+    def _node_uuid(self, node_name: str) -> str:
+        """Deterministic node id; repeated names get an occurrence suffix so ids stay unique."""
+        occurrence = self._name_counts.get(node_name, 0)
+        self._name_counts[node_name] = occurrence + 1
+        key = f"{self.name}\x1f{node_name}\x1f{self.id_seed}"
+        if occurrence:
+            key += f"\x1f{occurrence}"
+        return str(uuid.uuid5(ID_NAMESPACE, key))
+
+    def _version_id(self, digest=None) -> str:
+        """Pinned versionId, a UUIDv5 of the content digest, or a random UUID."""
+        if self.version_id is not None:
+            return self.version_id
+        if digest is not None:
+            return str(uuid.uuid5(ID_NAMESPACE, digest.hexdigest()))
+        return str(uuid.uuid4())
+
+    def _body_digest(self):
+        """sha256 object over the indented stdlib JSON up to (not including) versionId."""
+        digest = hashlib.sha256()
+        self._ensure_layout()
+        for fragment in self._iter_body(False, "json"):
+            digest.update(fragment.encode("utf-8"))
+        return digest
+
+    def fingerprint(self) -> str:
+        """Content hash of the workflow, independent of versionId and output mode."""
+        return self._body_digest().hexdigest()
+
+    def get_node(self, name: str) -> Optional[N8NNode]:
+        """Return the node with the given name, or None."""
+        index = self._name_index.get(name)
+        return None if index is None else self.nodes[index]
+
+    def get_node_by_id(self, node_id: str) -> Optional[N8NNode]:
+        """Return the node with the given id, or None."""
+        index = self._id_index.get(node_id)
+        return None if index is None else self.nodes[index]
+
+    def _index_of(self, node: N8NNode) -> int:
+        """Resolve a node to its index, rejecting nodes not added to this workflow."""
+        index = self._name_index.get(node.name)
+        if index is None:
+            raise ValueError(f"Node '{node.name}' is not part of workflow '{self.name}'")
+        return index
+
     def connect(self, source: N8NNode, target: N8NNode, type: str = "main", index: int = 0):
         """
         Connect two nodes.
         Types: 'main' (standard flow), 'ai_languageModel', 'ai_memory', 'ai_tool', 'ai_guardrails'
         """
-        if source.name not in self.connections:
-            self.connections[source.name] = {}
-            
-        if type not in self.connections[source.name]:
-            self.connections[source.name][type] = []
-            
-        # Ensure list structure for index
-        while len(self.connections[source.name][type]) <= index:
-             self.connections[source.name][type].append([])
-             
-        connection_item = {
-            "node": target.name,
-            "type": "main", # The standard connection interface is usually 'main' on the TARGET side
-            "index": 0
-        }
-        
         # Special handling for AI inputs (Target is the Agent, Source is the Component)
         # BUT n8n JSON defines connections OUTBOUND from the Source.
         # Example: ChatModel -> AI Agent. 
         # Source: ChatModel. Connection Type: 'ai_languageModel'. Target: Agent.
-        
-        self.connections[source.name][type][index].append(connection_item)
+        dst = self._index_of(target)
+        src, outputs = self._ensure_output(source, type, index)
+        outputs[index].append(dst)
 
-    def to_json(self) -> str:
-        """Generate the full n8n workflow JSON."""
-        workflow_data = {
-            "name": self.name,
-            "nodes": [n.to_dict() for n in self.nodes],
-            "connections": self.connections,
+    def _ensure_output(self, source: N8NNode, type: str, index: int) -> tuple:
+        """Create the adjacency slots for source/type/output index; returns (src, outputs)."""
+        src = self._index_of(source)
+        adjacency = self._adjacency.setdefault(type, [])
+        if len(adjacency) <= src:
+            adjacency.extend([None] * (src + 1 - len(adjacency)))
+
+        outputs = adjacency[src]
+        if outputs is None:
+            outputs = adjacency[src] = []
+            if src not in self._source_types:
+                self._source_types[src] = []
+                self._source_order.append(src)
+            self._source_types[src].append(type)
+
+        # Ensure list structure for index
+        while len(outputs) <= index:
+            outputs.append([])
+
+        for entries in self._connections_cache.values():
+            entries.pop(src, None)
+        self._dirty = self._layout_dirty = True
+        return src, outputs
+
+    def outgoing(self, node: N8NNode, type: str = "main") -> List[N8NNode]:
+        """Return every node the given node feeds over a connection type."""
+        adjacency = self._adjacency.get(type, [])
+        src = self._index_of(node)
+        if src >= len(adjacency) or adjacency[src] is None:
+            return []
+        return [self.nodes[dst] for output in adjacency[src] for dst in output]
+
+    def _source_connections(self, src: int) -> Dict[str, Any]:
+        """Outbound connections of one source node, keyed by connection type."""
+        nodes = self.nodes
+        by_type = {}
+        for conn_type in self._source_types[src]:
+            by_type[conn_type] = [
+                # The standard connection interface is usually 'main' on the TARGET side
+                [{"node": nodes[dst].name, "type": "main", "index": 0} for dst in output]
+                for output in self._adjacency[conn_type][src]
+            ]
+        return by_type
+
+    @property
+    def connections(self) -> Dict[str, Any]:
+        """n8n connection map, keyed by source node name."""
+        return {self.nodes[src].name: self._source_connections(src) for src in self._source_order}
+
+    @property
+    def dirty(self) -> bool:
+        """True if any node or edge changed since the last full serialization."""
+        return self._dirty or any(n.dirty for n in self.nodes)
+
+    def layout(self):
+        """
+        Assign node positions with a layered pass over the connection graph.
+
+        Main-flow nodes are placed in columns by topological rank and in rows
+        by branch (output) index; AI sub-nodes sit in a row under their agent.
+        Only nodes whose position actually changes are marked dirty.
+        """
+        for node, position in zip(self.nodes, compute_layout(self)):
+            if node._position != position:
+                node.position = position
+        self._layout_dirty = False
+
+    def _ensure_layout(self):
+        """Run the auto-layout once per graph change, right before serializing."""
+        if self.auto_layout and self._layout_dirty:
+            self.layout()
+
+    def _edges(self) -> Iterator[tuple]:
+        """Yield (source, type, output_index, target) name tuples for every edge."""
+        names = [n.name for n in self.nodes]
+        for src in self._source_order:
+            for conn_type in self._source_types[src]:
+                for output_index, output in enumerate(self._adjacency[conn_type][src]):
+                    for dst in output:
+                        yield names[src], conn_type, output_index, names[dst]
+
+    def validate(self, strict: bool = False) -> List["ValidationIssue"]:
+        """
+        Check the graph structure (see validate_graph).
+
+        Args:
+            strict (bool): Raise WorkflowValidationError if any error is found
+
+        Returns:
+            list: ValidationIssue objects, errors first
+        """
+        issues = validate_graph([n.name for n in self.nodes], [n.type for n in self.nodes], self._edges())
+        if strict and any(i.severity == "error" for i in issues):
+            raise WorkflowValidationError(self.name, issues)
+        return issues
+
+    def _settings_fields(self, version_id: str) -> Dict[str, Any]:
+        """Top-level fields that follow `connections` in the workflow JSON."""
+        return {
             "active": False,
             "settings": {},
-            "versionId": str(uuid.uuid4()),
+            "versionId": version_id,
             "meta": {
                 "templateId": "generated_standard"
             },
             "tags": []
         }
-        return json.dumps(workflow_data, indent=2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Generate the full n8n workflow as a dict."""
+        self._ensure_layout()
+        workflow_data = {
+            "name": self.name,
+            "nodes": [n.to_dict() for n in self.nodes],
+            "connections": self.connections,
+        }
+        # Same versionId to_json() would emit for this content
+        digest = self._body_digest() if self.deterministic_ids and self.version_id is None else None
+        workflow_data.update(self._settings_fields(self._version_id(digest)))
+        return workflow_data
+
+    def _connection_entries(self, compact: bool, backend: str) -> Iterator[str]:
+        """Encoded `"source": {...}` entries; only sources touched since last time are re-encoded."""
+        cache = self._connections_cache.setdefault((compact, backend), {})
+        sep = ":" if compact else ": "
+        for src in self._source_order:
+            entry = cache.get(src)
+            if entry is None:
+                entry = (_encode(self.nodes[src].name, 0, compact, backend) + sep
+                         + _encode(self._source_connections(src), 2, compact, backend))
+                cache[src] = entry
+            yield entry
+
+    @staticmethod
+    def _punctuation(compact: bool) -> tuple:
+        """(open, item separator, close, field prefix fn) for the top-level object."""
+        if compact:
+            return "{", ",", "}", lambda key: _encode(key, compact=True) + ":"
+        return "{\n", ",\n", "\n}", lambda key: "  " + _encode(key) + ": "
+
+    def _iter_body(self, compact: bool, backend: str) -> Iterator[str]:
+        """Fragments from the opening brace through `connections`."""
+        open_obj, item_sep, _, field = self._punctuation(compact)
+
+        yield open_obj + field("name") + _encode(self.name, 0, compact, backend)
+
+        # Nodes: encode each node on its own instead of the whole list at once
+        yield item_sep + field("nodes")
+        if not self.nodes:
+            yield "[]"
+        else:
+            node_indent = "" if compact else "\n    "
+            yield "[" + node_indent
+            for i, node in enumerate(self.nodes):
+                if i:
+                    yield item_sep + ("" if compact else "    ")
+                yield node._encoded(compact, backend)
+            yield ("" if compact else "\n  ") + "]"
+
+        yield item_sep + field("connections")
+        if not self._source_order:
+            yield "{}"
+        else:
+            entry_indent = "" if compact else "    "
+            yield "{" + ("" if compact else "\n")
+            for i, entry in enumerate(self._connection_entries(compact, backend)):
+                if i:
+                    yield item_sep
+                yield entry_indent + entry
+            yield ("" if compact else "\n  ") + "}"
+
+    def iter_json(self, compact: bool = False, backend: str = "json") -> Iterator[str]:
+        """
+        Yield the workflow JSON in fragments, one node or connection entry at a time.
+
+        Node and connection fragments are cached between calls, so after a
+        small edit (set_option, connect) only the touched parts are re-encoded.
+        With deterministic_ids, versionId is a UUIDv5 of fingerprint(), which
+        is hashed on the fly in the default mode (other modes need one extra
+        indented pass, since the versionId must not depend on the mode).
+
+        Args:
+            compact (bool): Drop indentation and whitespace
+            backend (str): 'json' (stdlib, byte-identical to to_dict + json.dumps)
+                or 'orjson' (faster, writes non-ASCII as raw UTF-8; used only
+                if the package is installed)
+        """
+        if backend == "orjson" and orjson is None:
+            logger.debug("orjson not installed, falling back to json")
+            backend = "json"
+        self._ensure_layout()
+
+        digest = streaming_digest = None
+        if self.deterministic_ids and self.version_id is None:
+            if compact or backend != "json":
+                digest = self._body_digest()
+            else:
+                digest = streaming_digest = hashlib.sha256()
+        for fragment in self._iter_body(compact, backend):
+            if streaming_digest is not None:
+                streaming_digest.update(fragment.encode("utf-8"))
+            yield fragment
+
+        _, item_sep, close_obj, field = self._punctuation(compact)
+        for key, value in self._settings_fields(self._version_id(digest)).items():
+            yield item_sep + field(key) + _encode(value, 1, compact, backend)
+        yield close_obj
+        self._dirty = False
+
+    def write_json(self, fp: TextIO, compact: bool = False, backend: str = "json",
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Stream the workflow JSON to a text file object in chunks.
+
+        For sockets, pass `sock.makefile("w", encoding="utf-8")`.
+
+        Returns:
+            int: Number of characters written
+        """
+        written = 0
+        buffer: List[str] = []
+        buffered = 0
+        for fragment in self.iter_json(compact, backend):
+            buffer.append(fragment)
+            buffered += len(fragment)
+            if buffered >= chunk_size:
+                fp.write("".join(buffer))
+                written += buffered
+                buffer, buffered = [], 0
+        if buffer:
+            fp.write("".join(buffer))
+            written += buffered
+        return written
+
+    def save(self, path: str, compact: bool = False, backend: str = "json") -> int:
+        """Stream the workflow JSON straight to `path`."""
+        with open(path, 'w', encoding='utf-8') as f:
+            return self.write_json(f, compact, backend)
+
+    def to_json(self, compact: bool = False, backend: str = "json") -> str:
+        """Generate the full n8n workflow JSON."""
+        return "".join(self.iter_json(compact, backend))
+
+# --- Auto Layout (layered / Sugiyama-style) ---
+
+def compute_layout(wf: N8NWorkflow) -> List[List[int]]:
+    """
+    Compute [x, y] positions for every node of `wf`, in node order.
+
+    Runs in O(V + E) plus a sort per rank:
+    1. Nodes whose only edges are outbound AI connections (models, memory,
+       tools, guardrails) are treated as sub-nodes of their target agent.
+    2. The remaining nodes are ranked by longest path over 'main' edges
+       (Kahn's algorithm; cycles are broken at the lowest unranked index).
+    3. Within each weakly connected flow, nodes are ordered per rank by the
+       barycenter of their predecessors' rows plus the output index they are
+       fed from, so Switch/IF branches fan out into separate rows.
+    4. Flows are stacked vertically with one empty row between them, and
+       sub-nodes are spread in the row under their agent.
+    """
+    n = len(wf.nodes)
+    parent = list(range(n))
+
+    def find(v: int) -> int:
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def union(a: int, b: int):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    main = wf._adjacency.get("main", [])
+    preds: List[List[tuple]] = [[] for _ in range(n)]
+    indegree = [0] * n
+    has_main = [False] * n
+    for src, outputs in enumerate(main):
+        if not outputs:
+            continue
+        for output_index, output in enumerate(outputs):
+            for dst in output:
+                preds[dst].append((src, output_index))
+                indegree[dst] += 1
+                has_main[src] = has_main[dst] = True
+                union(src, dst)
+
+    agent_of: Dict[int, int] = {}
+    for conn_type, adjacency in wf._adjacency.items():
+        if conn_type == "main":
+            continue
+        for src, outputs in enumerate(adjacency):
+            if not outputs:
+                continue
+            for output in outputs:
+                for dst in output:
+                    agent_of.setdefault(src, dst)
+                    union(src, dst)
+    subnodes: Dict[int, List[int]] = {}
+    is_sub = [False] * n
+    for src in sorted(agent_of):
+        if not has_main[src] and agent_of[src] != src:
+            is_sub[src] = True
+            subnodes.setdefault(agent_of[src], []).append(src)
+
+    # Rank main-flow nodes by longest path
+    rank = [0] * n
+    done = [False] * n
+    order: List[int] = []
+    queue = deque(v for v in range(n) if not is_sub[v] and indegree[v] == 0)
+    total = n - sum(is_sub)
+    next_forced = 0
+    while len(order) < total:
+        if not queue:
+            while done[next_forced] or is_sub[next_forced]:
+                next_forced += 1
+            queue.append(next_forced)  # Break a cycle
+        v = queue.popleft()
+        if done[v]:
+            continue
+        done[v] = True
+        order.append(v)
+        outputs = main[v] if v < len(main) else None
+        if not outputs:
+            continue
+        for output in outputs:
+            for dst in output:
+                if done[dst]:
+                    continue  # Back edge of a cycle
+                if rank[v] + 1 > rank[dst]:
+                    rank[dst] = rank[v] + 1
+                indegree[dst] -= 1
+                if indegree[dst] == 0:
+                    queue.append(dst)
+
+    # Bucket by flow (first node index order), then by rank
+    flows: Dict[int, Dict[int, List[int]]] = {}
+    for v in range(n):
+        flows.setdefault(find(v), {})
+    for v in order:
+        flows[find(v)].setdefault(rank[v], []).append(v)
+
+    row = [0] * n
+    positions: List[Optional[List[int]]] = [None] * n
+    row_offset = 0
+    for ranks in flows.values():
+        if not ranks:
+            continue
+        height = 0
+        for r in sorted(ranks):
+            ideal = {}
+            for v in ranks[r]:
+                placed = [row[u] + k for u, k in preds[v] if positions[u] is not None]
+                ideal[v] = sum(placed) / len(placed) if placed else 0.0
+            last = -1
+            for v in sorted(ranks[r], key=lambda v: (ideal[v], v)):
+                row[v] = max(int(round(ideal[v])), last + 1)
+                positions[v] = [r * LAYOUT_X_SPACING, (row_offset + row[v]) * LAYOUT_Y_SPACING]
+                # An agent's sub-nodes take the row underneath it
+                last = row[v] + (1 if v in subnodes else 0)
+            height = max(height, last + 1)
+        row_offset += height + 1
+
+    # Sub-nodes, centred in the row under their agent (nested ones under their parent)
+    stack = [v for v in subnodes if positions[v] is not None]
+    while stack:
+        agent = stack.pop()
+        ax, ay = positions[agent]
+        children = subnodes[agent]
+        for j, child in enumerate(children):
+            if positions[child] is None:
+                dx = (j - (len(children) - 1) / 2) * LAYOUT_SUBNODE_X_SPACING
+                positions[child] = [int(ax + dx), ay + LAYOUT_Y_SPACING]
+                if child in subnodes:
+                    stack.append(child)
+
+    # Anything left (e.g. sub-nodes wired only to each other) goes in a final row
+    leftovers = [v for v in range(n) if positions[v] is None]
+    for i, v in enumerate(leftovers):
+        positions[v] = [i * LAYOUT_X_SPACING, row_offset * LAYOUT_Y_SPACING]
+
+    return positions
+
+# --- Structural Validation ---
+
+LANGCHAIN_PREFIX = "@n8n/n8n-nodes-langchain."
+
+# Connection type -> node type prefixes (after the langchain package) allowed as source.
+# None means any source node is accepted.
+AI_CONNECTION_SOURCES = {
+    "ai_languageModel": ("lmChat", "lm"),
+    "ai_memory": ("memory",),
+    "ai_tool": None,
+    "ai_outputParser": ("outputParser",),
+    "ai_embedding": ("embeddings",),
+    "ai_document": ("document",),
+    "ai_textSplitter": ("textSplitter",),
+    "ai_vectorStore": ("vectorStore",),
+    "ai_retriever": ("retriever",),
+    "ai_reranker": ("reranker",),
+    # Emitted by this builder (create_guardrails -> agent), see generate_workflow.py
+    "ai_guardrails": ("chainGuardrails", "guardrails"),
+}
+
+class ValidationIssue:
+    """One structural problem found in a workflow graph."""
+
+    __slots__ = ("code", "severity", "message", "node", "details")
+
+    def __init__(self, code: str, severity: str, message: str, node: str = None, details: Dict[str, Any] = None):
+        self.code = code            # e.g. 'dangling_target', 'cycle'
+        self.severity = severity    # 'error' or 'warning'
+        self.message = message
+        self.node = node
+        self.details = details or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "code": self.code,
+            "severity": self.severity,
+            "message": self.message,
+            "node": self.node,
+            "details": self.details
+        }
+
+    def __repr__(self) -> str:
+        return f"ValidationIssue({self.severity}: {self.code} - {self.message})"
+
+class WorkflowValidationError(ValueError):
+    """Raised by validate(strict=True) when a workflow has structural errors."""
+
+    def __init__(self, workflow_name: str, issues: List[ValidationIssue]):
+        self.issues = issues
+        errors = [i for i in issues if i.severity == "error"]
+        super().__init__(f"Workflow '{workflow_name}' has {len(errors)} structural error(s): "
+                         + "; ".join(i.message for i in errors[:5]))
+
+def _is_trigger(node_type: str) -> bool:
+    """Entry-point nodes: any *Trigger node, webhooks and the legacy Start node."""
+    return (node_type.lower().endswith("trigger")
+            or node_type in ("n8n-nodes-base.webhook", "n8n-nodes-base.start"))
+
+def validate_graph(names: List[str], types: List[str], edges) -> List[ValidationIssue]:
+    """
+    Validate a workflow graph in linear time.
+
+    Args:
+        names (list): Node names, in node order
+        types (list): Node types, aligned with `names`
+        edges (iterable): (source_name, connection_type, output_index, target_name)
+
+    Checks: duplicate names, dangling sources/targets, unknown or mismatched AI
+    connection types, cycles in 'main' flows, Error Triggers mixed into a
+    normal workflow and nodes unreachable from any trigger.
+    """
+    issues: List[ValidationIssue] = []
+    n = len(names)
+
+    index: Dict[str, int] = {}
+    for i, name in enumerate(names):
+        if name in index:
+            issues.append(ValidationIssue("duplicate_name", "error",
+                                          f"Node name '{name}' is used more than once", name))
+        else:
+            index[name] = i
+
+    main_out: List[List[int]] = [[] for _ in range(n)]
+    ai_in: List[List[int]] = [[] for _ in range(n)]
+    indegree = [0] * n
+    dangling_sources = set()
+    for src_name, conn_type, output_index, dst_name in edges:
+        src = index.get(src_name)
+        dst = index.get(dst_name)
+        if src is None:
+            if src_name not in dangling_sources:
+                dangling_sources.add(src_name)
+                issues.append(ValidationIssue("dangling_source", "error",
+                                              f"Connections listed for unknown node '{src_name}'", src_name))
+            continue
+        if dst is None:
+            issues.append(ValidationIssue("dangling_target", "error",
+                                          f"'{src_name}' connects to unknown node '{dst_name}'", src_name,
+                                          {"target": dst_name, "type": conn_type, "output": output_index}))
+            continue
+
+        if conn_type == "main":
+            main_out[src].append(dst)
+            indegree[dst] += 1
+            continue
+
+        ai_in[dst].append(src)
+        if conn_type not in AI_CONNECTION_SOURCES:
+            issues.append(ValidationIssue("unknown_connection_type", "warning",
+                                          f"'{src_name}' -> '{dst_name}' uses unknown connection type '{conn_type}'",
+                                          src_name, {"target": dst_name, "type": conn_type}))
+            continue
+        if not types[dst].startswith(LANGCHAIN_PREFIX):
+            issues.append(ValidationIssue("ai_connection_target", "error",
+                                          f"'{conn_type}' connection from '{src_name}' targets non-AI node '{dst_name}'",
+                                          src_name, {"target": dst_name, "type": conn_type}))
+        allowed = AI_CONNECTION_SOURCES[conn_type]
+        if allowed is not None:
+            local_type = types[src][len(LANGCHAIN_PREFIX):] if types[src].startswith(LANGCHAIN_PREFIX) else ""
+            if not local_type.startswith(allowed):
+                issues.append(ValidationIssue("ai_connection_source", "error",
+                                              f"'{src_name}' ({types[src]}) cannot feed a '{conn_type}' connection",
+                                              src_name, {"target": dst_name, "type": conn_type}))
+
+    # Cycles: peel sources forwards (Kahn), then sinks backwards; what's left sits on a cycle
+    remaining = indegree[:]
+    queue = deque(v for v in range(n) if remaining[v] == 0)
+    peeled = [False] * n
+    while queue:
+        v = queue.popleft()
+        peeled[v] = True
+        for dst in main_out[v]:
+            remaining[dst] -= 1
+            if remaining[dst] == 0:
+                queue.append(dst)
+    if not all(peeled):
+        outdegree = [0] * n
+        main_in: List[List[int]] = [[] for _ in range(n)]
+        for v in range(n):
+            if peeled[v]:
+                continue
+            for dst in main_out[v]:
+                if not peeled[dst]:
+                    outdegree[v] += 1
+                    main_in[dst].append(v)
+        queue = deque(v for v in range(n) if not peeled[v] and outdegree[v] == 0)
+        while queue:
+            v = queue.popleft()
+            peeled[v] = True
+            for src in main_in[v]:
+                outdegree[src] -= 1
+                if outdegree[src] == 0:
+                    queue.append(src)
+        cyclic = [names[v] for v in range(n) if not peeled[v]]
+        issues.append(ValidationIssue("cycle", "error",
+                                      f"'main' connections form a cycle through {len(cyclic)} node(s)",
+                                      cyclic[0], {"nodes": cyclic}))
+
+    # Reachability from triggers; AI sub-nodes count as reachable through their agent
+    triggers = [v for v in range(n) if _is_trigger(types[v])]
+    error_triggers = [v for v in triggers if types[v] == "n8n-nodes-base.errorTrigger"]
+    if error_triggers and len(error_triggers) < len(triggers):
+        for v in error_triggers:
+            issues.append(ValidationIssue("error_trigger_mixed", "warning",
+                                          f"'{names[v]}' only runs when this workflow is used as an error "
+                                          f"workflow; move it to a separate workflow", names[v]))
+    if not triggers:
+        if n:
+            issues.append(ValidationIssue("no_trigger", "warning", "Workflow has no trigger node"))
+    else:
+        reached = [False] * n
+        stack = list(triggers)
+        for v in triggers:
+            reached[v] = True
+        while stack:
+            v = stack.pop()
+            for w in main_out[v] + ai_in[v]:
+                if not reached[w]:
+                    reached[w] = True
+                    stack.append(w)
+        for v in range(n):
+            if not reached[v]:
+                issues.append(ValidationIssue("unreachable", "warning",
+                                              f"'{names[v]}' is not reachable from any trigger", names[v]))
+
+    issues.sort(key=lambda i: i.severity != "error")
+    return issues
+
+def validate_workflow_dict(workflow_data: Dict[str, Any]) -> List[ValidationIssue]:
+    """Validate n8n workflow JSON (as loaded with json.load) without building N8NNodes."""
+    nodes = workflow_data.get("nodes", [])
+    connections = workflow_data.get("connections", {})
+
+    def edges():
+        for src_name, by_type in connections.items():
+            for conn_type, outputs in by_type.items():
+                for output_index, output in enumerate(outputs or []):
+                    for item in output or []:
+                        yield src_name, conn_type, output_index, item.get("node")
+
+    return validate_graph([nd.get("name") for nd in nodes], [nd.get("type", "") for nd in nodes], edges())
 
 # --- Standard Node Factories (The 'Gold Standard' Patterns) ---
 
@@ -2,13 +2,41 @@
 """
 Parse natural language requirements into structured JSON.
 Uses OpenRouter API (free Gemini model) for intelligent extraction.
+Responses are cached on disk (see llm_cache.py); pass --no-cache to bypass.
+Common intake shapes are first tried with the local rule-based extractor
+(local_extractor.py); OpenRouter is only called when its confidence is below
+LOCAL_EXTRACT_THRESHOLD (default 0.75). Pass --no-local to always use the LLM.
+OpenRouter calls share the machine-wide rate limit (rate_limiter.py): single
+requests use the interactive lane, parse_requirements_batch the batch lane.
+With --stream the completion is streamed and validated field by field
+(see llm_stream.py), aborting as soon as the output goes off-schema.
+
+Several documents can be extracted in one call with parse_requirements_batch,
+which packs them into prompts within a token budget and folds the clarifying
+questions into the same response.
 """
 
 import os
+import re
 import json
 import logging
 from dotenv import load_dotenv
-import requests
+
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import get_client
+from rate_limiter import get_limiter
+
+try:
+    from execution.llm_cache import get_default_cache, prompt_key, cache_disabled
+    from execution.llm_stream import IncrementalJSONParser, StreamAbort, iter_sse_deltas, type_validators
+    from execution.local_extractor import extract_requirements, questions_for_missing, DEFAULT_THRESHOLD
+    from execution.model_router import get_router
+except ImportError:
+    from llm_cache import get_default_cache, prompt_key, cache_disabled
+    from llm_stream import IncrementalJSONParser, StreamAbort, iter_sse_deltas, type_validators
+    from local_extractor import extract_requirements, questions_for_missing, DEFAULT_THRESHOLD
+    from model_router import get_router
 
 # Configure logging
 logging.basicConfig(
@@ -20,47 +48,233 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-def call_openrouter(prompt, model=None):
-    """Call OpenRouter API with the given prompt."""
+# Output shapes requested from the model (shared by the single and batch prompts)
+REQUIREMENTS_SCHEMA = """{
+    "workflow_name": "brief descriptive name",
+    "goal": "what the workflow accomplishes",
+    "triggers": [
+        {
+            "type": "webhook|schedule|manual|event",
+            "description": "when this triggers",
+            "configuration": {}
+        }
+    ],
+    "data_sources": [
+        {
+            "name": "API/service name",
+            "purpose": "what data is being accessed",
+            "credentials_needed": true/false
+        }
+    ],
+    "actions": [
+        {
+            "step": 1,
+            "description": "what happens",
+            "node_type": "HTTP Request|Google Sheets|Slack|etc"
+        }
+    ],
+    "data_transformations": [
+        {
+            "description": "how data is transformed",
+            "input": "source field",
+            "output": "target field"
+        }
+    ],
+    "error_handling": {
+        "strategy": "retry|notify|fallback|stop",
+        "notification_method": "slack|email|webhook|none"
+    },
+    "success_metrics": "how to measure success",
+    "missing_info": [
+        "list any critical information not provided in requirements"
+    ]
+}"""
+
+QUESTIONS_SCHEMA = """{
+    "blocking_questions": [
+        {
+            "question": "specific question",
+            "reason": "why this is critical",
+            "suggested_default": "reasonable default if client doesn't respond"
+        }
+    ],
+    "optional_questions": [
+        {
+            "question": "specific question",
+            "reason": "why this would be helpful"
+        }
+    ]
+}"""
+
+def local_threshold_default():
+    """Confidence the local extractor needs to skip the LLM (LOCAL_EXTRACT_THRESHOLD, default 0.75)."""
+    return float(os.getenv('LOCAL_EXTRACT_THRESHOLD', DEFAULT_THRESHOLD))
+
+def try_local_extraction(requirements_text, local_threshold):
+    """
+    Run the local extractor; return its requirements if confident enough, else None.
+    
+    Args:
+        requirements_text (str): Raw requirements from client
+        local_threshold (float): Minimum confidence, or None to skip the fast path
+    """
+    if local_threshold is None:
+        return None
+    requirements, confidence = extract_requirements(requirements_text, local_threshold)
+    if confidence < local_threshold:
+        logger.info(f"Local extraction confidence {confidence} < {local_threshold}, using OpenRouter")
+        return None
+    logger.info(f"Local extraction confidence {confidence} >= {local_threshold}, skipping OpenRouter")
+    return requirements
+
+def call_openrouter(prompt, model=None, use_cache=True, parser=None, lane="interactive", task="extraction"):
+    """
+    Call OpenRouter API with the given prompt.
+    
+    Without an explicit model the task's fallback chain is used (model_router.py):
+    the fastest healthy model is tried first and timeouts, 429/5xx or unusable
+    responses fail over to the next one.
+    
+    Identical prompts are answered from the on-disk response cache (keyed by
+    the model, or by the task's route) unless use_cache is False or OPENROUTER_CACHE=0.
+    
+    With an IncrementalJSONParser the completion is streamed (SSE) into it;
+    its validators run as fields arrive and StreamAbort closes the connection
+    early. Cached responses are replayed through the parser the same way.
+    
+    Network calls wait for a token from the shared "openrouter" rate limiter
+    in `lane` (interactive, batch or background); cache hits do not.
+    """
+    cache = get_default_cache() if use_cache and not cache_disabled() else None
+    key = _cache_key(prompt, model, task)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info("OpenRouter response served from cache")
+            if parser is not None:
+                parser.feed(cached)
+                parser.close()
+            return cached
+    
     api_key = os.getenv('OPENROUTER_API_KEY')
     if not api_key:
         raise ValueError("OPENROUTER_API_KEY not found in environment")
     
-    # Use free Gemini model if not specified
-    if model is None:
-        model = os.getenv('OPENROUTER_MODEL', 'google/gemini-2.0-flash-exp:free')
-    
     url = "https://openrouter.ai/api/v1/chat/completions"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
     
-    payload = {
-        "model": model,
-        "messages": [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-    }
+    limiter = get_limiter("openrouter")
+    throttle = limiter.lane(lane) if limiter else None
     
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
+    def attempt(attempt_model, timeout, is_last):
+        payload = {
+            "model": attempt_model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        }
+        # Fail over quickly while other models remain; the last one gets the client's retries.
+        # A 429 still pauses the shared openrouter bucket either way (the client blocks the
+        # throttle before handing the response back), so the next model waits for it too
+        retries = None if is_last else 0
+        if parser is not None:
+            return _stream_openrouter(url, headers, payload, parser, throttle, timeout, retries)
+        # Completions have no side effects, so they are safe to resend
+        response = get_client().post(url, headers=headers, json=payload, timeout=timeout, idempotent=True,
+                                     throttle=throttle, max_retries=retries)
         response.raise_for_status()
-        return response.json()['choices'][0]['message']['content']
+        content = response.json()['choices'][0]['message']['content']
+        if not content:
+            raise ValueError(f"{attempt_model} returned an empty completion")
+        return content
+    
+    try:
+        if model is not None:
+            content = attempt(model, 60, True)
+        else:
+            content = get_router().run(task, attempt)
+    except StreamAbort:
+        raise
     except Exception as e:
         logger.error(f"OpenRouter API call failed: {e}")
         raise
+    
+    if cache is not None:
+        cache.put(key, model or f"route:{task}", content)
+    return content
+
+def _cache_key(prompt, model, task):
+    # Routed calls share one entry per task, whichever model answered
+    return prompt_key(model or f"route:{task}", prompt)
+
+def _stream_openrouter(url, headers, payload, parser, throttle=None, timeout=60, max_retries=None):
+    """POST a streaming completion and feed it to `parser`; returns the full content."""
+    payload = dict(payload, stream=True)
+    response = None
+    try:
+        response = get_client().post(url, headers=headers, json=payload, timeout=timeout, idempotent=True,
+                                     stream=True, throttle=throttle, max_retries=max_retries)
+        response.raise_for_status()
+        response.encoding = 'utf-8'
+        for delta in iter_sse_deltas(response.iter_lines(decode_unicode=True)):
+            parser.feed(delta)
+        parser.close()
+    except StreamAbort as e:
+        # Closing the connection stops the generation, so the rest is never billed
+        logger.warning(f"Aborted OpenRouter stream after {len(e.partial)} chars: {e.reason}")
+        raise
+    except Exception as e:
+        if parser.text:
+            # The parser already holds part of this answer; another model cannot continue it
+            raise StreamAbort(f"stream interrupted: {type(e).__name__}: {e}", "".join(parser.text)) from e
+        raise
+    finally:
+        if response is not None:
+            response.close()
+    
+    if parser.first_field_seconds is not None:
+        logger.info(f"First field after {parser.first_field_seconds:.2f}s, "
+                    f"{len(parser.fields)} fields streamed")
+    return "".join(parser.text)
 
-def parse_requirements(requirements_text, output_dir=".tmp"):
+def requirements_parser(on_field=None):
+    """Streaming parser that validates requirements fields as they arrive."""
+    types = dict(REQUIRED_FIELDS)
+    types.update({field: list for field in LIST_FIELDS})
+    return IncrementalJSONParser(on_field=on_field, validators=type_validators(types), required=REQUIRED_FIELDS)
+
+def forget_response(prompt, model=None, task="extraction"):
+    """Drop a cached response that turned out to be unusable so the next call re-queries."""
+    get_default_cache().delete(_cache_key(prompt, model, task))
+
+def strip_code_fences(response):
+    """Remove a markdown code block around a JSON response, if present."""
+    if "```json" in response:
+        return response.split("```json")[1].split("```")[0].strip()
+    if "```" in response:
+        return response.split("```")[1].split("```")[0].strip()
+    return response
+
+def parse_requirements(requirements_text, output_dir=".tmp", use_cache=True, stream=False, on_field=None,
+                       local_threshold="default", lane="interactive"):
     """
     Parse natural language requirements into structured JSON.
     
     Args:
         requirements_text (str): Raw requirements from client
         output_dir (str): Directory to save output files
+        use_cache (bool): Reuse cached OpenRouter responses
+        stream (bool): Stream the completion, validating fields as they arrive
+        on_field (callable): With stream, called with (key, value) per completed field
+        local_threshold (float): Confidence needed to use the local extractor instead
+            of the LLM; None always calls the LLM ("default" reads LOCAL_EXTRACT_THRESHOLD)
+        lane (str): Rate-limit lane for OpenRouter calls
         
     Returns:
         dict: Structured requirements data
@@ -70,6 +284,22 @@ def parse_requirements(requirements_text, output_dir=".tmp"):
     # Create output directory if needed
     os.makedirs(output_dir, exist_ok=True)
     
+    # Fast path: common shapes are extracted locally in milliseconds
+    if local_threshold == "default":
+        local_threshold = local_threshold_default()
+    structured_data = try_local_extraction(requirements_text, local_threshold)
+    if structured_data is not None:
+        requirements_path = os.path.join(output_dir, "requirements.json")
+        with open(requirements_path, 'w') as f:
+            json.dump(structured_data, f, indent=2)
+        logger.info(f"Saved structured requirements to {requirements_path}")
+        if structured_data['missing_info']:
+            questions_path = os.path.join(output_dir, "questions.json")
+            with open(questions_path, 'w') as f:
+                json.dump(questions_for_missing(structured_data['missing_info']), f, indent=2)
+            logger.info(f"Generated clarifying questions in {questions_path}")
+        return structured_data
+    
     # Build prompt for AI extraction
     prompt = f"""You are an expert n8n workflow analyst. Extract structured information from these client requirements.
 
@@ -77,60 +307,23 @@ Requirements:
 {requirements_text}
 
 Extract the following and return ONLY valid JSON (no markdown, no explanation):
-{{
-    "workflow_name": "brief descriptive name",
-    "goal": "what the workflow accomplishes",
-    "triggers": [
-        {{
-            "type": "webhook|schedule|manual|event",
-            "description": "when this triggers",
-            "configuration": {{}}
-        }}
-    ],
-    "data_sources": [
-        {{
-            "name": "API/service name",
-            "purpose": "what data is being accessed",
-            "credentials_needed": true/false
-        }}
-    ],
-    "actions": [
-        {{
-            "step": 1,
-            "description": "what happens",
-            "node_type": "HTTP Request|Google Sheets|Slack|etc"
-        }}
-    ],
-    "data_transformations": [
-        {{
-            "description": "how data is transformed",
-            "input": "source field",
-            "output": "target field"
-        }}
-    ],
-    "error_handling": {{
-        "strategy": "retry|notify|fallback|stop",
-        "notification_method": "slack|email|webhook|none"
-    }},
-    "success_metrics": "how to measure success",
-    "missing_info": [
-        "list any critical information not provided in requirements"
-    ]
-}}"""
+{REQUIREMENTS_SCHEMA}"""
     
     try:
         # Call AI to extract structure
         logger.info("Calling OpenRouter API for extraction")
-        response = call_openrouter(prompt)
-        
-        # Parse JSON response
-        # Remove markdown code blocks if present
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0].strip()
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0].strip()
-        
-        structured_data = json.loads(response)
+        if stream:
+            parser = requirements_parser(on_field)
+            response = call_openrouter(prompt, use_cache=use_cache, parser=parser, lane=lane)
+            structured_data = dict(parser.fields)
+        else:
+            response = call_openrouter(prompt, use_cache=use_cache, lane=lane)
+            
+            # Parse JSON response
+            # Remove markdown code blocks if present
+            response = strip_code_fences(response)
+            
+            structured_data = json.loads(response)
         
         # Save structured requirements
         requirements_path = os.path.join(output_dir, "requirements.json")
@@ -140,7 +333,7 @@ Extract the following and return ONLY valid JSON (no markdown, no explanation):
         
         # Check if there's missing info - generate questions
         if structured_data.get('missing_info') and len(structured_data['missing_info']) > 0:
-            questions = generate_clarifying_questions(structured_data)
+            questions = generate_clarifying_questions(structured_data, use_cache=use_cache, lane=lane)
             questions_path = os.path.join(output_dir, "questions.json")
             with open(questions_path, 'w') as f:
                 json.dump(questions, f, indent=2)
@@ -151,12 +344,19 @@ Extract the following and return ONLY valid JSON (no markdown, no explanation):
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse AI response as JSON: {e}")
         logger.error(f"Response was: {response}")
+        if use_cache:
+            forget_response(prompt)
+        raise
+    except StreamAbort as e:
+        logger.error(f"Requirements stream rejected: {e.reason}")
+        if use_cache:
+            forget_response(prompt)
         raise
     except Exception as e:
         logger.error(f"Requirements parsing failed: {e}")
         raise
 
-def generate_clarifying_questions(structured_data):
+def generate_clarifying_questions(structured_data, use_cache=True, lane="interactive"):
     """Generate prioritized clarifying questions based on missing info."""
     missing = structured_data.get('missing_info', [])
     
@@ -167,47 +367,308 @@ Missing Information: {json.dumps(missing, indent=2)}
 
 Generate questions prioritized by importance (blocking vs. nice-to-have).
 Return ONLY valid JSON:
-{{
-    "blocking_questions": [
-        {{
-            "question": "specific question",
-            "reason": "why this is critical",
-            "suggested_default": "reasonable default if client doesn't respond"
-        }}
-    ],
-    "optional_questions": [
-        {{
-            "question": "specific question",
-            "reason": "why this would be helpful"
-        }}
-    ]
-}}"""
+{QUESTIONS_SCHEMA}"""
     
+    response = None
     try:
-        response = call_openrouter(prompt)
+        response = call_openrouter(prompt, use_cache=use_cache, lane=lane, task="questions")
         
         # Clean response
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0].strip()
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0].strip()
+        response = strip_code_fences(response)
         
         return json.loads(response)
     except Exception as e:
         logger.error(f"Failed to generate questions: {e}")
+        if response is not None and use_cache:
+            forget_response(prompt, task="questions")
         return {"blocking_questions": [], "optional_questions": []}
 
+# Batch extraction packs several documents into one prompt
+CHARS_PER_TOKEN = 4
+DEFAULT_BATCH_TOKEN_BUDGET = 6000
+# Caps the response size too: every document adds a full requirements object to the output
+DEFAULT_MAX_DOCS_PER_BATCH = 8
+REQUIRED_FIELDS = {"workflow_name": str, "goal": str, "triggers": list, "actions": list}
+LIST_FIELDS = ("data_sources", "data_transformations", "missing_info")
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting prompts."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def normalize_documents(documents):
+    """
+    Turn strings or {"id", "text"} dicts into (id, text) pairs with unique, filesystem-safe ids.
+    
+    Returns:
+        list: [(doc_id, text)] in input order
+    """
+    normalized = []
+    seen = set()
+    for index, doc in enumerate(documents, 1):
+        if isinstance(doc, dict):
+            doc_id, text = doc.get("id") or f"doc_{index}", doc["text"]
+        else:
+            doc_id, text = f"doc_{index}", doc
+        doc_id = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(doc_id)).strip('_.') or f"doc_{index}"
+        base, suffix = doc_id, 2
+        while doc_id in seen:
+            doc_id = f"{base}_{suffix}"
+            suffix += 1
+        seen.add(doc_id)
+        normalized.append((doc_id, text))
+    return normalized
+
+def build_batch_prompt(batch, fold_questions=True):
+    """Prompt extracting every (id, text) document in `batch` into one JSON response."""
+    documents = "\n\n".join(f'<document id="{doc_id}">\n{text.strip()}\n</document>' for doc_id, text in batch)
+    entry = f'''{{
+    "id": "document id",
+    "requirements": {REQUIREMENTS_SCHEMA}'''
+    if fold_questions:
+        entry += f''',
+    "questions": {QUESTIONS_SCHEMA}'''
+    entry += "\n}"
+    
+    prompt = f"""You are an expert n8n workflow analyst. Extract structured information from each of these client requirement documents. Treat every document independently.
+
+{documents}
+
+Return ONLY valid JSON (no markdown, no explanation) with one entry per document, in the same order:
+{{"results": [{entry}]}}"""
+    if fold_questions:
+        prompt += """
+
+For "questions", list clarifying questions prioritized by importance (blocking vs. nice-to-have) for the document's missing_info; use empty lists when nothing is missing."""
+    return prompt
+
+def pack_batches(documents, token_budget=DEFAULT_BATCH_TOKEN_BUDGET, max_docs=DEFAULT_MAX_DOCS_PER_BATCH,
+                 overhead_tokens=0):
+    """
+    Greedily group (id, text) documents so each prompt stays within the token budget.
+    
+    A document that exceeds the budget on its own still gets a batch of its own.
+    
+    Args:
+        documents (list): (doc_id, text) pairs
+        token_budget (int): Estimated prompt tokens allowed per call
+        max_docs (int): Most documents per call
+        overhead_tokens (int): Tokens taken by the instructions and schema
+        
+    Returns:
+        list: Batches of (doc_id, text) pairs, input order preserved
+    """
+    batches = []
+    current, used = [], overhead_tokens
+    for doc in documents:
+        cost = estimate_tokens(doc[1]) + 10  # document tags
+        if current and (used + cost > token_budget or len(current) >= max_docs):
+            batches.append(current)
+            current, used = [], overhead_tokens
+        current.append(doc)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def validate_requirements(data):
+    """
+    Check an extracted requirements object has the fields generation relies on.
+    
+    Returns:
+        list: Problems found (empty if valid)
+    """
+    if not isinstance(data, dict):
+        return ["requirements is not a JSON object"]
+    problems = []
+    for field, expected in REQUIRED_FIELDS.items():
+        if not isinstance(data.get(field), expected):
+            problems.append(f"'{field}' missing or not a {expected.__name__}")
+    if isinstance(data.get("workflow_name"), str) and not data["workflow_name"].strip():
+        problems.append("'workflow_name' is empty")
+    for field in LIST_FIELDS:
+        if field in data and not isinstance(data[field], list):
+            problems.append(f"'{field}' is not a list")
+    return problems
+
+def _valid_questions(questions):
+    return isinstance(questions, dict) and all(
+        isinstance(questions.get(key, []), list) for key in ("blocking_questions", "optional_questions"))
+
+def split_batch_response(response, batch):
+    """
+    Map a batch response back to its documents.
+    
+    Entries are matched by id; entries without a known id are matched by position
+    when the response has exactly one entry per document.
+    
+    Returns:
+        dict: doc_id -> {"requirements": ..., "questions": ...}
+    """
+    data = json.loads(strip_code_fences(response))
+    entries = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError("batch response has no 'results' list")
+    
+    ids = [doc_id for doc_id, _ in batch]
+    by_id = {}
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        doc_id = str(entry.get("id", ""))
+        if doc_id not in ids and len(entries) == len(ids):
+            doc_id = ids[position]
+        if doc_id in ids and doc_id not in by_id:
+            by_id[doc_id] = entry
+    return by_id
+
+def _write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def parse_requirements_batch(documents, output_dir=".tmp", token_budget=DEFAULT_BATCH_TOKEN_BUDGET,
+                             max_docs_per_batch=DEFAULT_MAX_DOCS_PER_BATCH, fold_questions=True,
+                             use_cache=True, local_threshold="default"):
+    """
+    Parse many requirement documents with as few OpenRouter calls as possible.
+    
+    Documents the local extractor handles confidently never reach the LLM; the
+    rest are packed into prompts within token_budget; each response is split
+    and validated per document. Documents missing from the response or failing
+    validation fall back to a single parse_requirements call. Outputs match
+    parse_requirements, one directory per document: <output_dir>/<id>/.
+    
+    Args:
+        documents (list): Requirement texts or {"id", "text"} dicts
+        output_dir (str): Parent directory for per-document outputs
+        token_budget (int): Estimated prompt tokens per call
+        max_docs_per_batch (int): Most documents per call
+        fold_questions (bool): Ask for clarifying questions in the same call
+        use_cache (bool): Reuse cached OpenRouter responses
+        local_threshold (float): Local extractor confidence needed to skip the LLM (None disables)
+        
+    Returns:
+        list: Per-document results (id, status, output_dir, requirements, source, ...) in input order
+    """
+    docs = normalize_documents(documents)
+    if local_threshold == "default":
+        local_threshold = local_threshold_default()
+    
+    results = {}
+    remote_docs = []
+    for doc_id, text in docs:
+        requirements = try_local_extraction(text, local_threshold)
+        if requirements is None:
+            remote_docs.append((doc_id, text))
+            continue
+        doc_dir = os.path.join(output_dir, doc_id)
+        os.makedirs(doc_dir, exist_ok=True)
+        _write_json(os.path.join(doc_dir, "requirements.json"), requirements)
+        result = {"id": doc_id, "output_dir": doc_dir, "status": "success", "source": "local",
+                  "requirements": requirements}
+        if requirements['missing_info']:
+            result["questions"] = questions_for_missing(requirements['missing_info'])
+            _write_json(os.path.join(doc_dir, "questions.json"), result["questions"])
+        results[doc_id] = result
+    
+    overhead = estimate_tokens(build_batch_prompt([], fold_questions))
+    batches = pack_batches(remote_docs, token_budget, max_docs_per_batch, overhead)
+    logger.info(f"Parsing {len(docs)} requirement documents: {len(docs) - len(remote_docs)} locally, "
+                f"{len(remote_docs)} in {len(batches)} batched call(s)")
+    
+    llm_calls = 0
+    for number, batch in enumerate(batches, 1):
+        prompt = build_batch_prompt(batch, fold_questions)
+        entries = {}
+        llm_calls += 1
+        try:
+            response = call_openrouter(prompt, use_cache=use_cache, lane="batch")
+        except Exception as e:
+            # Splitting an unreachable API into more calls would only add failures
+            logger.error(f"Batch {number}/{len(batches)} failed: {e}")
+            for doc_id, _ in batch:
+                results[doc_id] = {"id": doc_id, "status": "error", "source": "batch", "error": str(e)}
+            continue
+        try:
+            entries = split_batch_response(response, batch)
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Batch {number}/{len(batches)} response unusable ({e}); falling back per document")
+            if use_cache:
+                forget_response(prompt)
+        
+        for doc_id, text in batch:
+            doc_dir = os.path.join(output_dir, doc_id)
+            os.makedirs(doc_dir, exist_ok=True)
+            result = {"id": doc_id, "output_dir": doc_dir}
+            entry = entries.get(doc_id, {})
+            requirements = entry.get("requirements")
+            problems = validate_requirements(requirements) if doc_id in entries else ["missing from batch response"]
+            
+            if problems:
+                logger.warning(f"{doc_id}: {'; '.join(problems)} - parsing on its own")
+                try:
+                    llm_calls += 1
+                    requirements = parse_requirements(text, doc_dir, use_cache=use_cache, local_threshold=None,
+                                                      lane="batch")
+                    if requirements.get('missing_info'):
+                        llm_calls += 1
+                    result.update({"status": "success", "source": "single", "requirements": requirements})
+                except Exception as e:
+                    result.update({"status": "error", "source": "single", "error": str(e)})
+                results[doc_id] = result
+                continue
+            
+            _write_json(os.path.join(doc_dir, "requirements.json"), requirements)
+            result.update({"status": "success", "source": "batch", "requirements": requirements})
+            if requirements.get('missing_info'):
+                questions = entry.get("questions") if fold_questions else None
+                if not _valid_questions(questions):
+                    llm_calls += 1
+                    questions = generate_clarifying_questions(requirements, use_cache=use_cache, lane="batch")
+                _write_json(os.path.join(doc_dir, "questions.json"), questions)
+                result["questions"] = questions
+            results[doc_id] = result
+    
+    ordered = [results[doc_id] for doc_id, _ in docs]
+    succeeded = sum(1 for r in ordered if r["status"] == "success")
+    logger.info(f"Batch parse complete: {succeeded}/{len(docs)} documents, {llm_calls} LLM call(s) "
+                f"(vs {len(docs)}+ one at a time)")
+    return ordered
+
 def main():
     """Main execution for testing."""
     import sys
     
-    if len(sys.argv) < 2:
-        print("Usage: python parse_requirements.py <requirements_file>")
-        print("   or: python parse_requirements.py '<requirements text>'")
+    args = [a for a in sys.argv[1:] if a not in ('--no-cache', '--stream', '--no-local')]
+    use_cache = '--no-cache' not in sys.argv
+    stream = '--stream' in sys.argv
+    local_threshold = None if '--no-local' in sys.argv else "default"
+    
+    if not args:
+        print("Usage: python parse_requirements.py <requirements_file> [--no-cache] [--stream] [--no-local]")
+        print("   or: python parse_requirements.py '<requirements text>' [--no-cache] [--stream] [--no-local]")
+        print("   or: python parse_requirements.py <file> <file> ... | <documents.jsonl> [--no-cache]  (batched)")
         sys.exit(1)
     
+    # Several documents (or a JSONL file of {"id", "text"} lines) are parsed in batches
+    if len(args) > 1 or args[0].endswith('.jsonl'):
+        documents = []
+        for arg in args:
+            if arg.endswith('.jsonl'):
+                with open(arg, 'r') as f:
+                    documents.extend(json.loads(line) for line in f if line.strip())
+            elif os.path.isfile(arg):
+                with open(arg, 'r') as f:
+                    documents.append({"id": os.path.splitext(os.path.basename(arg))[0], "text": f.read()})
+            else:
+                documents.append(arg)
+        results = parse_requirements_batch(documents, use_cache=use_cache, local_threshold=local_threshold)
+        print("\n=== Batch Results ===")
+        print(json.dumps([{k: r.get(k) for k in ("id", "status", "source", "output_dir", "error")} for r in results],
+                         indent=2))
+        return
+    
     # Check if argument is a file or text
-    arg = sys.argv[1]
+    arg = args[0]
     if os.path.isfile(arg):
         with open(arg, 'r') as f:
             requirements = f.read()
@@ -215,7 +676,9 @@ def main():
         requirements = arg
     
     # Parse requirements
-    result = parse_requirements(requirements)
+    on_field = (lambda key, value: print(f"  ✓ {key}")) if stream else None
+    result = parse_requirements(requirements, use_cache=use_cache, stream=stream, on_field=on_field,
+                                local_threshold=local_threshold)
     
     print("\n=== Structured Requirements ===")
     print(json.dumps(result, indent=2))
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Split a large N8NWorkflow into linked sub-workflows.
+
+The n8n editor and API slow down badly past a few hundred nodes. The
+partitioner moves parts of the graph into child workflows that the parent
+calls through Execute Workflow nodes:
+
+- Switch branches: every Switch output whose branch is self-contained
+  (single entry, single exit node that is also the branch's only sink)
+  becomes a child. The Switch feeds an Execute Workflow node, and the
+  branch's exit edge is re-attached to that node, so downstream nodes
+  (e.g. a Merge) still receive the branch's last output.
+- Budgets: a workflow (or child) over `max_nodes` / `max_bytes` is cut at
+  single-edge "clean cuts" along its topological order; each tail becomes
+  a child of the segment before it.
+
+Each pass runs in O(V + E); children still over budget get another pass,
+so nested Switch trees cost one pass per nesting level. Node objects are
+cloned (parameters are shared with the source workflow). Execute Workflow
+nodes are emitted with an empty workflowId; the manifest lists them so the deploy step can create the
+children first and fill in the ids with link_partition_ids() (deploy_to_n8n.deploy_partitions, or
+deploy_to_n8n.py pointed at partition_manifest.json).
+
+Usage:
+    python partition_workflow.py .tmp/workflow.json --max-nodes 50 --out .tmp/partitions
+"""
+
+import os
+import re
+import json
+import uuid
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from execution.n8n_builder import N8NNode, N8NWorkflow, ID_NAMESPACE
+except ImportError:
+    from n8n_builder import N8NNode, N8NWorkflow, ID_NAMESPACE
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_NODES = 50
+SPLIT_TYPES = ("n8n-nodes-base.switch",)
+EXECUTE_WORKFLOW_TYPE = "n8n-nodes-base.executeWorkflow"
+EXECUTE_TRIGGER_TYPE = "n8n-nodes-base.executeWorkflowTrigger"
+HELPER_TYPES = (EXECUTE_WORKFLOW_TYPE, EXECUTE_TRIGGER_TYPE)
+MANIFEST_NAME = "partition_manifest.json"
+
+
+def _clone_node(node: N8NNode) -> N8NNode:
+    """Copy a node into another workflow, keeping its id (parameters are shared)."""
+    clone = N8NNode.__new__(N8NNode)  # Skip __init__: no fresh uuid4 or type defaults needed
+    for slot in N8NNode.__slots__:
+        object.__setattr__(clone, slot, getattr(node, slot, None))
+    # The cached fragment stays valid until layout() moves the clone
+    object.__setattr__(clone, "_position", list(node._position))
+    return clone
+
+
+def _helper_node(part: N8NWorkflow, name: str, node_type: str, parameters: Dict[str, Any], seed: str) -> N8NNode:
+    """Trigger / Execute Workflow node, with a stable id when the source uses deterministic ids."""
+    node = N8NNode(name, node_type, [0, 0], parameters)
+    if seed is not None:
+        node.id = str(uuid.uuid5(ID_NAMESPACE, f"{part.name}\x1f{name}\x1f{seed}"))
+    return part.add_node(node)
+
+
+def _partition_once(wf: N8NWorkflow, max_nodes: int, max_bytes: Optional[int], split_types: Tuple[str, ...],
+                    min_branch_nodes: int) -> Tuple[List[N8NWorkflow], Dict[str, Any]]:
+    """
+    One O(V + E) pass: split the top-level Switch branches, then budget-cut
+    the top level and each of those branches. See partition_workflow().
+    """
+    nodes = wf.nodes
+    n = len(nodes)
+    main = wf._adjacency.get("main", [])
+
+    preds: List[List[int]] = [[] for _ in range(n)]
+    succs: List[List[int]] = [[] for _ in range(n)]
+    has_main = [False] * n
+    for u, outputs in enumerate(main):
+        for output in outputs or ():
+            for v in output:
+                preds[v].append(u)
+                succs[u].append(v)
+                has_main[u] = has_main[v] = True
+
+    # AI sub-nodes travel with the agent they feed
+    agent_of: Dict[int, int] = {}
+    for conn_type, adjacency in wf._adjacency.items():
+        if conn_type == "main":
+            continue
+        for u, outputs in enumerate(adjacency):
+            for output in outputs or ():
+                for v in output:
+                    if not has_main[u] and u != v:
+                        agent_of.setdefault(u, v)
+
+    # Trigger / Execute Workflow nodes from an earlier pass don't count towards the budget
+    weight = [0 if i in agent_of or node.type in HELPER_TYPES else 1 for i, node in enumerate(nodes)]
+    size = [0] * n
+    if max_bytes:
+        for i, node in enumerate(nodes):
+            size[i] = len(node._encoded(True, "json"))
+    for sub, agent in agent_of.items():
+        while agent in agent_of:  # Nested sub-nodes (e.g. a tool's own model)
+            agent = agent_of[agent]
+        weight[agent] += 1
+        size[agent] += size[sub]
+        size[sub] = 0
+
+    manifest = {"source_workflow": wf.name, "partition_count": 1, "deploy_order": [wf.name],
+                "workflows": [{"name": wf.name, "parent": None, "kind": "root", "entry_node": None,
+                               "node_count": n}],
+                "links": []}
+    if sum(weight) <= max_nodes and (not max_bytes or sum(size) <= max_bytes):
+        return [wf], manifest
+
+    # Topological order of main-flow nodes
+    indegree = [len(p) for p in preds]
+    order = [i for i in range(n) if i not in agent_of and indegree[i] == 0]
+    for u in order:  # `order` grows while we walk it
+        for v in succs[u]:
+            indegree[v] -= 1
+            if indegree[v] == 0:
+                order.append(v)
+    if len(order) != n - len(agent_of):
+        raise ValueError(f"Workflow '{wf.name}' has a cycle in its main connections; cannot partition")
+
+    # Partition table: parent, entry node, kind
+    parent: List[Optional[int]] = [None]
+    entry: List[Optional[int]] = [None]
+    kind: List[str] = ["root"]
+    owner = [0] * n
+
+    # 1. Switch branches
+    for v in order:
+        ps = preds[v]
+        if len(ps) == 1 and owner[ps[0]] == 0 and nodes[ps[0]].type in split_types:
+            parent.append(0)
+            entry.append(v)
+            kind.append("branch")
+            owner[v] = len(parent) - 1
+        elif ps:
+            first = owner[ps[0]]
+            owner[v] = first if all(owner[u] == first for u in ps) else 0
+
+    # Keep only branches that are big enough and have a single exit that is their only sink
+    members: Dict[int, List[int]] = {}
+    for v in order:
+        if owner[v]:
+            members.setdefault(owner[v], []).append(v)
+    exit_targets: Dict[int, List[int]] = {}
+    for c, part_nodes in members.items():
+        exits = set()
+        targets = []
+        sinks = 0
+        for u in part_nodes:
+            inside = [v for v in succs[u] if owner[v] == c]
+            outside = [v for v in succs[u] if owner[v] != c]
+            if outside:
+                exits.add(u)
+                targets.extend(outside)
+            if not inside:
+                sinks += 1
+        valid = sum(weight[u] for u in part_nodes) >= min_branch_nodes and len(exits) <= 1
+        if valid and exits:
+            valid = sinks == 1 and not any(owner[v] == c for v in succs[next(iter(exits))])
+        if valid:
+            exit_targets[c] = targets
+        else:
+            for u in part_nodes:
+                owner[u] = 0
+            kind[c] = None  # Dissolved
+
+    # 2. Budget cuts along each region's topological order
+    regions: Dict[int, List[int]] = {}
+    for v in order:
+        regions.setdefault(owner[v], []).append(v)
+
+    for region_id in [0] + [c for c in range(1, len(kind)) if kind[c] == "branch"]:
+        region = regions.get(region_id, [])
+        if sum(weight[v] for v in region) <= max_nodes and (not max_bytes or sum(size[v] for v in region) <= max_bytes):
+            continue
+
+        # Out-edges inside the region, with each child branch contracted into its feeding node
+        children_by_feeder: Dict[int, List[int]] = {}
+        for c, targets in exit_targets.items():
+            if kind[c] == "branch" and parent[c] == region_id:
+                children_by_feeder.setdefault(preds[entry[c]][0], []).extend(targets)
+        in_region_preds: Dict[int, int] = {v: 0 for v in region}
+        region_succs: Dict[int, List[int]] = {}
+        for u in region:
+            out = [v for v in succs[u] if v in in_region_preds] + children_by_feeder.get(u, [])
+            region_succs[u] = out
+            for v in out:
+                in_region_preds[v] += 1
+
+        # Tails may not contain a node entered from outside (triggers, the region entry)
+        starts_after = [False] * (len(region) + 1)
+        for idx in range(len(region) - 1, -1, -1):
+            starts_after[idx] = starts_after[idx + 1] or in_region_preds[region[idx]] == 0
+
+        cuts: List[int] = []
+        seg_weight = seg_size = 0
+        open_edges = 0
+        last_clean = None
+        for idx, v in enumerate(region):
+            if (seg_weight + weight[v] > max_nodes or (max_bytes and seg_size + size[v] > max_bytes)) \
+                    and last_clean is not None:
+                cuts.append(last_clean)
+                seg_weight = sum(weight[w] for w in region[last_clean:idx])
+                seg_size = sum(size[w] for w in region[last_clean:idx])
+                last_clean = None
+            seg_weight += weight[v]
+            seg_size += size[v]
+            open_edges += len(region_succs[v]) - in_region_preds[v]
+            nxt = idx + 1
+            if nxt < len(region) and open_edges == 1 and in_region_preds[region[nxt]] == 1 \
+                    and not starts_after[nxt] and (not cuts or nxt > cuts[-1]):
+                last_clean = nxt
+
+        segment_id = region_id
+        bounds = cuts + [len(region)]
+        for k, start in enumerate(cuts):
+            parent.append(segment_id)
+            entry.append(region[start])
+            kind.append("segment")
+            segment_id = len(parent) - 1
+            for v in region[start:bounds[k + 1]]:
+                owner[v] = segment_id
+
+    # Children hang off whichever segment now holds their feeding node
+    for c in range(1, len(kind)):
+        if kind[c] == "branch":
+            parent[c] = owner[preds[entry[c]][0]]
+    for sub in agent_of:
+        agent = agent_of[sub]
+        while agent in agent_of:
+            agent = agent_of[agent]
+        owner[sub] = owner[agent]
+
+    # 3. Emit workflows
+    live = [p for p in range(len(kind)) if kind[p]]
+    seed = wf.id_seed if wf.deterministic_ids else None
+    names: Dict[int, str] = {0: wf.name}
+    parts: Dict[int, N8NWorkflow] = {}
+    for p in live:
+        if p:
+            names[p] = f"{wf.name} / {nodes[entry[p]].name}"
+        parts[p] = N8NWorkflow(names[p], auto_layout=True)
+
+    clones: Dict[Tuple[int, int], N8NNode] = {}
+    triggers: Dict[int, N8NNode] = {}
+    for p in live:
+        if p:
+            triggers[p] = _helper_node(parts[p], "Execute Workflow Trigger", EXECUTE_TRIGGER_TYPE, {}, seed)
+    for i, node in enumerate(nodes):
+        clones[(owner[i], i)] = parts[owner[i]].add_node(_clone_node(node))
+
+    executors: Dict[int, N8NNode] = {}
+    for p in live:
+        if p:
+            parent_part = parts[parent[p]]
+            exec_name = f"Run {nodes[entry[p]].name}"
+            if parent_part.get_node(exec_name) is not None:
+                exec_name += " (sub-workflow)"
+            executors[p] = _helper_node(parent_part, exec_name, EXECUTE_WORKFLOW_TYPE,
+                                        {"source": "database", "workflowId": "", "options": {}}, seed)
+            manifest["links"].append({"workflow": names[parent[p]], "node": exec_name, "child": names[p]})
+
+    depth = {0: 0}
+    for p in live:
+        if p:
+            chain, q = [], p
+            while q not in depth:
+                chain.append(q)
+                q = parent[q]
+            for q2 in reversed(chain):
+                depth[q2] = depth[parent[q2]] + 1
+
+    def lift(p: int, target_depth: int) -> Tuple[int, Optional[int]]:
+        """Walk p up to target_depth; also return the child of that ancestor on the way."""
+        child = None
+        while depth[p] > target_depth:
+            child, p = p, parent[p]
+        return p, child
+
+    def clone_in(p: int, i: int) -> N8NNode:
+        key = (p, i)
+        if key not in clones:
+            clones[key] = parts[p].add_node(_clone_node(nodes[i]))
+        return clones[key]
+
+    seen_cross = set()
+    for src in wf._source_order:
+        for conn_type in wf._source_types[src]:
+            for output_index, output in enumerate(wf._adjacency[conn_type][src]):
+                for dst in output:
+                    a, b = owner[src], owner[dst]
+                    if a == b:
+                        parts[a].connect(clones[(a, src)], clones[(a, dst)], conn_type, output_index)
+                        continue
+                    if conn_type != "main":
+                        parts[b].connect(clone_in(b, src), clones[(b, dst)], conn_type, output_index)
+                        continue
+
+                    # Realize the edge in the lowest common ancestor partition
+                    a2, b2 = a, b
+                    a_child = b_child = None
+                    if depth[a2] > depth[b2]:
+                        a2, a_child = lift(a2, depth[b2])
+                    elif depth[b2] > depth[a2]:
+                        b2, b_child = lift(b2, depth[a2])
+                    while a2 != b2:
+                        a_child, a2 = a2, parent[a2]
+                        b_child, b2 = b2, parent[b2]
+                    if b_child is not None and (b_child != b or entry[b] != dst):
+                        raise ValueError(f"Cannot route '{nodes[src].name}' -> '{nodes[dst].name}' across partitions")
+                    source = clones[(a2, src)] if a_child is None else executors[a_child]
+                    target = clones[(a2, dst)] if b_child is None else executors[b_child]
+                    index = output_index if a_child is None else 0
+                    key = (id(source), id(target), index)
+                    if key not in seen_cross:
+                        seen_cross.add(key)
+                        parts[a2].connect(source, target, "main", index)
+
+    for p in live:
+        if p:
+            parts[p].connect(triggers[p], clones[(p, entry[p])])
+
+    # Set after cloning so add_node keeps the source node ids; versionIds still derive from content
+    for part in parts.values():
+        part.deterministic_ids, part.id_seed = wf.deterministic_ids, wf.id_seed
+
+    ordered = sorted(live, key=lambda p: (depth[p], p))
+    manifest["partition_count"] = len(live)
+    manifest["deploy_order"] = [names[p] for p in sorted(live, key=lambda p: (-depth[p], p))]
+    manifest["workflows"] = [{
+        "name": names[p],
+        "parent": names[parent[p]] if p else None,
+        "kind": kind[p],
+        "entry_node": nodes[entry[p]].name if p else None,
+        "node_count": len(parts[p].nodes)
+    } for p in ordered]
+
+    return [parts[p] for p in ordered], manifest
+
+
+def partition_workflow(wf: N8NWorkflow, max_nodes: int = DEFAULT_MAX_NODES, max_bytes: Optional[int] = None,
+                       split_types: Tuple[str, ...] = SPLIT_TYPES,
+                       min_branch_nodes: int = 3) -> Tuple[List[N8NWorkflow], Dict[str, Any]]:
+    """
+    Partition `wf` into a root workflow plus child workflows.
+
+    Children still over budget are partitioned again (nested Switch trees),
+    so each node is visited once per nesting level.
+
+    Args:
+        wf (N8NWorkflow): Source workflow ('main' connections must be acyclic)
+        max_nodes (int): Node budget per workflow (AI sub-nodes count with their
+            agent; the added trigger / Execute Workflow nodes do not count)
+        max_bytes (int): Optional serialized-size budget per workflow
+        split_types (tuple): Node types whose branches become children
+        min_branch_nodes (int): Smaller branches stay inline
+
+    Returns:
+        tuple: (workflows with the root first, manifest dict)
+    """
+    parts, manifest = _partition_once(wf, max_nodes, max_bytes, split_types, min_branch_nodes)
+    if len(parts) == 1:
+        return parts, manifest
+
+    entries = {entry["name"]: entry for entry in manifest["workflows"]}
+    links_by_workflow: Dict[str, List[Dict[str, str]]] = {}
+    for link in manifest["links"]:
+        links_by_workflow.setdefault(link["workflow"], []).append(link)
+    final = [parts[0]]
+    queue = parts[1:]
+    for part in queue:  # `queue` grows while we walk it
+        sub_parts, sub_manifest = _partition_once(part, max_nodes, max_bytes, split_types, min_branch_nodes)
+        final.append(sub_parts[0])
+        if len(sub_parts) == 1:
+            continue
+
+        # Execute Workflow nodes of `part` may have moved into one of its new children
+        located = {node.name: sub.name for sub in sub_parts for node in sub.nodes}
+        for link in links_by_workflow.pop(part.name, []):
+            link["workflow"] = located[link["node"]]
+            entries[link["child"]]["parent"] = link["workflow"]
+            links_by_workflow.setdefault(link["workflow"], []).append(link)
+        for link in sub_manifest["links"]:
+            links_by_workflow.setdefault(link["workflow"], []).append(link)
+        manifest["links"].extend(sub_manifest["links"])
+        entries[part.name]["node_count"] = len(sub_parts[0].nodes)
+        for entry in sub_manifest["workflows"][1:]:
+            entries[entry["name"]] = entry
+        queue.extend(sub_parts[1:])
+
+    depth = {}
+
+    def depth_of(name: str) -> int:
+        if name not in depth:
+            parent = entries[name]["parent"]
+            depth[name] = 0 if parent is None else depth_of(parent) + 1
+        return depth[name]
+
+    position = {part.name: i for i, part in enumerate(final)}
+    final.sort(key=lambda part: (depth_of(part.name), position[part.name]))
+    manifest["workflows"] = [entries[part.name] for part in final]
+    manifest["partition_count"] = len(final)
+    manifest["deploy_order"] = [part.name for part in sorted(final, key=lambda part: (-depth_of(part.name),
+                                                                                          position[part.name]))]
+
+    logger.info(f"Partitioned '{wf.name}' ({len(wf.nodes)} nodes) into {len(final)} workflows")
+    return final, manifest
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_') or "workflow"
+
+
+def save_partitions(parts: List[N8NWorkflow], manifest: Dict[str, Any], out_dir: str) -> str:
+    """Write every partition plus partition_manifest.json to out_dir; returns the manifest path."""
+    os.makedirs(out_dir, exist_ok=True)
+    files = {}
+    for part in parts:
+        filename = f"{_slug(part.name)}.json"
+        part.save(os.path.join(out_dir, filename))
+        files[part.name] = filename
+    for entry in manifest["workflows"]:
+        entry["file"] = files[entry["name"]]
+
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def link_partition_ids(workflows: Dict[str, Dict[str, Any]], manifest: Dict[str, Any],
+                       ids: Dict[str, str]) -> int:
+    """
+    Point Execute Workflow nodes at their deployed children.
+
+    Args:
+        workflows (dict): Workflow name -> workflow JSON dict (modified in place)
+        manifest (dict): Manifest from partition_workflow
+        ids (dict): Workflow name -> deployed n8n workflow id
+
+    Returns:
+        int: Number of nodes updated
+    """
+    updated = 0
+    for link in manifest.get("links", []):
+        child_id = ids.get(link["child"])
+        workflow = workflows.get(link["workflow"])
+        if child_id is None or workflow is None:
+            continue
+        for node in workflow.get("nodes", []):
+            if node.get("name") == link["node"] and node.get("type") == EXECUTE_WORKFLOW_TYPE:
+                node.setdefault("parameters", {})["workflowId"] = child_id
+                updated += 1
+    return updated
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Split a large n8n workflow into linked sub-workflows')
+    parser.add_argument('workflow', help='Workflow JSON file')
+    parser.add_argument('--max-nodes', type=int, default=DEFAULT_MAX_NODES, help='Node budget per workflow')
+    parser.add_argument('--max-bytes', type=int, help='Serialized size budget per workflow')
+    parser.add_argument('--min-branch-nodes', type=int, default=3, help='Keep smaller Switch branches inline')
+    parser.add_argument('--out', default=os.path.join('.tmp', 'partitions'), help='Output directory')
+    args = parser.parse_args()
+
+    with open(args.workflow, 'r', encoding='utf-8') as f:
+        wf = N8NWorkflow.from_dict(json.load(f))
+    parts, manifest = partition_workflow(wf, args.max_nodes, args.max_bytes,
+                                         min_branch_nodes=args.min_branch_nodes)
+    manifest_path = save_partitions(parts, manifest, args.out)
+
+    print(f"Split into {manifest['partition_count']} workflows -> {manifest_path}")
+    for entry in manifest["workflows"]:
+        print(f"  - {entry['name']} ({entry['kind']}, {entry['node_count']} nodes)")
+
+
+if __name__ == "__main__":
+    main()
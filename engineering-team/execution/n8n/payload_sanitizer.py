@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Sanitize workflow payloads for the n8n public API.
+The API rejects unknown properties ("request/body must NOT have additional
+properties"), and exported or generated workflows carry plenty of them:
+id, active, tags, versionId, meta, pinData at the top level, UI-only keys on
+nodes, extra settings. sanitize_workflow() strips everything outside the
+schema profile of the target API version in one pass, in place, covering
+the top level, settings, every node, node credentials and connection
+entries, and returns a summary of what it removed (logged as one line
+instead of one line per key).
+
+Profiles (N8N_API_VERSION or the `version` argument):
+    legacy  the node allowlist deploys used before profiles existed
+    1.x     n8n 1.x public API (default)
+
+Usage:
+    python payload_sanitizer.py workflow.json
+    python payload_sanitizer.py workflow.json --version legacy --output clean.json
+"""
+
+import os
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, FrozenSet, NamedTuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class SchemaProfile(NamedTuple):
+    """Properties the API accepts at each level of a workflow payload."""
+    workflow: FrozenSet[str]
+    node: FrozenSet[str]
+    settings: FrozenSet[str]
+    credential: FrozenSet[str]
+    connection: FrozenSet[str]
+
+
+_SETTINGS_1X = frozenset({
+    'saveExecutionProgress', 'saveManualExecutions', 'saveDataErrorExecution', 'saveDataSuccessExecution',
+    'executionTimeout', 'errorWorkflow', 'timezone', 'executionOrder', 'callerPolicy', 'callerIds'
+})
+
+PROFILES: Dict[str, SchemaProfile] = {
+    "legacy": SchemaProfile(
+        workflow=frozenset({'name', 'nodes', 'connections', 'settings', 'staticData'}),
+        node=frozenset({'id', 'name', 'type', 'typeVersion', 'position', 'parameters', 'credentials',
+                        'disabled', 'notes', 'continueOnFail', 'retryOnFail'}),
+        settings=_SETTINGS_1X - {'callerPolicy', 'callerIds'},
+        credential=frozenset({'id', 'name'}),
+        connection=frozenset({'node', 'type', 'index'})
+    ),
+    "1.x": SchemaProfile(
+        workflow=frozenset({'name', 'nodes', 'connections', 'settings', 'staticData'}),
+        node=frozenset({'id', 'name', 'type', 'typeVersion', 'position', 'parameters', 'credentials',
+                        'disabled', 'notes', 'notesInFlow', 'continueOnFail', 'onError', 'retryOnFail',
+                        'maxTries', 'waitBetweenTries', 'alwaysOutputData', 'executeOnce', 'webhookId'}),
+        settings=_SETTINGS_1X,
+        credential=frozenset({'id', 'name'}),
+        connection=frozenset({'node', 'type', 'index'})
+    ),
+}
+DEFAULT_VERSION = "1.x"
+
+
+def get_profile(version: str = None) -> SchemaProfile:
+    """Schema profile for `version` (default: N8N_API_VERSION, else DEFAULT_VERSION)."""
+    version = version or os.getenv("N8N_API_VERSION") or DEFAULT_VERSION
+    if version not in PROFILES:
+        raise ValueError(f"Unknown n8n API profile '{version}' (known: {', '.join(sorted(PROFILES))})")
+    return PROFILES[version]
+
+
+def sanitize_workflow(workflow: Dict[str, Any], version: str = None) -> Dict[str, Any]:
+    """
+    Strip properties the target API does not accept, in place.
+
+    A missing settings object is added as {} (the 1.x API requires one).
+
+    Args:
+        workflow (dict): Workflow payload (modified in place)
+        version (str): Profile name (see PROFILES)
+
+    Returns:
+        dict: Removals - workflow/settings key lists, node key counts and
+        the number of credential and connection properties dropped
+    """
+    profile = get_profile(version)
+    report = {"workflow": [], "settings": [], "nodes": Counter(), "credentials": 0, "connections": 0}
+
+    extra = workflow.keys() - profile.workflow
+    for key in extra:
+        del workflow[key]
+    report["workflow"] = sorted(extra)
+
+    settings = workflow.get('settings')
+    if isinstance(settings, dict):
+        extra = settings.keys() - profile.settings
+        for key in extra:
+            del settings[key]
+        report["settings"] = sorted(extra)
+    elif 'settings' not in workflow:
+        # Required by the 1.x create/update schema
+        workflow['settings'] = {}
+
+    node_keys, credential_keys, removed = profile.node, profile.credential, report["nodes"]
+    for node in workflow.get('nodes') or ():
+        if not node.keys() <= node_keys:
+            extra = node.keys() - node_keys
+            for key in extra:
+                del node[key]
+            removed.update(extra)
+        credentials = node.get('credentials')
+        if credentials:
+            for credential in credentials.values():
+                if isinstance(credential, dict) and not credential.keys() <= credential_keys:
+                    extra = credential.keys() - credential_keys
+                    for key in extra:
+                        del credential[key]
+                    report["credentials"] += len(extra)
+
+    connection_keys = profile.connection
+    for outputs in (workflow.get('connections') or {}).values():
+        for branches in outputs.values() if isinstance(outputs, dict) else ():
+            for branch in branches or ():
+                for entry in branch or ():
+                    if isinstance(entry, dict) and not entry.keys() <= connection_keys:
+                        extra = entry.keys() - connection_keys
+                        for key in extra:
+                            del entry[key]
+                        report["connections"] += len(extra)
+
+    report["nodes"] = dict(removed)
+    return report
+
+
+def describe_removals(report: Dict[str, Any]) -> str:
+    """One-line summary of a sanitize_workflow() report ('' if nothing was removed)."""
+    parts = []
+    if report["workflow"]:
+        parts.append("workflow: " + ", ".join(report["workflow"]))
+    if report["settings"]:
+        parts.append("settings: " + ", ".join(report["settings"]))
+    if report["nodes"]:
+        parts.append("nodes: " + ", ".join(f"{key} x{count}" for key, count in
+                                           sorted(report["nodes"].items(), key=lambda kv: -kv[1])))
+    if report["credentials"]:
+        parts.append(f"credential properties: {report['credentials']}")
+    if report["connections"]:
+        parts.append(f"connection properties: {report['connections']}")
+    return "; ".join(parts)
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Strip properties the n8n API rejects from a workflow')
+    parser.add_argument('workflow', help='Workflow JSON file')
+    parser.add_argument('--version', choices=sorted(PROFILES), help='n8n API profile')
+    parser.add_argument('--output', help='Write the sanitized workflow here')
+    args = parser.parse_args()
+
+    with open(args.workflow, 'r') as f:
+        workflow = json.load(f)
+    report = sanitize_workflow(workflow, args.version)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(workflow, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Compact n8n execution logs into a bounded LLM prompt section.
+Raw executions (with full resultData) can be megabytes; the digest keeps
+what an optimization review needs:
+
+- run counts, status mix and duration percentiles
+- per-node aggregates from runData: runs, errors, total/avg/max time, items out
+- errors deduplicated by (node, normalized message), with counts and example ids
+- a few recent executions in one line each
+
+The rendered digest is held under a token budget using a fast local token
+estimate, trimming the lowest-value rows first, so prompt size is bounded no
+matter how large the executions are.
+
+Usage:
+    python prompt_compactor.py executions.json
+    python prompt_compactor.py executions.json --budget 1500
+"""
+
+import re
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import percentile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 3000
+
+# Words cost ~1 token per 4 characters, every punctuation mark about one token
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+# Volatile parts of error messages that would stop identical errors from deduplicating
+_VOLATILE = [
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE), "<uuid>"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ][\d:.]+Z?\b"), "<time>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{16,}\b", re.IGNORECASE), "<hex>"),
+    (re.compile(r"\d+"), "<n>"),
+]
+# (nodes, distinct errors, recent executions, message chars), tried in order until the digest fits
+_TRIM_LEVELS = [(30, 20, 10, 300), (15, 10, 5, 200), (8, 5, 3, 120), (4, 3, 0, 80), (2, 1, 0, 60)]
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate (no tokenizer dependency); errs on the high side for JSON."""
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PIECES.findall(text))
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _duration(execution):
+    start, stop = _parse_time(execution.get('startedAt')), _parse_time(execution.get('stoppedAt'))
+    return (stop - start).total_seconds() if start and stop else None
+
+
+def _status(execution):
+    if execution.get('status'):
+        return execution['status']
+    if execution.get('data', {}).get('resultData', {}).get('error'):
+        return "error"
+    return "success" if execution.get('finished') else "unknown"
+
+
+def error_message(error) -> str:
+    """Readable one-line message from an n8n error object (or plain string)."""
+    if isinstance(error, dict):
+        message = error.get('message') or error.get('description') or error.get('name') or json.dumps(error)[:200]
+    else:
+        message = str(error)
+    return " ".join(str(message).split())
+
+
+def error_signature(node: str, message: str) -> str:
+    """Dedupe key: node plus the message with ids, timestamps and numbers masked."""
+    for pattern, placeholder in _VOLATILE:
+        message = pattern.sub(placeholder, message)
+    return f"{node}\x00{message}"
+
+
+def summarize_executions(executions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate executions into run, per-node and deduplicated error summaries.
+
+    Args:
+        executions (list): n8n execution objects (with or without data.resultData)
+
+    Returns:
+        dict: Untrimmed digest (see render_digest for the budgeted form)
+    """
+    statuses: Dict[str, int] = {}
+    durations = []
+    nodes: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, Dict[str, Any]] = {}
+    recent = []
+
+    def add_error(node, error, execution):
+        message = error_message(error)
+        key = error_signature(node, message)
+        entry = errors.get(key)
+        if entry is None:
+            entry = errors[key] = {"node": node, "message": message, "count": 0, "execution_ids": []}
+        entry["count"] += 1
+        if execution.get('id') is not None and len(entry["execution_ids"]) < 3 \
+                and execution['id'] not in entry["execution_ids"]:
+            entry["execution_ids"].append(execution['id'])
+
+    for execution in executions:
+        status = _status(execution)
+        statuses[status] = statuses.get(status, 0) + 1
+        duration = _duration(execution)
+        if duration is not None:
+            durations.append(duration)
+
+        result_data = (execution.get('data') or {}).get('resultData') or {}
+        for node_name, runs in (result_data.get('runData') or {}).items():
+            stats = nodes.get(node_name)
+            if stats is None:
+                stats = nodes[node_name] = {"runs": 0, "errors": 0, "total_ms": 0, "max_ms": 0, "items_out": 0}
+            for run in runs or []:
+                elapsed = run.get('executionTime') or 0
+                stats["runs"] += 1
+                stats["total_ms"] += elapsed
+                stats["max_ms"] = max(stats["max_ms"], elapsed)
+                outputs = ((run.get('data') or {}).get('main') or [])
+                stats["items_out"] += sum(len(output or []) for output in outputs)
+                if run.get('error'):
+                    stats["errors"] += 1
+                    add_error(node_name, run['error'], execution)
+
+        top_error = result_data.get('error')
+        if top_error:
+            failed_node = (top_error.get('node') or {}).get('name') if isinstance(top_error, dict) else None
+            failed_node = failed_node or result_data.get('lastNodeExecuted') or "workflow"
+            # Usually the same error a node run already reported
+            if not (failed_node in nodes and nodes[failed_node]["errors"]):
+                add_error(failed_node, top_error, execution)
+
+        recent.append({
+            "id": execution.get('id'),
+            "status": status,
+            "started": execution.get('startedAt'),
+            "seconds": round(duration, 2) if duration is not None else None,
+            "last_node": result_data.get('lastNodeExecuted'),
+            "error": error_message(top_error) if top_error else None
+        })
+
+    for stats in nodes.values():
+        stats["avg_ms"] = round(stats["total_ms"] / stats["runs"], 1) if stats["runs"] else 0
+    durations.sort()
+    recent.sort(key=lambda r: r["started"] or "", reverse=True)
+    return {
+        "executions": len(executions),
+        "statuses": statuses,
+        "duration_seconds": {
+            "p50": round(percentile(durations, 50), 2) if durations else None,
+            "p95": round(percentile(durations, 95), 2) if durations else None,
+            "max": round(durations[-1], 2) if durations else None
+        },
+        # Slowest nodes first, then most errors
+        "nodes": sorted(({"node": name, **stats} for name, stats in nodes.items()),
+                        key=lambda n: (-n["total_ms"], -n["errors"])),
+        "errors": sorted(errors.values(), key=lambda e: -e["count"]),
+        "recent": recent
+    }
+
+
+def _trim(digest, max_nodes, max_errors, max_recent, max_chars):
+    def clip(text):
+        return text if text is None or len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+    nodes, errors = digest["nodes"], digest["errors"]
+    trimmed = {
+        "executions": digest["executions"],
+        "statuses": digest["statuses"],
+        "duration_seconds": digest["duration_seconds"],
+        "nodes": nodes[:max_nodes],
+        "errors": [dict(e, message=clip(e["message"])) for e in errors[:max_errors]],
+        "recent": [dict(r, error=clip(r["error"])) for r in digest["recent"][:max_recent]]
+    }
+    omitted = {}
+    if len(nodes) > max_nodes:
+        omitted["nodes"] = len(nodes) - max_nodes
+    if len(errors) > max_errors:
+        omitted["distinct_errors"] = len(errors) - max_errors
+        omitted["error_occurrences"] = sum(e["count"] for e in errors[max_errors:])
+    if omitted:
+        trimmed["omitted"] = omitted
+    return trimmed
+
+
+def render_digest(digest: Dict[str, Any], token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """
+    Render a digest as compact JSON within `token_budget` estimated tokens.
+
+    Lists are cut to their most important rows (slowest nodes, most frequent
+    errors, newest runs) and long messages clipped, level by level, until the
+    text fits; the result is hard-truncated as a last resort.
+    """
+    text = ""
+    for level in _TRIM_LEVELS:
+        text = json.dumps(_trim(digest, *level), separators=(",", ":"), default=str)
+        if estimate_tokens(text) <= token_budget:
+            return text
+    # Budget smaller than even the minimal digest: keep a prefix that fits
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def compact_executions(executions: List[Dict[str, Any]], token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """Summarize and render executions for a prompt, bounded by token_budget."""
+    text = render_digest(summarize_executions(executions), token_budget)
+    logger.info(f"Compacted {len(executions)} executions to ~{estimate_tokens(text)} tokens (budget {token_budget})")
+    return text
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compact n8n executions into a bounded prompt digest')
+    parser.add_argument('executions', help='JSON file: a list of executions or an API response with "data"')
+    parser.add_argument('--budget', type=int, default=DEFAULT_TOKEN_BUDGET, help='Token budget')
+    args = parser.parse_args()
+
+    with open(args.executions, 'r') as f:
+        data = json.load(f)
+    executions = data.get('data', []) if isinstance(data, dict) else data
+    raw_tokens = estimate_tokens(json.dumps(executions, indent=2))
+    text = compact_executions(executions, args.budget)
+    print(text)
+    print(f"\n~{raw_tokens} tokens raw -> ~{estimate_tokens(text)} tokens compacted")
+
+
+if __name__ == "__main__":
+    main()
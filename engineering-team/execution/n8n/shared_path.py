@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Locate shared-resources/execution (pooled HTTP client, rate limiter) for
+the engineering-team scripts, which are run directly rather than installed.
+
+Usage:
+    from shared_path import add_shared_resources_path
+    add_shared_resources_path()
+    from http_client import get_client
+"""
+
+import os
+import sys
+
+SHARED_EXECUTION_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..',
+                                                    'shared-resources', 'execution'))
+
+
+def add_shared_resources_path() -> str:
+    """Put shared-resources/execution first on sys.path (once) and return it."""
+    if SHARED_EXECUTION_DIR not in sys.path:
+        sys.path.insert(0, SHARED_EXECUTION_DIR)
+    return SHARED_EXECUTION_DIR
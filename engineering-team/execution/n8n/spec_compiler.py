@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Declarative workflow spec compiler (YAML/JSON DSL -> N8NWorkflow).
+
+A spec describes a workflow as a list of steps instead of hand-written
+create_node/connect calls:
+
+    name: "Employee Onboarding - <% client %>"
+    vars:
+      client: Acme
+      departments: [{key: eng, label: Engineering}, {key: sales, label: Sales}]
+    subgraphs:
+      notify:
+        params: [channel]
+        steps:
+          - node: slack
+            name: "Slack <% channel %>"
+            type: n8n-nodes-base.slack
+            parameters: {channel: "<% channel %>"}
+    steps:
+      - node: trigger
+        name: Manual Trigger
+        type: n8n-nodes-base.manualTrigger
+      - for: dept
+        in: "<% departments %>"
+        index: i
+        steps:
+          - use: notify
+            as: "notify_<% dept.key %>"
+            with: {channel: "<% dept.label %>"}
+          - connect: [trigger, "notify_<% dept.key %>.slack"]
+            output: "<% i %>"
+
+Placeholders use `<% path %>` (dotted, list indexes allowed) so they never
+clash with n8n `{{ }}` expressions or JS `${}` templates. A string that is a
+single placeholder keeps the value's type (lists, numbers, dicts).
+
+Step kinds: `node`, `connect` (+ `type`, `output`), `chain` (list of refs
+joined with main connections), `for`/`in`/`steps` (+ optional `index`),
+`use`/`as`/`with` (sub-graph instance, its refs become `<as>.<ref>`) and
+`set` (dict of variables).
+
+Specs are compiled once into a flat instruction list with pre-parsed
+templates and cached by content hash, so instantiating the same template
+for hundreds of clients only evaluates placeholders and creates nodes.
+
+Usage:
+    python spec_compiler.py specs/employee_onboarding.yaml --var client=Acme
+    python spec_compiler.py spec.json --vars clients.json --out .tmp/workflow.json
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+from collections import ChainMap, OrderedDict
+from typing import Any, Callable, Dict, List
+
+try:
+    import yaml  # Optional: only needed for .yaml/.yml specs
+except ImportError:
+    yaml = None
+
+try:
+    from execution.n8n_builder import N8NWorkflow
+except ImportError:
+    from n8n_builder import N8NWorkflow
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r"<%\s*([A-Za-z_][\w.\-]*)\s*%>")
+PLAN_CACHE_SIZE = 128
+
+# Instruction opcodes
+OP_NODE, OP_CONNECT, OP_FOR, OP_NEXT, OP_SCOPE, OP_END_SCOPE, OP_SET = range(7)
+
+
+class SpecError(ValueError):
+    """Raised for malformed specs or failed placeholder lookups."""
+
+
+# --- Templates ---
+
+def _lookup(scope, path: tuple, raw: str):
+    """Resolve a dotted placeholder path against the variable scope."""
+    try:
+        value = scope[path[0]]
+        for part in path[1:]:
+            value = value[int(part)] if isinstance(value, list) else value[part]
+        return value
+    except (KeyError, IndexError, ValueError, TypeError):
+        raise SpecError(f"Unknown variable '<% {raw} %>'")
+
+
+def _copy_json(value: Any) -> Any:
+    """Copy a JSON-like value (cheaper than copy.deepcopy)."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _has_placeholder(value: Any) -> bool:
+    if isinstance(value, str):
+        return "<%" in value
+    if isinstance(value, dict):
+        return any(_has_placeholder(k) or _has_placeholder(v) for k, v in value.items())
+    if isinstance(value, list):
+        return any(_has_placeholder(v) for v in value)
+    return False
+
+
+def compile_template(value: Any) -> Callable:
+    """
+    Pre-parse a JSON-like value into a function of the variable scope.
+
+    Constant subtrees are copied on evaluation (nodes own their parameters),
+    everything else only evaluates the placeholders it contains.
+    """
+    if not _has_placeholder(value):
+        if isinstance(value, (dict, list)):
+            return lambda scope: _copy_json(value)
+        return lambda scope: value
+
+    if isinstance(value, dict):
+        items = [(compile_template(k), compile_template(v)) for k, v in value.items()]
+        return lambda scope: {k(scope): v(scope) for k, v in items}
+    if isinstance(value, list):
+        items = [compile_template(v) for v in value]
+        return lambda scope: [v(scope) for v in items]
+
+    # String with placeholders
+    whole = PLACEHOLDER.fullmatch(value)
+    if whole:
+        raw = whole.group(1)
+        path = tuple(raw.split("."))
+        return lambda scope: _lookup(scope, path, raw)
+
+    parts = []
+    pos = 0
+    for match in PLACEHOLDER.finditer(value):
+        if match.start() > pos:
+            parts.append(value[pos:match.start()])
+        raw = match.group(1)
+        parts.append((tuple(raw.split(".")), raw))
+        pos = match.end()
+    if pos < len(value):
+        parts.append(value[pos:])
+
+    def render(scope):
+        return "".join(p if isinstance(p, str) else str(_lookup(scope, p[0], p[1])) for p in parts)
+    return render
+
+
+# --- Compilation ---
+
+class CompiledSpec:
+    """A spec lowered to a flat instruction list; instantiate() runs it."""
+
+    def __init__(self, name: Callable, defaults: Dict[str, Any], options: Dict[str, Any], code: List[tuple]):
+        self.name = name
+        self.defaults = defaults
+        self.options = options
+        self.code = code
+
+    def instantiate(self, variables: Dict[str, Any] = None, **workflow_options) -> N8NWorkflow:
+        """
+        Build a workflow from the compiled plan.
+
+        Args:
+            variables (dict): Overrides for the spec's `vars`
+            **workflow_options: Overrides for N8NWorkflow options
+                (auto_layout, deterministic_ids, id_seed)
+        """
+        scope = ChainMap(dict(variables or {}), self.defaults)
+        options = dict(self.options, **workflow_options)
+        wf = N8NWorkflow(str(self.name(scope)), **options)
+
+        refs: Dict[str, Any] = {}
+        prefixes: List[str] = [""]
+        loops: List[list] = []
+        code = self.code
+        pc = 0
+        while pc < len(code):
+            op = code[pc]
+            kind = op[0]
+
+            if kind == OP_NODE:
+                _, ref_t, name_t, type_t, params_t, type_version = op
+                ref = prefixes[-1] + str(ref_t(scope))
+                if ref in refs:
+                    raise SpecError(f"Duplicate node ref '{ref}'")
+                node = wf.create_node(str(name_t(scope)), str(type_t(scope)), params_t(scope))
+                if type_version is not None:
+                    node.type_version = type_version
+                refs[ref] = node
+
+            elif kind == OP_CONNECT:
+                _, src_t, dst_t, conn_type, output_t = op
+                wf.connect(self._resolve(refs, prefixes, src_t(scope)),
+                           self._resolve(refs, prefixes, dst_t(scope)),
+                           conn_type, int(output_t(scope)))
+
+            elif kind == OP_FOR:
+                _, var, index_var, iter_t, end_pc = op
+                items = iter_t(scope)
+                if not isinstance(items, list):
+                    raise SpecError(f"'for {var}' needs a list, got {type(items).__name__}")
+                if not items:
+                    pc = end_pc + 1
+                    continue
+                frame = {var: items[0]}
+                if index_var:
+                    frame[index_var] = 0
+                scope = scope.new_child(frame)
+                loops.append([items, 0, pc + 1])
+
+            elif kind == OP_NEXT:
+                items, i, body = loops[-1]
+                i += 1
+                if i < len(items):
+                    loops[-1][1] = i
+                    _, var, index_var, _, _ = code[body - 1]
+                    scope.maps[0][var] = items[i]
+                    if index_var:
+                        scope.maps[0][index_var] = i
+                    pc = body
+                    continue
+                loops.pop()
+                scope = scope.parents
+
+            elif kind == OP_SCOPE:
+                _, prefix_t, bindings = op
+                frame = {name: t(scope) for name, t in bindings.items()}
+                prefixes.append(prefixes[-1] + str(prefix_t(scope)) + ".")
+                scope = scope.new_child(frame)
+
+            elif kind == OP_END_SCOPE:
+                prefixes.pop()
+                scope = scope.parents
+
+            elif kind == OP_SET:
+                _, assignments = op
+                for name, t in assignments.items():
+                    scope.maps[0][name] = t(scope)
+
+            pc += 1
+
+        return wf
+
+    @staticmethod
+    def _resolve(refs: Dict[str, Any], prefixes: List[str], ref: Any):
+        """Look a ref up relative to the current sub-graph first, then globally."""
+        ref = str(ref)
+        node = refs.get(prefixes[-1] + ref)
+        if node is None:
+            node = refs.get(ref)
+        if node is None:
+            raise SpecError(f"Unknown node ref '{ref}'")
+        return node
+
+
+def _compile_steps(steps: List[Dict[str, Any]], subgraphs: Dict[str, Any], code: List[tuple],
+                   where: str, expanding: tuple = ()):
+    """Append the instructions for `steps` to `code`."""
+    if not isinstance(steps, list):
+        raise SpecError(f"{where}: 'steps' must be a list")
+
+    for i, step in enumerate(steps):
+        at = f"{where}[{i}]"
+        if not isinstance(step, dict):
+            raise SpecError(f"{at}: step must be a mapping")
+
+        if "node" in step:
+            if "type" not in step:
+                raise SpecError(f"{at}: node '{step['node']}' has no 'type'")
+            code.append((OP_NODE,
+                         compile_template(step["node"]),
+                         compile_template(step.get("name", step["node"])),
+                         compile_template(step["type"]),
+                         compile_template(step.get("parameters", {})),
+                         step.get("type_version")))
+
+        elif "connect" in step:
+            pair = step["connect"]
+            if not isinstance(pair, list) or len(pair) != 2:
+                raise SpecError(f"{at}: 'connect' must be [source, target]")
+            code.append((OP_CONNECT, compile_template(pair[0]), compile_template(pair[1]),
+                         step.get("type", "main"), compile_template(step.get("output", 0))))
+
+        elif "chain" in step:
+            chain = step["chain"]
+            for src, dst in zip(chain, chain[1:]):
+                code.append((OP_CONNECT, compile_template(src), compile_template(dst),
+                             "main", compile_template(0)))
+
+        elif "for" in step:
+            if "in" not in step:
+                raise SpecError(f"{at}: 'for' needs 'in'")
+            start = len(code)
+            code.append(None)  # Patched with the loop end below
+            _compile_steps(step.get("steps", []), subgraphs, code, f"{at}.steps", expanding)
+            code.append((OP_NEXT,))
+            code[start] = (OP_FOR, step["for"], step.get("index"), compile_template(step["in"]), len(code) - 1)
+
+        elif "use" in step:
+            name = step["use"]
+            subgraph = subgraphs.get(name)
+            if subgraph is None:
+                raise SpecError(f"{at}: unknown sub-graph '{name}'")
+            if name in expanding:
+                raise SpecError(f"{at}: sub-graph '{name}' uses itself")
+            bindings = step.get("with", {})
+            missing = [p for p in subgraph.get("params", []) if p not in bindings]
+            if missing:
+                raise SpecError(f"{at}: sub-graph '{name}' is missing params {missing}")
+            code.append((OP_SCOPE, compile_template(step.get("as", name)),
+                         {k: compile_template(v) for k, v in bindings.items()}))
+            # Sub-graphs are inlined, so their steps are compiled once per use site
+            _compile_steps(subgraph.get("steps", []), subgraphs, code, f"subgraphs.{name}.steps",
+                           expanding + (name,))
+            code.append((OP_END_SCOPE,))
+
+        elif "set" in step:
+            code.append((OP_SET, {k: compile_template(v) for k, v in step["set"].items()}))
+
+        else:
+            raise SpecError(f"{at}: unknown step {sorted(step)}")
+
+
+_PLAN_CACHE: "OrderedDict[str, CompiledSpec]" = OrderedDict()
+_FILE_CACHE: Dict[str, tuple] = {}
+
+
+def spec_hash(spec: Dict[str, Any]) -> str:
+    """Stable content hash of a parsed spec."""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def compile_spec(spec: Dict[str, Any]) -> CompiledSpec:
+    """Compile a parsed spec, reusing the cached plan for identical content."""
+    key = spec_hash(spec)
+    plan = _PLAN_CACHE.get(key)
+    if plan is not None:
+        _PLAN_CACHE.move_to_end(key)
+        return plan
+
+    if "name" not in spec:
+        raise SpecError("Spec needs a 'name'")
+    code: List[tuple] = []
+    _compile_steps(spec.get("steps", []), spec.get("subgraphs", {}), code, "steps")
+    options = {"auto_layout": True, "deterministic_ids": True}
+    options.update(spec.get("options", {}))
+    plan = CompiledSpec(compile_template(spec["name"]), dict(spec.get("vars", {})), options, code)
+
+    _PLAN_CACHE[key] = plan
+    if len(_PLAN_CACHE) > PLAN_CACHE_SIZE:
+        _PLAN_CACHE.popitem(last=False)
+    return plan
+
+
+def load_spec(path: str) -> CompiledSpec:
+    """Load and compile a YAML or JSON spec file, cached until the file changes."""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    cached = _FILE_CACHE.get(key)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise SpecError("PyYAML is required for YAML specs (pip install pyyaml)")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise SpecError(f"{path}: spec must be a mapping")
+
+    plan = compile_spec(spec)
+    _FILE_CACHE[key] = ((stat.st_mtime_ns, stat.st_size), plan)
+    return plan
+
+
+def build_from_spec(spec, variables: Dict[str, Any] = None, **workflow_options) -> N8NWorkflow:
+    """Build an N8NWorkflow from a spec dict or a spec file path."""
+    plan = load_spec(spec) if isinstance(spec, str) else compile_spec(spec)
+    return plan.instantiate(variables, **workflow_options)
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compile a workflow spec into n8n workflow JSON')
+    parser.add_argument('spec', help='Spec file (.yaml, .yml or .json)')
+    parser.add_argument('--var', action='append', default=[], help='Variable override as key=value')
+    parser.add_argument('--vars', help='JSON file with variable overrides')
+    parser.add_argument('--out', default=os.path.join('.tmp', 'workflow.json'), help='Output path')
+    args = parser.parse_args()
+
+    variables = {}
+    if args.vars:
+        with open(args.vars, 'r', encoding='utf-8') as f:
+            variables.update(json.load(f))
+    for item in args.var:
+        key, _, value = item.partition("=")
+        variables[key] = value
+
+    wf = build_from_spec(args.spec, variables)
+    for issue in wf.validate(strict=True):
+        logger.warning(f"Workflow check [{issue.code}]: {issue.message}")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    wf.save(args.out)
+    logger.info(f"Compiled {args.spec} -> {args.out} ({len(wf.nodes)} nodes)")
+
+
+if __name__ == "__main__":
+    main()
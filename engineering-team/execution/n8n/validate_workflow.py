@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Validate generated n8n workflow JSON files.
+Runs the n8n_builder structural check (dangling edges, duplicate names,
+cycles, unreachable nodes, AI connection types) on one or more files.
+
+Usage:
+    python validate_workflow.py .tmp/workflow.json
+    python validate_workflow.py otwl_rate_management_workflow.json --verbose
+    python validate_workflow.py a.json b.json --json
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from n8n_builder import validate_workflow_dict
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def validate_file(workflow_path):
+    """
+    Load and validate one workflow file.
+
+    Returns:
+        tuple: (workflow dict, list of ValidationIssue)
+    """
+    with open(workflow_path, 'r', encoding='utf-8') as f:
+        workflow = json.load(f)
+    return workflow, validate_workflow_dict(workflow)
+
+
+def print_report(workflow_path, workflow, issues, verbose=False):
+    """Print a human-readable summary for one workflow."""
+    print(f"\n{workflow_path}")
+    print(f"  {len(workflow.get('nodes', []))} nodes, "
+          f"{len(workflow.get('connections', {}))} connection groups")
+
+    if verbose:
+        print("  Nodes:")
+        for node in workflow.get('nodes', []):
+            print(f"    - {node.get('name')} ({node.get('type')})")
+        print("  Connections:")
+        for source, targets in workflow.get('connections', {}).items():
+            print(f"    - {source}: {list(targets.keys())}")
+
+    if not issues:
+        print("  ✓ No structural issues")
+    for issue in issues:
+        marker = "✗" if issue.severity == "error" else "⚠"
+        print(f"  {marker} [{issue.code}] {issue.message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate n8n workflow JSON structure')
+    parser.add_argument('workflows', nargs='+', help='Workflow JSON file(s)')
+    parser.add_argument('--verbose', action='store_true', help='List nodes and connection groups')
+    parser.add_argument('--json', action='store_true', help='Print issues as JSON')
+    args = parser.parse_args()
+
+    has_errors = False
+    report = {}
+    for path in args.workflows:
+        try:
+            workflow, issues = validate_file(path)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not load {path}: {e}")
+            has_errors = True
+            continue
+
+        has_errors = has_errors or any(i.severity == "error" for i in issues)
+        if args.json:
+            report[path] = [i.to_dict() for i in issues]
+        else:
+            print_report(path, workflow, issues, args.verbose)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+    return 1 if has_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
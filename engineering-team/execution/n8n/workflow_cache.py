@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Content-addressed build cache for generated n8n workflows.
+Serialized workflow.json files are stored under .tmp/cache/ keyed by a
+stable hash of the requirements dict plus the builder version, with LRU
+eviction (a hit bumps the file mtime) once a size or entry cap is exceeded.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(".tmp", "cache")
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 500
+
+
+def requirements_key(requirements: Dict[str, Any], builder_version: str) -> str:
+    """Stable sha256 of the requirements dict (key order independent) and builder version."""
+    canonical = json.dumps(requirements, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{builder_version}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class WorkflowBuildCache:
+    """Directory of `<key>.json` workflow files with LRU size-bounded eviction."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached file path for `key` and mark it recently used, or None."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        os.utime(path, None)  # Bump recency for LRU
+        self.hits += 1
+        return path
+
+    def put(self, key: str, workflow_path: str) -> str:
+        """Copy a freshly written workflow file into the cache, then evict if over budget."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(workflow_path, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict(keep=key)
+        return self._path(key)
+
+    def evict(self, keep: str = None) -> int:
+        """Remove least recently used entries until under max_bytes and max_entries."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json") and entry.name != f"{keep}.json":
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        # The entry just written still counts towards the budget
+        kept_size = os.path.getsize(self._path(keep)) if keep and os.path.exists(self._path(keep)) else 0
+        total = kept_size + sum(size for _, size, _ in entries)
+        count = len(entries) + (1 if kept_size else 0)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes and count <= self.max_entries:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Evicted by another process
+            total -= size
+            count -= 1
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} cached workflow(s) from {self.cache_dir}")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
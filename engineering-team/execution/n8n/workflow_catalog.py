@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Local catalog of the workflows on an n8n instance.
+Deploys used to list GET /api/v1/workflows (first page only) and scan it for
+the target name on every run. The catalog follows the cursor pagination once,
+keeps name -> id -> versionId/updatedAt in a SQLite index under .tmp/cache/,
+and after that resolves a name with one indexed lookup:
+
+- a miss asks the API for that name only (?name=...), not the whole list
+- refresh() walks the pages again but only writes rows whose updatedAt moved
+  past the stored watermark, and stops early when the server returns pages
+  newest-first; refresh(full=True) also drops workflows deleted remotely
+- deploys record the PUT/POST response, so the index follows our own writes,
+  along with the canonical hash of what was sent (see workflow_diff.py); a
+  later change of updatedAt clears that hash
+
+Several instances can share one file; rows are keyed by API URL.
+
+Usage:
+    python workflow_catalog.py sync [--full]
+    python workflow_catalog.py lookup "Workflow Name"
+    python workflow_catalog.py stats
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+from http_client import get_client
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(".tmp", "cache", "workflow_catalog.sqlite")
+PAGE_SIZE = 250  # n8n's maximum page size for the public API
+DEFAULT_MAX_AGE = 15 * 60  # Misses older than this trigger an incremental refresh
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    instance TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version_id TEXT,
+    updated_at TEXT,
+    active INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    PRIMARY KEY (instance, id)
+);
+CREATE INDEX IF NOT EXISTS workflows_name ON workflows (instance, name);
+CREATE TABLE IF NOT EXISTS instances (
+    instance TEXT PRIMARY KEY,
+    watermark TEXT,
+    synced_at REAL NOT NULL
+);
+"""
+# A row's content hash (workflow_diff.py) stays valid only while updatedAt is unchanged
+_UPSERT = """
+INSERT INTO workflows (instance, id, name, version_id, updated_at, active, content_hash)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (instance, id) DO UPDATE SET
+    name = excluded.name,
+    version_id = excluded.version_id,
+    active = excluded.active,
+    content_hash = COALESCE(excluded.content_hash,
+        CASE WHEN workflows.updated_at IS excluded.updated_at THEN workflows.content_hash END),
+    updated_at = excluded.updated_at
+"""
+
+
+def _row(workflow: Dict[str, Any], content_hash: Optional[str] = None) -> tuple:
+    return (str(workflow['id']), workflow.get('name') or "", workflow.get('versionId'),
+            workflow.get('updatedAt'), int(bool(workflow.get('active'))), content_hash)
+
+
+class WorkflowCatalog:
+    """SQLite index of one n8n instance's workflows (name -> id -> versionId)."""
+
+    def __init__(self, api_url: str, api_key: str, db_path: str = DEFAULT_DB_PATH,
+                 max_age: float = DEFAULT_MAX_AGE):
+        self.api_url = api_url.rstrip('/')
+        self.headers = {"X-N8N-API-KEY": api_key, "Content-Type": "application/json"}
+        self.db_path = db_path
+        self.max_age = max_age
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(workflows)")}
+                if "content_hash" not in columns:
+                    conn.execute("ALTER TABLE workflows ADD COLUMN content_hash TEXT")
+                self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _pages(self, params: Dict[str, Any] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield each page of GET /workflows, following nextCursor."""
+        client = get_client()
+        params = dict(params or {}, limit=PAGE_SIZE, excludePinnedData="true")
+        while True:
+            response = client.get(f"{self.api_url}/api/v1/workflows", headers=self.headers,
+                                  params=params, timeout=30)
+            response.raise_for_status()
+            body = response.json()
+            yield body.get('data', [])
+            cursor = body.get('nextCursor')
+            if not cursor:
+                return
+            params['cursor'] = cursor
+
+    def _sync_state(self, conn) -> Optional[tuple]:
+        return conn.execute("SELECT watermark, synced_at FROM instances WHERE instance = ?",
+                            (self.api_url,)).fetchone()
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        """
+        Bring the index up to date with the instance.
+
+        Args:
+            full (bool): Walk every page and drop workflows that no longer exist.
+                The first sync of an instance is always full.
+
+        Returns:
+            dict: pages fetched, rows seen, rows written and rows removed
+        """
+        start = time.perf_counter()
+        with self._connect() as conn:
+            state = self._sync_state(conn)
+        watermark = state[0] if state and not full else None
+        full = full or state is None
+        counts = {"pages": 0, "seen": 0, "written": 0, "removed": 0}
+        seen_ids = set()
+        newest = watermark
+
+        for page in self._pages():
+            counts["pages"] += 1
+            counts["seen"] += len(page)
+            changed = [wf for wf in page if not watermark or (wf.get('updatedAt') or "") > watermark]
+            seen_ids.update(str(wf['id']) for wf in page)
+            if changed:
+                with self._connect() as conn:
+                    conn.executemany(_UPSERT, [(self.api_url,) + _row(wf) for wf in changed])
+                counts["written"] += len(changed)
+                newest = max([newest or ""] + [wf.get('updatedAt') or "" for wf in changed]) or None
+            # Pages ordered newest-first: everything after an unchanged row is unchanged too
+            stamps = [wf.get('updatedAt') or "" for wf in page]
+            if not full and watermark and len(changed) < len(page) and stamps == sorted(stamps, reverse=True):
+                break
+
+        with self._connect() as conn:
+            if full:
+                known = [row[0] for row in conn.execute("SELECT id FROM workflows WHERE instance = ?", (self.api_url,))]
+                gone = [(self.api_url, wf_id) for wf_id in known if wf_id not in seen_ids]
+                conn.executemany("DELETE FROM workflows WHERE instance = ? AND id = ?", gone)
+                counts["removed"] = len(gone)
+            conn.execute("INSERT OR REPLACE INTO instances (instance, watermark, synced_at) VALUES (?, ?, ?)",
+                         (self.api_url, newest, time.time()))
+        logger.info(f"Workflow catalog {'full' if full else 'incremental'} sync of {self.api_url}: "
+                    f"{counts['pages']} pages, {counts['seen']} seen, {counts['written']} written, "
+                    f"{counts['removed']} removed in {time.perf_counter() - start:.2f}s")
+        return counts
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """Indexed lookup by exact name (most recently updated wins on duplicates); no API call."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT id, name, version_id, updated_at, active, content_hash FROM workflows "
+                               "WHERE instance = ? AND name = ? ORDER BY updated_at DESC LIMIT 1",
+                               (self.api_url, name)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "name": row[1], "version_id": row[2], "updated_at": row[3], "active": bool(row[4]),
+                "content_hash": row[5]}
+
+    def resolve(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the workflow called `name`, syncing only as much as needed.
+
+        Args:
+            name (str): Exact workflow name
+
+        Returns:
+            dict: id, name, version_id, updated_at, active, content_hash (None
+            until a deploy or diff stored one) - or None if it does not exist
+        """
+        with self._connect() as conn:
+            state = self._sync_state(conn)
+        if state is None:
+            self.refresh(full=True)
+            return self.lookup(name)
+        entry = self.lookup(name)
+        if entry is not None:
+            return entry
+        # Created elsewhere since the last sync? Ask for this name only
+        # (servers that ignore the filter just return a page; matches are checked exactly)
+        for page in self._pages({"name": name}):
+            self.record_all(wf for wf in page if wf.get('name') == name)
+            break
+        entry = self.lookup(name)
+        if entry is None and time.time() - state[1] > self.max_age:
+            self.refresh()
+            entry = self.lookup(name)
+        return entry
+
+    def record(self, workflow: Dict[str, Any], content_hash: Optional[str] = None):
+        """Upsert one workflow from an API response (after a PUT/POST/GET), with its canonical hash if known."""
+        row = (self.api_url,) + _row(workflow, content_hash)
+        if workflow.get('id') is not None:
+            with self._connect() as conn:
+                conn.execute(_UPSERT, row)
+
+    def record_all(self, workflows):
+        """Upsert several workflows from API responses."""
+        rows = [(self.api_url,) + _row(wf) for wf in workflows if wf.get('id') is not None]
+        if rows:
+            with self._connect() as conn:
+                conn.executemany(_UPSERT, rows)
+
+    def forget(self, workflow_id: str):
+        """Drop a workflow the API reported missing (404)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workflows WHERE instance = ? AND id = ?", (self.api_url, str(workflow_id)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Row count and sync state for this instance."""
+        with self._connect() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM workflows WHERE instance = ?", (self.api_url,)).fetchone()[0]
+            state = self._sync_state(conn)
+        return {
+            "instance": self.api_url,
+            "workflows": count,
+            "watermark": state[0] if state else None,
+            "synced_seconds_ago": round(time.time() - state[1], 1) if state else None,
+            "db_path": self.db_path
+        }
+
+
+_catalogs: Dict[str, WorkflowCatalog] = {}
+
+
+def get_catalog(api_url: str, api_key: str) -> WorkflowCatalog:
+    """Process-wide catalog per instance (file from WORKFLOW_CATALOG_PATH or .tmp/cache/workflow_catalog.sqlite)."""
+    api_url = api_url.rstrip('/')
+    if api_url not in _catalogs:
+        _catalogs[api_url] = WorkflowCatalog(api_url, api_key, os.getenv("WORKFLOW_CATALOG_PATH", DEFAULT_DB_PATH))
+    return _catalogs[api_url]
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+    import json
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Sync and query the local n8n workflow catalog')
+    parser.add_argument('command', choices=['sync', 'lookup', 'stats'])
+    parser.add_argument('name', nargs='?', help='Workflow name (lookup)')
+    parser.add_argument('--full', action='store_true', help='Full sync, removing deleted workflows')
+    args = parser.parse_args()
+
+    api_url = os.getenv('N8N_API_URL') or os.getenv('N8N_URL')
+    api_key = os.getenv('N8N_API_KEY')
+    if not api_url or not api_key:
+        parser.error("N8N_API_URL (or N8N_URL) and N8N_API_KEY must be set in .env")
+    catalog = get_catalog(api_url, api_key)
+
+    if args.command == 'sync':
+        print(json.dumps(catalog.refresh(full=args.full), indent=2))
+    elif args.command == 'lookup':
+        if not args.name:
+            parser.error("lookup needs a workflow name")
+        print(json.dumps(catalog.resolve(args.name), indent=2))
+    else:
+        print(json.dumps(catalog.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
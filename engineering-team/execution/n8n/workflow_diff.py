@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Canonical hashing and node-level diffs of n8n workflows.
+A deploy only needs to PUT when what it would send differs from what the
+instance already has. Both sides are projected onto the fields a deploy
+writes (name, the API profile's node fields, connections, the settings keys
+being sent), with server-assigned and empty values dropped and nodes
+ordered by name, so a workflow fetched back from n8n hashes the same as the
+payload that created it.
+
+Usage:
+    python workflow_diff.py local.json remote.json
+"""
+
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List
+
+try:
+    from execution.payload_sanitizer import get_profile
+except ImportError:
+    from payload_sanitizer import get_profile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Compared node fields are the API profile's (payload_sanitizer.py) minus ids n8n assigns when missing
+SERVER_ASSIGNED_NODE_KEYS = frozenset({'id', 'webhookId'})
+
+
+def _is_empty(value: Any) -> bool:
+    # Not `value in (None, False, ...)`: 0 == False, and a real zero must not hash as absent
+    return value is None or value is False or value in ("", {}, [])
+
+
+def _canonical_node(node: Dict[str, Any], keys) -> Dict[str, Any]:
+    return {key: node[key] for key in keys if key in node and not _is_empty(node[key])}
+
+
+def canonical_workflow(workflow: Dict[str, Any], settings_keys=None) -> Dict[str, Any]:
+    """
+    The deploy-relevant part of a workflow in a stable form.
+
+    Args:
+        workflow (dict): Local payload or workflow fetched from the API
+        settings_keys: Settings to compare (default: all of this workflow's);
+            pass the local keys when canonicalizing the remote side, since n8n
+            adds its own defaults
+
+    Returns:
+        dict: name, nodes (by name), connections and settings
+    """
+    keys = sorted(get_profile().node - SERVER_ASSIGNED_NODE_KEYS)
+    settings = workflow.get('settings') or {}
+    if settings_keys is not None:
+        settings = {key: settings[key] for key in settings_keys if key in settings}
+    return {
+        "name": workflow.get('name'),
+        "nodes": {node.get('name'): _canonical_node(node, keys) for node in workflow.get('nodes') or []},
+        "connections": workflow.get('connections') or {},
+        "settings": settings
+    }
+
+
+def canonical_hash(workflow: Dict[str, Any], settings_keys=None) -> str:
+    """sha256 of canonical_workflow (key order and node order do not matter)."""
+    text = json.dumps(canonical_workflow(workflow, settings_keys), sort_keys=True, separators=(",", ":"),
+                      ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def remote_hash(remote: Dict[str, Any], local: Dict[str, Any]) -> str:
+    """Hash of a fetched workflow, comparing only the settings the local payload sends."""
+    return canonical_hash(remote, settings_keys=(local.get('settings') or {}).keys())
+
+
+def workflow_diff(local: Dict[str, Any], remote: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Node-level differences a deploy of `local` would make to `remote`.
+
+    Returns:
+        dict: added / removed node names, modified nodes with the fields that
+        changed, and which workflow-level fields (name, connections, settings) differ
+    """
+    new = canonical_workflow(local)
+    old = canonical_workflow(remote, settings_keys=new["settings"].keys())
+    modified: List[Dict[str, Any]] = []
+    for name in sorted(set(new["nodes"]) & set(old["nodes"])):
+        before, after = old["nodes"][name], new["nodes"][name]
+        fields = sorted(key for key in set(before) | set(after) if before.get(key) != after.get(key))
+        if fields:
+            modified.append({"node": name, "fields": fields})
+    return {
+        "added": sorted(set(new["nodes"]) - set(old["nodes"])),
+        "removed": sorted(set(old["nodes"]) - set(new["nodes"])),
+        "modified": modified,
+        "workflow_fields": [key for key in ("name", "connections", "settings") if new[key] != old[key]]
+    }
+
+
+def describe_diff(diff: Dict[str, Any]) -> str:
+    """One-line summary for logs."""
+    parts = [f"+{len(diff['added'])} nodes", f"-{len(diff['removed'])} nodes", f"~{len(diff['modified'])} nodes"]
+    if diff["workflow_fields"]:
+        parts.append("changed " + ", ".join(diff["workflow_fields"]))
+    return ", ".join(parts)
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Diff two n8n workflow JSON files')
+    parser.add_argument('local', help='Workflow to deploy')
+    parser.add_argument('remote', help='Workflow currently deployed (e.g. fetched from the API)')
+    args = parser.parse_args()
+
+    with open(args.local, 'r') as f:
+        local = json.load(f)
+    with open(args.remote, 'r') as f:
+        remote = json.load(f)
+    unchanged = canonical_hash(local) == remote_hash(remote, local)
+    print(json.dumps({"unchanged": unchanged, "diff": workflow_diff(local, remote)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Bulk workflow generation for client onboarding batches.
+Reads a JSONL file of structured requirements records (one requirements.json
+object per line) and builds + validates each workflow in a process pool.
+Every record gets its own <output-root>/batch_<line>_<project>/ directory; results stream into a
+manifest as they finish, followed by a summary with throughput stats.
+
+Usage:
+    python n8n_batch.py clients.jsonl
+    python n8n_batch.py clients.jsonl --workers 8 --output-root .tmp/batch_0412
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import multiprocessing
+from datetime import datetime
+
+# Add n8n subdirectory to path so imports work (same layout as n8n_pipeline.py)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'n8n'))
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+
+from generate_workflow import generate_business_workflow
+from http_client import percentile
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _slug(text):
+    """Filesystem-safe lower-case name."""
+    return re.sub(r'[^a-z0-9]+', '_', str(text).lower()).strip('_')[:40] or "workflow"
+
+
+def _init_worker():
+    """Keep per-build INFO logs out of the batch output (validation warnings still show)."""
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def build_record(job):
+    """
+    Build and validate one requirements record (runs in a worker process).
+
+    Args:
+        job (tuple): (line_number, record dict, output_root, use_cache)
+
+    Returns:
+        dict: Per-record result for the manifest
+    """
+    line_number, record, output_root, use_cache = job
+    project_name = record.get("project_name") or record.get("workflow_name", "workflow")
+    # Slugged so a name cannot leave output_root; the line number keeps duplicate names apart
+    output_dir = os.path.join(output_root, f"batch_{line_number:05d}_{_slug(project_name)}")
+    result = {"line": line_number, "project_name": project_name, "output_dir": output_dir}
+
+    start = time.perf_counter()
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "requirements.json"), 'w') as f:
+            json.dump(record, f, indent=2)
+
+        wf_output_path = os.path.join(output_dir, "workflow.json")
+        # Validated strictly inside: graph errors raise and land in the manifest as failures
+        wf = generate_business_workflow(record, wf_output_path, use_cache=use_cache)
+
+        result.update({
+            "status": "success",
+            "output": wf_output_path,
+            "node_count": len(wf.nodes)
+        })
+    except Exception as e:
+        result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    result["build_seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _read_records(jsonl_path, output_root, use_cache, bad_lines):
+    """Lazily yield jobs from the JSONL file; malformed lines are collected in bad_lines."""
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                bad_lines.append({"line": line_number, "status": "error", "error": f"Invalid JSON: {e}"})
+                continue
+            yield (line_number, record, output_root, use_cache)
+
+
+def run_batch(jsonl_path, output_root=".tmp", workers=None, use_cache=True, chunksize=8):
+    """
+    Generate one workflow per JSONL record across CPU cores.
+
+    Args:
+        jsonl_path (str): Requirements records, one JSON object per line
+        output_root (str): Parent directory for per-project output dirs
+        workers (int): Process count (defaults to CPU count)
+        use_cache (bool): Use the shared workflow build cache
+        chunksize (int): Records handed to a worker at a time
+
+    Returns:
+        dict: Batch summary (also saved as <batch_id>_summary.json)
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_root, exist_ok=True)
+    batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    manifest_path = os.path.join(output_root, f"{batch_id}_manifest.jsonl")
+    summary_path = os.path.join(output_root, f"{batch_id}_summary.json")
+
+    logger.info(f"Starting batch {batch_id}: {jsonl_path} with {workers} workers")
+
+    bad_lines = []
+    durations = []
+    succeeded = failed = 0
+    start = time.perf_counter()
+
+    with open(manifest_path, 'w', encoding='utf-8') as manifest, \
+            multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        jobs = _read_records(jsonl_path, output_root, use_cache, bad_lines)
+        for result in pool.imap_unordered(build_record, jobs, chunksize=chunksize):
+            manifest.write(json.dumps(result) + "\n")
+            durations.append(result["build_seconds"])
+            if result["status"] == "success":
+                succeeded += 1
+            else:
+                failed += 1
+                logger.warning(f"Line {result['line']} ({result['project_name']}) failed: {result['error']}")
+            done = succeeded + failed
+            if done % 100 == 0:
+                manifest.flush()
+                logger.info(f"{done} workflows built ({done / (time.perf_counter() - start):.1f}/s)")
+
+        for result in bad_lines:
+            manifest.write(json.dumps(result) + "\n")
+
+    elapsed = time.perf_counter() - start
+    durations.sort()
+    total = succeeded + failed
+    summary = {
+        "batch_id": batch_id,
+        "input": jsonl_path,
+        "manifest": manifest_path,
+        "workers": workers,
+        "total": total + len(bad_lines),
+        "succeeded": succeeded,
+        "failed": failed + len(bad_lines),
+        "elapsed_seconds": round(elapsed, 3),
+        "workflows_per_second": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "build_seconds_p50": percentile(durations, 50),
+        "build_seconds_p95": percentile(durations, 95),
+        "build_seconds_max": durations[-1] if durations else 0.0,
+        "completion_time": datetime.now().isoformat()
+    }
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    logger.info(f"Batch complete: {succeeded}/{summary['total']} succeeded, "
+                f"{summary['workflows_per_second']} workflows/s, p95 {summary['build_seconds_p95']}s")
+    return summary
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Antigravity Engineering: bulk n8n workflow generation')
+    parser.add_argument('records', help='JSONL file of structured requirements records')
+    parser.add_argument('--output-root', default='.tmp', help='Parent directory for project outputs')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Skip the workflow build cache')
+    args = parser.parse_args()
+
+    summary = run_batch(args.records, args.output_root, args.workers, use_cache=not args.no_cache)
+
+    print("\n" + "=" * 60)
+    print("BATCH RESULTS")
+    print("=" * 60)
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Bulk deployment of many workflows to n8n.
+Takes a directory (every workflow.json below it, or the *.json exports in
+it) or a manifest (JSON list / JSONL of paths or {"path", "environment",
+"api_url"} objects; n8n_batch.py manifests work as-is) and deploys each
+workflow with deploy_to_n8n through a bounded thread pool. A
+partition_manifest.json (partition_workflow.py) is one job: its workflows
+deploy in the manifest's deploy_order, children before the parents that
+call them.
+
+- Requests to each n8n host share a token bucket (rate_limiter.py), so a
+  rollout to hundreds of workflows cannot flood one instance, across
+  processes too.
+- Transient failures (connection errors, timeouts, 429/5xx after the HTTP
+  client's own retries) are retried per workflow with backoff; a create
+  that may have landed is found by name on the next attempt, not duplicated.
+- Workflows whose canonical hash matches the deployed one (cached in the
+  workflow catalog) are skipped without a request; changed ones carry a
+  node-level diff in their result.
+- Results stream into a JSONL manifest, followed by a summary with
+  throughput and p50/p95/p99 deploy latency.
+
+Usage:
+    python n8n_bulk_deploy.py .tmp/batch_0412
+    python n8n_bulk_deploy.py rollout.jsonl --workers 16 --rps 10 --environment production
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Add n8n subdirectory to path so imports work (same layout as n8n_pipeline.py)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'n8n'))
+from shared_path import add_shared_resources_path
+add_shared_resources_path()
+
+from deploy_to_n8n import deploy_to_n8n, deploy_partitions
+from partition_workflow import MANIFEST_NAME
+from workflow_catalog import get_catalog
+from deploy_queue import is_transient
+from http_client import get_client, percentile
+from rate_limiter import RateLimiter, rate_limit_disabled, DEFAULT_DB_PATH
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+DEFAULT_RPS = 5.0  # Per n8n host, shared by every process deploying to it
+DEFAULT_BURST = 10
+DEFAULT_ATTEMPTS = 3
+
+
+def _is_workflow(path):
+    """True for a JSON file holding an n8n workflow (nodes and connections)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return isinstance(data, dict) and "nodes" in data and "connections" in data
+
+
+def collect_jobs(source, environment="staging", api_url=None):
+    """
+    Expand a directory or manifest into deploy jobs.
+
+    Args:
+        source (str): Directory of workflows, or a .json/.jsonl manifest
+        environment (str): Default environment for entries without one
+        api_url (str): Default n8n instance for entries without one
+
+    Returns:
+        list: Job dicts with path, environment and api_url
+    """
+    if os.path.isdir(source):
+        paths = []
+        partitioned = set()
+        for root, _, files in os.walk(source):
+            if MANIFEST_NAME in files:
+                # Partitioned workflows deploy as one job, in the manifest's deploy_order
+                manifest_path = os.path.join(root, MANIFEST_NAME)
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    partitioned.update(os.path.join(root, entry["file"]) for entry in json.load(f)["workflows"])
+                paths.append(manifest_path)
+            if "workflow.json" in files:
+                paths.append(os.path.join(root, "workflow.json"))
+        if not any(os.path.basename(path) == "workflow.json" for path in paths):
+            # A flat directory of exported workflows
+            for filename in os.listdir(source):
+                path = os.path.join(source, filename)
+                if (filename.endswith(".json") and path not in partitioned and path not in paths
+                        and _is_workflow(path)):
+                    paths.append(path)
+        entries = sorted(paths)
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            if source.endswith(".jsonl"):
+                entries = [json.loads(line) for line in f if line.strip()]
+            else:
+                entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError(f"{source}: expected a JSON list of workflow paths or objects, "
+                             f"got {type(entries).__name__}")
+
+    jobs = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        if entry.get("status", "success") != "success":
+            continue  # Failed builds in an n8n_batch manifest
+        path = entry.get("path") or entry.get("output")
+        if not path:
+            continue
+        jobs.append({
+            "path": path,
+            "environment": entry.get("environment", environment),
+            "api_url": (entry.get("api_url") or api_url or os.getenv('N8N_API_URL') or "").rstrip('/')
+        })
+    return jobs
+
+
+class HostThrottles:
+    """One shared token bucket per n8n host (None when RATE_LIMIT=0)."""
+
+    def __init__(self, rps, burst):
+        self.rps = rps
+        self.burst = burst
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, api_url):
+        if rate_limit_disabled() or not self.rps:
+            return None
+        host = urlsplit(api_url).netloc
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(f"n8n:{host}", self.rps, self.burst,
+                                                   os.getenv("RATE_LIMIT_DB", DEFAULT_DB_PATH))
+            return self._limiters[host].lane("batch")
+
+
+def deploy_job(job, api_key, throttles, attempts=DEFAULT_ATTEMPTS, skip_unchanged=True):
+    """
+    Deploy one workflow, retrying transient failures.
+
+    Args:
+        job (dict): path, environment, api_url, output_dir
+        api_key (str): n8n API key
+        throttles (HostThrottles): Per-host rate limits
+        attempts (int): Tries before giving up on transient failures
+        skip_unchanged (bool): Skip the PUT when the deployed workflow already
+            matches (deploy_to_n8n's canonical-hash diff)
+
+    Returns:
+        dict: Per-workflow result for the manifest
+    """
+    result = {"path": job["path"], "environment": job["environment"], "api_url": job["api_url"]}
+    throttle = throttles.for_url(job["api_url"])
+    start = time.perf_counter()
+    for attempt in range(1, attempts + 1):
+        try:
+            deploy = deploy_partitions if os.path.basename(job["path"]) == MANIFEST_NAME else deploy_to_n8n
+            info = deploy(job["path"], job["environment"], job["output_dir"],
+                          api_url=job["api_url"], api_key=api_key, throttle=throttle,
+                          diff=skip_unchanged, trust_cached_hash=True)
+            result.update({
+                "status": "skipped" if info.get("skipped") else "success",
+                "workflow_id": info.get("workflow_id"),
+                "workflow_name": info.get("workflow_name"),
+                "diff": info.get("diff")
+            })
+            if "partitions" in info:
+                result["partitions"] = info["partitions"]
+            break
+        except Exception as e:
+            result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+            if attempt == attempts or not is_transient(e):
+                break
+            delay = random.uniform(0, min(30.0, 2.0 ** attempt))
+            logger.warning(f"{job['path']}: {type(e).__name__}, attempt {attempt + 1}/{attempts} in {delay:.1f}s")
+            time.sleep(delay)
+    result["attempts"] = attempt
+    result["deploy_seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run_bulk_deploy(source, environment="staging", output_root=".tmp", workers=DEFAULT_WORKERS,
+                    rps=DEFAULT_RPS, burst=DEFAULT_BURST, attempts=DEFAULT_ATTEMPTS, skip_unchanged=True,
+                    api_url=None):
+    """
+    Deploy every workflow in a directory or manifest through a bounded pool.
+
+    Args:
+        source (str): Directory or manifest (see collect_jobs)
+        environment (str): Default environment ('staging' activates workflows)
+        output_root (str): Where the deploy manifest and summary are written
+        workers (int): Concurrent deploys
+        rps (float): Requests per second per n8n host (0 disables the limit)
+        burst (int): Requests allowed in a burst per host
+        attempts (int): Tries per workflow for transient failures
+        skip_unchanged (bool): Skip workflows the instance already has as-is
+        api_url (str): Default n8n instance (defaults to N8N_API_URL)
+
+    Returns:
+        dict: Deploy summary (also saved as <deploy_id>_summary.json)
+    """
+    api_key = os.getenv('N8N_API_KEY')
+    if not api_key:
+        raise ValueError("N8N_API_KEY must be set in .env")
+    jobs = collect_jobs(source, environment, api_url)
+    missing_url = [job["path"] for job in jobs if not job["api_url"]]
+    if missing_url:
+        raise ValueError(f"No n8n URL for {len(missing_url)} workflows; set N8N_API_URL or api_url in the manifest")
+
+    for job in jobs:
+        # deployment_info.json sits next to pipeline builds; flat exports get their own dir
+        if os.path.basename(job["path"]) == "workflow.json":
+            job["output_dir"] = os.path.dirname(job["path"]) or "."
+        else:
+            stem = os.path.splitext(os.path.basename(job["path"]))[0]
+            if os.path.basename(job["path"]) == MANIFEST_NAME:
+                # Named after the partition directory (save_partitions' out_dir)
+                stem = os.path.basename(os.path.dirname(os.path.abspath(job["path"])))
+            job["output_dir"] = os.path.join(output_root, "deployments", stem)
+
+    os.makedirs(output_root, exist_ok=True)
+    deploy_id = f"deploy_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    manifest_path = os.path.join(output_root, f"{deploy_id}_manifest.jsonl")
+    summary_path = os.path.join(output_root, f"{deploy_id}_summary.json")
+    hosts = sorted({job["api_url"] for job in jobs})
+    logger.info(f"Starting {deploy_id}: {len(jobs)} workflows to {len(hosts)} host(s) with {workers} workers")
+
+    client = get_client()
+    # Keep-alive pools sized for the workers (sessions are created lazily, below)
+    client.pool_maxsize = max(client.pool_maxsize, workers)
+    # One catalog sync per host up front instead of a sync race in every worker
+    for host in hosts:
+        get_catalog(host, api_key).refresh()
+    # Per-workflow INFO lines go to the manifest instead
+    logging.getLogger("deploy_to_n8n").setLevel(logging.WARNING)
+
+    throttles = HostThrottles(rps, burst)
+    counts = {"success": 0, "skipped": 0, "error": 0}
+    durations = []
+    start = time.perf_counter()
+    with open(manifest_path, 'w', encoding='utf-8') as manifest, ThreadPoolExecutor(workers) as pool:
+        futures = [pool.submit(deploy_job, job, api_key, throttles, attempts, skip_unchanged) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            manifest.write(json.dumps(result) + "\n")
+            counts[result["status"]] += 1
+            if result["status"] != "skipped":
+                durations.append(result["deploy_seconds"])
+            if result["status"] == "error":
+                logger.warning(f"{result['path']} failed after {result['attempts']} attempt(s): {result['error']}")
+            done = sum(counts.values())
+            if done % 100 == 0:
+                manifest.flush()
+                logger.info(f"{done}/{len(jobs)} workflows deployed ({done / (time.perf_counter() - start):.1f}/s)")
+
+    elapsed = time.perf_counter() - start
+    durations.sort()
+    summary = {
+        "deploy_id": deploy_id,
+        "source": source,
+        "manifest": manifest_path,
+        "workers": workers,
+        "rate_limit_rps_per_host": rps if rps and not rate_limit_disabled() else None,
+        "total": len(jobs),
+        "succeeded": counts["success"],
+        "skipped": counts["skipped"],
+        "failed": counts["error"],
+        "elapsed_seconds": round(elapsed, 3),
+        "workflows_per_second": round(len(jobs) / elapsed, 2) if elapsed > 0 else 0.0,
+        "deploy_seconds_p50": percentile(durations, 50),
+        "deploy_seconds_p95": percentile(durations, 95),
+        "deploy_seconds_p99": percentile(durations, 99),
+        "deploy_seconds_max": durations[-1] if durations else 0.0,
+        "http": client.metrics(),
+        "completion_time": datetime.now().isoformat()
+    }
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    logger.info(f"Deploy complete: {counts['success']} deployed, {counts['skipped']} unchanged, "
+                f"{counts['error']} failed; {summary['workflows_per_second']} workflows/s, "
+                f"p95 {summary['deploy_seconds_p95']}s, p99 {summary['deploy_seconds_p99']}s")
+    return summary
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Antigravity Engineering: bulk n8n workflow deployment')
+    parser.add_argument('source', help='Directory of workflows, or a .json/.jsonl manifest')
+    parser.add_argument('--environment', default='staging', choices=['staging', 'production'])
+    parser.add_argument('--output-root', default='.tmp', help='Where the deploy manifest and summary go')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent deploys')
+    parser.add_argument('--rps', type=float, default=DEFAULT_RPS, help='Requests/second per n8n host (0 = unlimited)')
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST, help='Burst size per n8n host')
+    parser.add_argument('--attempts', type=int, default=DEFAULT_ATTEMPTS, help='Tries per workflow')
+    parser.add_argument('--force', action='store_true', help='PUT every workflow, even ones the instance already has as-is')
+    args = parser.parse_args()
+
+    summary = run_bulk_deploy(args.source, args.environment, args.output_root, args.workers,
+                              args.rps, args.burst, args.attempts, skip_unchanged=not args.force)
+
+    print("\n" + "=" * 60)
+    print("DEPLOY RESULTS")
+    print("=" * 60)
+    print(json.dumps({k: v for k, v in summary.items() if k != "http"}, indent=2))
+    get_client().log_metrics()
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
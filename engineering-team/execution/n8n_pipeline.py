@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 """
 Master orchestrator for agentic n8n workflow system.
-Runs the complete pipeline: requirements → workflow → deployment → documentation
+Runs the complete pipeline: requirements → workflow → deployment + documentation
+(deployment and documentation run concurrently; see pipeline_engine.py)
+Deployment is queued (n8n/deploy_queue.py) and drained by a background
+worker, so the pipeline returns without waiting on n8n; --deploy-inline
+deploys within the run instead.
+Every finished stage is checkpointed in .tmp/<project>/pipeline_manifest.json;
+--resume skips stages whose inputs are unchanged and whose artifacts exist.
 Adapted for Antigravity Organization Structure.
 """
 
 import os
 import sys
 import json
+import asyncio
 import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Add n8n subdirectory to path so imports work
@@ -18,9 +27,11 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'n8n'))
 
 from parse_requirements import parse_requirements
 # FIXED: Import the correct function
-from generate_workflow import generate_business_workflow
+from generate_workflow import generate_business_workflow, BUILDER_VERSION
 from deploy_to_n8n import deploy_to_n8n
-from create_notion_docs import create_notion_docs
+from create_notion_docs import create_notion_docs, link_deployment_docs
+from deploy_queue import get_queue, ensure_worker
+from pipeline_engine import Stage, StageCheckpoint, PipelinePaused, run_stages, input_hash
 
 # Configure logging
 logging.basicConfig(
@@ -29,18 +40,229 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_pipeline(requirements_text, deploy=True, document=True, project_name=None):
+# Projects run at once by run_pipelines (each one makes LLM, n8n and Notion calls)
+DEFAULT_MAX_CONCURRENCY = 4
+
+MANIFEST_NAME = "pipeline_manifest.json"
+INPUT_NAME = "requirements_input.txt"
+ANSWERS_NAME = "answers.json"
+
+def _path(ctx, filename):
+    return os.path.join(ctx["output_dir"], filename)
+
+def apply_clarifications(output_dir):
     """
-    Run the complete agentic workflow pipeline.
+    Merge answers.json into requirements.json so generation can continue.
+    
+    Returns:
+        dict: Updated requirements
+    """
+    with open(os.path.join(output_dir, "requirements.json"), 'r') as f:
+        requirements = json.load(f)
+    with open(os.path.join(output_dir, ANSWERS_NAME), 'r') as f:
+        answers = json.load(f)
+    
+    requirements["clarifications"] = answers
+    requirements["missing_info"] = []
+    with open(os.path.join(output_dir, "requirements.json"), 'w') as f:
+        json.dump(requirements, f, indent=2)
+    return requirements
+
+def _stage_requirements(ctx):
+    """STAGE 1: parse requirements; pauses the run if clarifying questions were generated."""
+    output_dir = ctx["output_dir"]
+    questions_path = os.path.join(output_dir, "questions.json")
+    
+    # Resuming a clarification pause: apply the answers instead of re-parsing
+    previous = ctx["checkpoint"].get("requirements")
+    if (ctx.get("resume") and previous and previous.get("status") == "needs_clarification"
+            and previous.get("input_hash") == ctx["fingerprints"].get("requirements")
+            and os.path.exists(_path(ctx, "requirements.json"))):
+        if not os.path.exists(_path(ctx, ANSWERS_NAME)):
+            logger.warning(f"Still waiting for answers in {_path(ctx, ANSWERS_NAME)}")
+            raise PipelinePaused(previous["result"])
+        requirements_data = apply_clarifications(output_dir)
+        logger.info(f"✓ Clarifications applied: {requirements_data.get('workflow_name')}")
+        return {
+            "status": "success",
+            "output": f"{output_dir}/requirements.json",
+            "clarified": True
+        }
+    
+    # A questions.json left over from an earlier run must not pause this one
+    if os.path.exists(questions_path):
+        os.remove(questions_path)
+    requirements_data = parse_requirements(ctx["requirements_text"], output_dir)
+    result = {
+        "status": "success",
+        "output": f"{output_dir}/requirements.json"
+    }
+    
+    # Check if questions were generated
+    if os.path.exists(questions_path):
+        with open(questions_path, 'r') as f:
+            questions = json.load(f)
+        
+        logger.warning("CLARIFYING QUESTIONS NEEDED:")
+        for q in questions.get('blocking_questions', []):
+            logger.warning(f"  - {q['question']}")
+        
+        result["questions"] = questions
+        result["status"] = "needs_clarification"
+        
+        # Stop pipeline - need user input
+        raise PipelinePaused(result)
+    
+    logger.info(f"✓ Requirements validated: {requirements_data.get('workflow_name')}")
+    return result
+
+def _stage_workflow(ctx):
+    """STAGE 2: build workflow.json from requirements.json."""
+    output_dir = ctx["output_dir"]
+    req_path = os.path.join(output_dir, "requirements.json")
+    wf_output_path = os.path.join(output_dir, "workflow.json")
+    
+    # Load requirements dict
+    with open(req_path, 'r') as f:
+        requirements = json.load(f)
+        
+    # Call the actual generation function
+    wf = generate_business_workflow(requirements, wf_output_path)
+    
+    # Node count comes straight from the graph, no need to re-serialize
+    node_count = len(wf.nodes)
+    logger.info(f"✓ Workflow generated: {node_count} nodes")
+    return {
+        "status": "success",
+        "output": wf_output_path,
+        "node_count": node_count
+    }
+
+def _stage_deploy(ctx):
+    """STAGE 3: queue the staging deploy (or deploy now with deploy_inline)."""
+    wf_output_path = os.path.join(ctx["output_dir"], "workflow.json")
+    if not ctx.get("deploy_inline"):
+        queue = get_queue()
+        job = queue.enqueue_deploy(wf_output_path, "staging", ctx["output_dir"])
+        ensure_worker(queue)
+        logger.info(f"✓ Deploy queued as job {job['id']} ({job['status']})")
+        return {
+            "status": "success",
+            "queued": True,
+            "job_id": job["id"],
+            "job_status": job["status"],
+            "environment": "staging"
+        }
+    
+    deployment_info = deploy_to_n8n(wf_output_path, "staging", ctx["output_dir"])
+    
+    logger.info(f"✓ Deployed to n8n: {deployment_info.get('workflow_id')}")
+    logger.warning("⚠ MANUAL STEP REQUIRED: Configure credentials in n8n UI")
+    return {
+        "status": "success",
+        "workflow_id": deployment_info.get('workflow_id'),
+        "environment": "staging"
+    }
+
+def _reuse_deploy(result, ctx):
+    """
+    Trust a checkpointed queued deploy only while its job can still succeed.
+    
+    A failed or missing job returns None, so --resume enqueues it again
+    (which re-queues the failed job); a pending one gets a worker if none is alive.
+    """
+    if not result.get("queued"):
+        return result
+    queue = get_queue()
+    job = queue.get(result.get("job_id"))
+    if job is None or job["status"] == "failed":
+        logger.warning(f"Deploy job {result.get('job_id')} did not succeed "
+                       f"({job['error'] if job else 'no longer in the queue'}), queueing it again")
+        return None
+    if job["status"] != "done":
+        ensure_worker(queue)
+    return dict(result, job_status=job["status"])
+
+def _stage_document(ctx):
+    """STAGE 4: create the Notion page (runs alongside deployment)."""
+    output_dir = ctx["output_dir"]
+    page_info = create_notion_docs(
+        os.path.join(output_dir, "requirements.json"),
+        os.path.join(output_dir, "workflow.json"),
+        None,  # Deployment may still be running; the link is added afterwards
+        None,  # No performance data yet
+        output_dir
+    )
+    
+    logger.info(f"✓ Documentation created: {page_info.get('page_url')}")
+    return {
+        "status": "success",
+        "page_url": page_info.get('page_url')
+    }
+
+def _stage_link_docs(ctx):
+    """
+    Add the n8n editor link to the Notion page once both deploy and docs are done.
+    
+    A queued deploy usually finishes later; its worker adds the link then
+    (and --resume retries it here), at most once per deployment.
+    """
+    linked = link_deployment_docs(ctx["output_dir"])
+    return {"status": "success" if linked else "skipped"}
+
+def build_stages(deploy=True, document=True, deploy_inline=False):
+    """
+    Pipeline DAG: requirements -> workflow -> {deployment, documentation} -> documentation_link.
+    
+    Deployment and documentation only depend on the generated workflow, so
+    they run concurrently. A queued deployment has no output until its job
+    runs, so only an inline one checkpoints deployment_info.json; a queued
+    one is re-checked against its job on --resume.
+    """
+    stages = [
+        Stage("requirements", _stage_requirements, title="STAGE 1: REQUIREMENTS VALIDATION",
+              fingerprint=lambda ctx: input_hash(ctx["requirements_text"]),
+              outputs=lambda ctx: [_path(ctx, "requirements.json")]),
+        Stage("workflow_generation", _stage_workflow, after=["requirements"], title="STAGE 2: WORKFLOW GENERATION",
+              fingerprint=lambda ctx: input_hash(("file", _path(ctx, "requirements.json")), BUILDER_VERSION),
+              outputs=lambda ctx: [_path(ctx, "workflow.json")]),
+    ]
+    if deploy:
+        stages.append(Stage("deployment", _stage_deploy, after=["workflow_generation"],
+                            title="STAGE 3: MVP DEPLOYMENT",
+                            fingerprint=lambda ctx: input_hash(("file", _path(ctx, "workflow.json")), "staging",
+                                                               os.getenv('N8N_API_URL', '')),
+                            outputs=lambda ctx: [_path(ctx, "deployment_info.json")] if deploy_inline else [],
+                            reuse=_reuse_deploy))
+    if document:
+        stages.append(Stage("documentation", _stage_document, after=["workflow_generation"],
+                            title="STAGE 4: NOTION DOCUMENTATION",
+                            fingerprint=lambda ctx: input_hash(("file", _path(ctx, "requirements.json")),
+                                                               ("file", _path(ctx, "workflow.json"))),
+                            outputs=lambda ctx: [_path(ctx, "notion_page_info.json")]))
+    if deploy and document:
+        stages.append(Stage("documentation_link", _stage_link_docs, after=["deployment", "documentation"],
+                            title="NOTION DEPLOYMENT LINK",
+                            fingerprint=lambda ctx: input_hash(("file", _path(ctx, "deployment_info.json")),
+                                                               ("file", _path(ctx, "notion_page_info.json")))))
+    return stages
+
+async def run_pipeline_async(requirements_text, deploy=True, document=True, project_name=None, resume=False,
+                             deploy_inline=False):
+    """
+    Run the complete agentic workflow pipeline as an asyncio DAG.
     
     Args:
-        requirements_text (str): Natural language requirements
+        requirements_text (str): Natural language requirements (None on resume
+            reuses the text saved by the first run)
         deploy (bool): Whether to deploy to n8n
         document (bool): Whether to create Notion docs
         project_name (str): Optional project name for output directory
+        resume (bool): Skip stages whose checkpoint is still current
+        deploy_inline (bool): Deploy within the run instead of queueing the deploy
         
     Returns:
-        dict: Pipeline results
+        dict: Pipeline results, including per-stage wall-clock seconds under "timings"
     """
     logger.info("=" * 60)
     logger.info("ANTIGRAVITY N8N PIPELINE - ENGINEERING TEAM")
@@ -48,154 +270,175 @@ def run_pipeline(requirements_text, deploy=True, document=True, project_name=Non
     
     # Create project directory in root .tmp
     if project_name is None:
-        project_name = f"project_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if resume:
+            raise ValueError("resume needs the project_name of the run to continue")
+        # The timestamp alone collides when run_pipelines_async starts several runs on a coarse clock
+        project_name = f"project_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
     
     output_dir = os.path.join(".tmp", project_name)
     os.makedirs(output_dir, exist_ok=True)
     
+    # Keep the raw input so a resumed run can be started without it
+    input_path = os.path.join(output_dir, INPUT_NAME)
+    if requirements_text is None:
+        if not os.path.exists(input_path):
+            raise ValueError(f"No requirements given and none saved in {input_path}")
+        with open(input_path, 'r', encoding='utf-8') as f:
+            requirements_text = f.read()
+    else:
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(requirements_text)
+    
     results = {
         "project_name": project_name,
         "output_dir": output_dir,
         "stages": {}
     }
+    checkpoint = StageCheckpoint(os.path.join(output_dir, MANIFEST_NAME))
+    context = {
+        "requirements_text": requirements_text,
+        "output_dir": output_dir,
+        "checkpoint": checkpoint,
+        "resume": resume,
+        "deploy_inline": deploy_inline
+    }
     
     try:
-        # STAGE 1: Requirements Validation
-        logger.info("\n" + "=" * 60)
-        logger.info("STAGE 1: REQUIREMENTS VALIDATION")
-        logger.info("=" * 60)
-        
-        requirements_data = parse_requirements(requirements_text, output_dir)
-        results["stages"]["requirements"] = {
-            "status": "success",
-            "output": f"{output_dir}/requirements.json"
-        }
-        
-        # Check if questions were generated
-        questions_path = os.path.join(output_dir, "questions.json")
-        if os.path.exists(questions_path):
-            with open(questions_path, 'r') as f:
-                questions = json.load(f)
-            
-            logger.warning("CLARIFYING QUESTIONS NEEDED:")
-            for q in questions.get('blocking_questions', []):
-                logger.warning(f"  - {q['question']}")
-            
-            results["stages"]["requirements"]["questions"] = questions
-            results["stages"]["requirements"]["status"] = "needs_clarification"
-            
-            # Stop pipeline - need user input
-            logger.info("\nPipeline paused: User clarification required")
-            return results
-        
-        logger.info(f"✓ Requirements validated: {requirements_data.get('workflow_name')}")
-        
-        # STAGE 2: Workflow Generation
-        logger.info("\n" + "=" * 60)
-        logger.info("STAGE 2: WORKFLOW GENERATION")
-        logger.info("=" * 60)
-        
-        req_path = os.path.join(output_dir, "requirements.json")
-        wf_output_path = os.path.join(output_dir, "workflow.json")
-        
-        # Load requirements dict
-        with open(req_path, 'r') as f:
-            requirements = json.load(f)
-            
-        # Call the actual generation function
-        wf = generate_business_workflow(requirements, wf_output_path)
-        
-        # Parse the output to get node count for reporting
-        workflow_data = json.loads(wf.to_json())
-        
-        results["stages"]["workflow_generation"] = {
-            "status": "success",
-            "output": wf_output_path,
-            "node_count": len(workflow_data.get('nodes', []))
-        }
-        
-        logger.info(f"✓ Workflow generated: {len(workflow_data.get('nodes', []))} nodes")
-        
-        # STAGE 3: Deployment (optional)
-        if deploy:
-            logger.info("\n" + "=" * 60)
-            logger.info("STAGE 3: MVP DEPLOYMENT")
-            logger.info("=" * 60)
-            
-            deployment_info = deploy_to_n8n(wf_output_path, "staging", output_dir)
-            results["stages"]["deployment"] = {
-                "status": "success",
-                "workflow_id": deployment_info.get('workflow_id'),
-                "environment": "staging"
-            }
-            
-            logger.info(f"✓ Deployed to n8n: {deployment_info.get('workflow_id')}")
-            logger.warning("⚠ MANUAL STEP REQUIRED: Configure credentials in n8n UI")
-        
-        # STAGE 4: Documentation (optional)
-        if document:
-            logger.info("\n" + "=" * 60)
-            logger.info("STAGE 4: NOTION DOCUMENTATION")
-            logger.info("=" * 60)
-            
-            deploy_path = os.path.join(output_dir, "deployment_info.json")
-            
-            page_info = create_notion_docs(
-                req_path, 
-                wf_output_path,
-                deploy_path if deploy else None,
-                None,  # No performance data yet
-                output_dir
-            )
-            
-            results["stages"]["documentation"] = {
-                "status": "success",
-                "page_url": page_info.get('page_url')
-            }
-            
-            logger.info(f"✓ Documentation created: {page_info.get('page_url')}")
-        
-        # Pipeline complete
-        logger.info("\n" + "=" * 60)
-        logger.info("PIPELINE COMPLETE")
-        logger.info("=" * 60)
-        
-        results["status"] = "success"
-        results["completion_time"] = datetime.now().isoformat()
-        
-        return results
-        
+        await run_stages(build_stages(deploy, document, deploy_inline), context, results, checkpoint, resume)
     except Exception as e:
         logger.error(f"Pipeline failed: {e}")
         results["status"] = "error"
         results["error"] = str(e)
         raise
+    
+    if results.pop("paused", False):
+        logger.info("\nPipeline paused: User clarification required")
+        return results
+    
+    # Pipeline complete
+    logger.info("\n" + "=" * 60)
+    logger.info("PIPELINE COMPLETE")
+    logger.info("=" * 60)
+    
+    results["status"] = "success"
+    results["completion_time"] = datetime.now().isoformat()
+    
+    return results
+
+def run_pipeline(requirements_text, deploy=True, document=True, project_name=None, resume=False,
+                 deploy_inline=False):
+    """
+    Run the complete agentic workflow pipeline.
+    
+    Args:
+        requirements_text (str): Natural language requirements
+        deploy (bool): Whether to deploy to n8n
+        document (bool): Whether to create Notion docs
+        project_name (str): Optional project name for output directory
+        resume (bool): Continue a previous run of project_name from its checkpoints
+        deploy_inline (bool): Deploy within the run instead of queueing the deploy
+        
+    Returns:
+        dict: Pipeline results
+    """
+    return asyncio.run(run_pipeline_async(requirements_text, deploy, document, project_name, resume, deploy_inline))
+
+async def run_pipelines_async(jobs, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Run several projects concurrently, at most max_concurrency at a time.
+    
+    Args:
+        jobs (list): Dicts of run_pipeline keyword arguments
+        max_concurrency (int): Projects in flight at once
+        
+    Returns:
+        list: Results per job, in job order (failed jobs get status "error")
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # Stages run in threads; leave room for deploy + docs of every project in flight
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_concurrency * 2))
+    
+    async def run_job(job):
+        async with semaphore:
+            try:
+                return await run_pipeline_async(**job)
+            except Exception as e:
+                return {"project_name": job.get("project_name"), "status": "error", "error": str(e)}
+    
+    return await asyncio.gather(*(run_job(job) for job in jobs))
+
+def run_pipelines(jobs, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """Blocking wrapper around run_pipelines_async."""
+    return asyncio.run(run_pipelines_async(jobs, max_concurrency))
 
 def main():
     """CLI entry point."""
     import argparse
     
     parser = argparse.ArgumentParser(description='Antigravity Engineering: n8n Workflow Pieline')
-    parser.add_argument('requirements', help='Requirements text or file path')
+    parser.add_argument('requirements', nargs='*', help='Requirements text or file path (several run concurrently)')
     parser.add_argument('--no-deploy', action='store_true', help='Skip n8n deployment')
+    parser.add_argument('--deploy-inline', action='store_true',
+                        help='Deploy within the run instead of queueing it for the deploy worker')
     parser.add_argument('--no-docs', action='store_true', help='Skip Notion documentation')
     parser.add_argument('--project-name', help='Project name for output directory')
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help='Projects run at once when several requirements are given')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue --project-name, skipping stages whose inputs are unchanged')
+    parser.add_argument('--answers', help='JSON file answering questions.json (used with --resume)')
     
     args = parser.parse_args()
+    if args.resume and not args.project_name:
+        parser.error('--resume requires --project-name')
+    if not args.requirements and not args.resume:
+        parser.error('requirements are required unless resuming')
+    if args.answers:
+        if not args.resume:
+            parser.error('--answers is only used with --resume')
+        output_dir = os.path.join(".tmp", args.project_name)
+        os.makedirs(output_dir, exist_ok=True)
+        with open(args.answers, 'r') as f:
+            answers = json.load(f)
+        with open(os.path.join(output_dir, ANSWERS_NAME), 'w') as f:
+            json.dump(answers, f, indent=2)
     
     # Load requirements
-    if os.path.isfile(args.requirements):
-        with open(args.requirements, 'r') as f:
-            requirements = f.read()
-    else:
-        requirements = args.requirements
+    texts = []
+    for item in args.requirements:
+        if os.path.isfile(item):
+            with open(item, 'r') as f:
+                texts.append(f.read())
+        else:
+            texts.append(item)
+    
+    if len(texts) > 1:
+        if args.resume:
+            parser.error('--resume takes at most one requirements argument')
+        jobs = [{
+            "requirements_text": text,
+            "deploy": not args.no_deploy,
+            "document": not args.no_docs,
+            "deploy_inline": args.deploy_inline,
+            "project_name": f"{args.project_name}_{i}" if args.project_name else None
+        } for i, text in enumerate(texts, 1)]
+        all_results = run_pipelines(jobs, args.max_concurrency)
+        
+        print("\n" + "=" * 60)
+        print("PIPELINE RESULTS")
+        print("=" * 60)
+        print(json.dumps(all_results, indent=2))
+        return
+    requirements = texts[0] if texts else None
     
     # Run pipeline
     results = run_pipeline(
         requirements,
         deploy=not args.no_deploy,
         document=not args.no_docs,
-        project_name=args.project_name
+        project_name=args.project_name,
+        resume=args.resume,
+        deploy_inline=args.deploy_inline
     )
     
     # Print results
@@ -208,9 +451,14 @@ def main():
         print("\n✅ All stages completed successfully!")
         if 'documentation' in results['stages']:
             print(f"\n📄 View documentation: {results['stages']['documentation']['page_url']}")
+        deployment = results['stages'].get('deployment', {})
+        if deployment.get('queued'):
+            print(f"\n📦 Deploy queued as job {deployment['job_id']}: "
+                  f"python engineering-team/execution/n8n/deploy_queue.py show {deployment['job_id']}")
     elif results['stages']['requirements'].get('status') == 'needs_clarification':
         print("\n⚠️ Pipeline paused - clarification needed")
         print(f"See {results['output_dir']}/questions.json")
+        print(f"Answer with: --project-name {os.path.basename(results['output_dir'])} --resume --answers answers.json")
 
 if __name__ == "__main__":
     main()
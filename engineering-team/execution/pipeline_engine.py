@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Minimal asyncio DAG runner for the n8n pipeline.
+Stages declare the stages they run after; every stage starts as soon as its
+dependencies finish, so independent stages (e.g. deploy and Notion docs)
+overlap. Stage bodies are the existing blocking functions, run in worker
+threads, and each stage's wall-clock time is recorded.
+
+With a StageCheckpoint, every finished stage is written to a manifest with a
+hash of its inputs and its output paths; a resumed run skips stages whose
+input hash still matches and whose outputs still exist.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class PipelinePaused(Exception):
+    """Raised by a stage to stop its dependents without failing the run (e.g. clarification needed)."""
+
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result.get("status", "paused"))
+        self.result = result
+
+
+class Stage:
+    """
+    One pipeline step: run(context) -> result dict (stored under results['stages'][name]).
+
+    fingerprint(context) -> str hashes the stage's inputs and outputs(context)
+    lists the artifact paths it writes; both are only needed for resuming.
+    reuse(result, context) -> dict or None re-checks a checkpointed result
+    before a resumed run trusts it (e.g. a queued job that may have failed
+    since); None runs the stage again.
+    """
+
+    def __init__(self, name: str, run: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                 after: Sequence[str] = (), title: str = None,
+                 fingerprint: Callable[[Dict[str, Any]], str] = None,
+                 outputs: Callable[[Dict[str, Any]], List[str]] = None,
+                 reuse: Callable[[Dict[str, Any], Dict[str, Any]], Optional[Dict[str, Any]]] = None):
+        self.name = name
+        self.run = run
+        self.after = tuple(after)
+        self.title = title or name.replace("_", " ").upper()
+        self.fingerprint = fingerprint
+        self.outputs = outputs
+        self.reuse = reuse
+
+
+def input_hash(*parts: Any) -> str:
+    """sha256 over strings, bytes and file contents (paths given as ('file', path))."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, tuple) and part[0] == "file":
+            try:
+                with open(part[1], 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 16), b""):
+                        digest.update(chunk)
+            except FileNotFoundError:
+                digest.update(b"\x00missing")
+        else:
+            digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class StageCheckpoint:
+    """Per-project manifest of finished stages: input hash, outputs, status and result."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.stages = json.load(f).get("stages", {})
+            except (OSError, json.JSONDecodeError):
+                logger.warning(f"Ignoring unreadable checkpoint manifest {path}")
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.stages.get(name)
+
+    def is_current(self, name: str, fingerprint: str, outputs: Iterable[str]) -> bool:
+        """True if `name` succeeded with the same inputs and all of its outputs still exist."""
+        entry = self.stages.get(name)
+        return bool(entry and entry.get("status") == "success" and entry.get("input_hash") == fingerprint
+                    and all(os.path.exists(path) for path in outputs))
+
+    def record(self, name: str, fingerprint: Optional[str], outputs: List[str], result: Dict[str, Any],
+               seconds: float):
+        self.stages[name] = {
+            "status": result.get("status", "success"),
+            "input_hash": fingerprint,
+            "outputs": outputs,
+            "result": result,
+            "seconds": seconds,
+            "completed_at": datetime.now().isoformat()
+        }
+        self.save()
+
+    def save(self):
+        """Atomically rewrite the manifest."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"updated_at": datetime.now().isoformat(), "stages": self.stages}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class _Skipped(Exception):
+    """A dependency failed or paused, so this stage never ran."""
+
+
+def _check_order(stages: List[Stage]):
+    """Stages must be listed after their dependencies (which also rules out cycles)."""
+    seen = set()
+    for stage in stages:
+        missing = [dep for dep in stage.after if dep not in seen]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' runs after unknown or later stage(s): {missing}")
+        seen.add(stage.name)
+
+
+async def run_stages(stages: List[Stage], context: Dict[str, Any], results: Dict[str, Any],
+                     checkpoint: StageCheckpoint = None, resume: bool = False) -> Dict[str, Any]:
+    """
+    Run `stages` as a DAG, filling results['stages'] and results['timings'].
+
+    Args:
+        stages (list): Stage objects, dependencies first
+        context (dict): Shared state handed to every stage; stages see their
+            own input hash under context['fingerprints'][name]
+        results (dict): Pipeline results dict to fill in
+        checkpoint (StageCheckpoint): Manifest to record finished stages in
+        resume (bool): Skip stages the checkpoint shows as current
+
+    Returns:
+        dict: `results`; re-raises the first stage error (after running stages finish)
+    """
+    _check_order(stages)
+    tasks: Dict[str, asyncio.Task] = {}
+    stage_results: Dict[str, Dict[str, Any]] = {}
+    timings: Dict[str, float] = results.setdefault("timings", {})
+    fingerprints: Dict[str, str] = context.setdefault("fingerprints", {})
+    run_start = time.perf_counter()
+
+    async def run_one(stage: Stage):
+        if stage.after:
+            outcomes = await asyncio.gather(*(tasks[dep] for dep in stage.after), return_exceptions=True)
+            if any(isinstance(outcome, BaseException) for outcome in outcomes):
+                raise _Skipped(stage.name)
+
+        fingerprint = stage.fingerprint(context) if stage.fingerprint else None
+        outputs = stage.outputs(context) if stage.outputs else []
+        if fingerprint is not None:
+            fingerprints[stage.name] = fingerprint
+        reused = None
+        if resume and checkpoint is not None and fingerprint is not None \
+                and checkpoint.is_current(stage.name, fingerprint, outputs):
+            reused = checkpoint.get(stage.name)["result"]
+            if stage.reuse is not None:
+                reused = await asyncio.to_thread(stage.reuse, reused, context)
+                if reused is None:
+                    logger.info(f"{stage.title}: checkpointed result no longer holds, running it again")
+        if reused is not None:
+            logger.info(f"↷ {stage.title}: inputs unchanged, reusing checkpoint")
+            stage_results[stage.name] = dict(reused, resumed=True)
+            timings[stage.name] = 0.0
+            return
+
+        logger.info("\n" + "=" * 60)
+        logger.info(f"STAGE: {stage.title}")
+        logger.info("=" * 60)
+        start = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(stage.run, context)
+        except PipelinePaused as paused:
+            stage_results[stage.name] = paused.result
+            timings[stage.name] = round(time.perf_counter() - start, 3)
+            if checkpoint is not None:
+                checkpoint.record(stage.name, fingerprint, outputs, paused.result, timings[stage.name])
+            raise
+        except Exception:
+            timings[stage.name] = round(time.perf_counter() - start, 3)
+            raise
+        timings[stage.name] = round(time.perf_counter() - start, 3)
+        if result is not None:
+            stage_results[stage.name] = result
+            if checkpoint is not None:
+                checkpoint.record(stage.name, fingerprint, outputs, result, timings[stage.name])
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.create_task(run_one(stage))
+    outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    timings["total"] = round(time.perf_counter() - run_start, 3)
+
+    # Keep the declared stage order in the results regardless of completion order
+    for stage in stages:
+        if stage.name in stage_results:
+            results["stages"][stage.name] = stage_results[stage.name]
+
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException) and not isinstance(outcome, (_Skipped, PipelinePaused)):
+            raise outcome
+    if any(isinstance(outcome, PipelinePaused) for outcome in outcomes):
+        results["paused"] = True
+    return results
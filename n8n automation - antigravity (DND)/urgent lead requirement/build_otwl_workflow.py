@@ -14,15 +14,15 @@ Features:
 import sys
 import os
 
-# Add parent directory to path to import n8n_builder
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'execution'))
+# Import n8n_builder from the maintained engineering-team package (streaming save)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'engineering-team', 'execution', 'n8n'))
 from n8n_builder import N8NWorkflow, N8NNode
 
 def create_otwl_rate_workflow():
     """Build the comprehensive OTWL Rate Management workflow."""
     
-    wf = N8NWorkflow("OTWL Rate Management - Steps 3-10")
-    wf.current_y = 0  # Reset Y position for better layout
+    # Positions are assigned by the layered auto-layout when the workflow is saved
+    wf = N8NWorkflow("OTWL Rate Management - Steps 3-10", auto_layout=True)
     
     # ==================== PART 1: Customer Inquiry Flow ====================
     
@@ -168,10 +168,6 @@ OTWL Team""",
     
     # ==================== PART 2: Agent Response Flow ====================
     
-    # Reset Y position for second flow
-    wf.current_y = 400
-    wf.current_x = 0
-    
     # Trigger 2: Gmail - Agent Responses
     gmail_trigger_agent = wf.create_node(
         "Agent Response Received",
@@ -435,8 +431,7 @@ if __name__ == "__main__":
     output_dir = os.path.join(os.path.dirname(__file__))
     output_path = os.path.join(output_dir, "otwl_rate_management_workflow.json")
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(workflow.to_json())
+    workflow.save(output_path)
     
     print("SUCCESS: OTWL Rate Management workflow generated!")
     print(f"Saved to: {output_path}")
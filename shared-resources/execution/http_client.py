@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for outbound API calls (OpenRouter, n8n, Notion, GitHub raw).
+
+- One requests.Session per host, so TCP/TLS connections are kept alive and
+  pooled instead of re-handshaking on every call.
+- Retries 429/5xx responses and connection failures with jittered
+  exponential backoff, honoring Retry-After when the server sends it.
+  Non-idempotent requests (POST/PATCH) are only retried when the server
+  cannot have acted on them (429/503, connect errors) unless the caller
+  passes idempotent=True.
+- Per-host request, retry and error counts plus latency percentiles,
+  available via metrics() / log_metrics().
+- Optional throttle (see rate_limiter.py): a token is taken before every
+  attempt, retries included, and a 429 pauses the shared bucket.
+
+Usage:
+    sys.path.insert(0, '<repo>/shared-resources/execution')
+    from http_client import get_client
+
+    response = get_client().get(url, headers=headers, timeout=30)
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# The server rejected these before doing any work, so even a POST is safe to resend
+UNPROCESSED_STATUSES = frozenset({429, 503})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+LATENCY_SAMPLES = 1000
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class HostMetrics:
+    """Counters and a bounded latency sample for one host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "latency_max_ms": round((latencies[-1] if latencies else 0.0) * 1000, 1)
+        }
+
+
+class HTTPClient:
+    """Pooled, retrying HTTP client shared by all outbound API calls."""
+
+    def __init__(self, max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 max_retry_after: float = 120.0, pool_maxsize: int = 10, default_timeout: float = 30):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.pool_maxsize = pool_maxsize
+        self.default_timeout = default_timeout
+        self._sessions: Dict[str, requests.Session] = {}
+        self._metrics: Dict[str, HostMetrics] = {}
+        self._lock = threading.Lock()
+
+    def session(self, host: str) -> requests.Session:
+        """The keep-alive session for `host` (scheme://netloc), created on first use."""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # Retries are handled in request() so they can be logged and measured
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+                self._metrics.setdefault(host, HostMetrics())
+            return session
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+    def request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                max_retries: Optional[int] = None, throttle=None, **kwargs) -> requests.Response:
+        """
+        Send a request through the host's pooled session, retrying transient failures.
+
+        Args:
+            method (str): HTTP method
+            url (str): Full URL
+            idempotent (bool): Safe to resend after an ambiguous failure
+                (defaults to True for GET/HEAD/OPTIONS/PUT/DELETE)
+            max_retries (int): Override the client's retry count
+            throttle: Object with acquire() (called before each attempt) and
+                block(seconds) (called on 429), e.g. RateLimiter.lane(...)
+            **kwargs: Passed to requests (headers, json, params, timeout, ...)
+
+        Returns:
+            requests.Response: The final response (callers still raise_for_status)
+        """
+        method = method.upper()
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self.session(host)
+        metrics = self._metrics[host]
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retries = self.max_retries if max_retries is None else max_retries
+        kwargs.setdefault("timeout", self.default_timeout)
+
+        attempt = 0
+        while True:
+            if throttle is not None:
+                throttle.acquire()
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                elapsed = time.perf_counter() - start
+                if isinstance(e, requests.exceptions.ConnectTimeout):
+                    retryable = True  # Never reached the server
+                elif isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                    retryable = idempotent  # May have been processed
+                else:
+                    retryable = False
+                with self._lock:
+                    metrics.requests += 1
+                    metrics.latencies.append(elapsed)
+                    if not retryable or attempt >= retries:
+                        metrics.errors += 1
+                    else:
+                        metrics.retries += 1
+                if not retryable or attempt >= retries:
+                    raise
+                delay = self._backoff(attempt, None)
+                logger.warning(f"{method} {host}: {type(e).__name__}, retry {attempt + 1}/{retries} in {delay:.1f}s")
+            else:
+                elapsed = time.perf_counter() - start
+                status = response.status_code
+                retryable = status in RETRY_STATUSES and (idempotent or status in UNPROCESSED_STATUSES)
+                with self._lock:
+                    metrics.requests += 1
+                    metrics.latencies.append(elapsed)
+                    metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+                    if status >= 400 and (not retryable or attempt >= retries):
+                        metrics.errors += 1
+                    elif retryable and attempt < retries:
+                        metrics.retries += 1
+                if retryable:  # 429 always is
+                    delay = self._backoff(attempt, parse_retry_after(response.headers.get("Retry-After")))
+                if retryable and attempt < retries:
+                    logger.warning(f"{method} {host}: HTTP {status}, retry {attempt + 1}/{retries} in {delay:.1f}s")
+                if status == 429 and throttle is not None:
+                    # Every process sharing the limit waits (in acquire), not just this one - also when
+                    # this caller is out of retries (last attempt, max_retries=0) and gets the 429 back
+                    throttle.block(delay)
+                    delay = 0.0
+                if not retryable or attempt >= retries:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host request/retry/error counts, status histogram and latency percentiles."""
+        with self._lock:
+            return {host: m.to_dict() for host, m in self._metrics.items()}
+
+    def log_metrics(self):
+        """Log one summary line per host."""
+        for host, m in self.metrics().items():
+            logger.info(f"{host}: {m['requests']} requests, {m['retries']} retries, {m['errors']} errors, "
+                        f"p50 {m['latency_p50_ms']}ms, p95 {m['latency_p95_ms']}ms")
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_default_client: Optional[HTTPClient] = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> HTTPClient:
+    """The process-wide shared client."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HTTPClient()
+        return _default_client
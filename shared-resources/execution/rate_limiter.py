@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Machine-wide token-bucket rate limiter for outbound API calls.
+
+All processes on the machine share one SQLite file (in the system temp dir
+by default), so pipeline runs, batch parsing and log analysis draw from the
+same bucket instead of each discovering the provider's limit through 429s.
+
+- Token bucket per named limit (e.g. "openrouter"): `rate` requests per
+  second refill, `capacity` allowed in a burst.
+- Priority lanes: waiters are served strictly by lane (interactive before
+  batch before background), first come first served within a lane.
+- A 429 from the server blocks the whole bucket for every process until its
+  Retry-After has passed.
+- Queue depth per lane and grant/wait-time counters via metrics() or
+  `python rate_limiter.py stats`.
+
+Usage:
+    sys.path.insert(0, '<repo>/shared-resources/execution')
+    from rate_limiter import get_limiter
+
+    throttle = get_limiter("openrouter").lane("interactive")
+    get_client().post(url, json=payload, throttle=throttle)
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "antigravity_rate_limits.sqlite")
+LANES = {"interactive": 0, "batch": 1, "background": 2}
+# Waiters that stop polling for this long (crashed process) are dropped from the queue
+STALE_SECONDS = 30.0
+MAX_POLL_SECONDS = 1.0
+QUEUE_POLL_SECONDS = 0.05
+
+# OpenRouter free models allow 20 requests/minute
+DEFAULT_LIMITS = {"openrouter": (20 / 60.0, 3)}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS waiters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bucket TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    lane TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    enqueued REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS waiters_order ON waiters (bucket, priority, id);
+CREATE TABLE IF NOT EXISTS lane_stats (
+    bucket TEXT NOT NULL,
+    lane TEXT NOT NULL,
+    grants INTEGER NOT NULL DEFAULT 0,
+    total_wait REAL NOT NULL DEFAULT 0,
+    max_wait REAL NOT NULL DEFAULT 0,
+    timeouts INTEGER NOT NULL DEFAULT 0,
+    throttled INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, lane)
+);
+"""
+
+
+class RateLimitTimeout(Exception):
+    """No token was granted within the caller's timeout."""
+
+
+def rate_limit_disabled() -> bool:
+    """True when RATE_LIMIT is set to 0/false/off."""
+    return os.getenv("RATE_LIMIT", "1").strip().lower() in ("0", "false", "off", "no")
+
+
+class RateLimiter:
+    """Token bucket shared across processes through SQLite, with priority lanes."""
+
+    def __init__(self, name: str, rate: float, capacity: float, db_path: str = DEFAULT_DB_PATH):
+        """
+        Args:
+            name (str): Bucket name shared by every process using this limit
+            rate (float): Tokens (requests) refilled per second
+            capacity (float): Burst size
+            db_path (str): SQLite file all processes on the machine open
+        """
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.db_path = db_path
+        self._initialized = False
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """One write-locked transaction (BEGIN IMMEDIATE serializes bucket updates across processes)."""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _refill(self, conn: sqlite3.Connection, now: float):
+        """Current (tokens, blocked_until) after refilling since the last update."""
+        row = conn.execute("SELECT tokens, updated, blocked_until FROM buckets WHERE name = ?",
+                           (self.name,)).fetchone()
+        if row is None:
+            conn.execute("INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                         (self.name, self.capacity, now))
+            return self.capacity, 0.0
+        tokens = min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+        return tokens, row[2]
+
+    def _stat(self, conn: sqlite3.Connection, lane: str, column: str, wait: float = 0.0):
+        conn.execute("INSERT OR IGNORE INTO lane_stats (bucket, lane) VALUES (?, ?)", (self.name, lane))
+        if column == "grants":
+            conn.execute("UPDATE lane_stats SET grants = grants + 1, total_wait = total_wait + ?, "
+                         "max_wait = MAX(max_wait, ?) WHERE bucket = ? AND lane = ?",
+                         (wait, wait, self.name, lane))
+        else:
+            conn.execute(f"UPDATE lane_stats SET {column} = {column} + 1 WHERE bucket = ? AND lane = ?",
+                         (self.name, lane))
+
+    def acquire(self, lane: str = "interactive", timeout: Optional[float] = None) -> float:
+        """
+        Block until a token is granted to this caller.
+
+        Args:
+            lane (str): interactive, batch or background
+            timeout (float): Give up after this many seconds (None waits indefinitely)
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane '{lane}' (expected one of {', '.join(LANES)})")
+        start = time.time()
+        with self._transaction() as conn:
+            waiter_id = conn.execute(
+                "INSERT INTO waiters (bucket, priority, lane, pid, enqueued, heartbeat) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.name, LANES[lane], lane, os.getpid(), start, start)).lastrowid
+
+        try:
+            while True:
+                now = time.time()
+                with self._transaction() as conn:
+                    conn.execute("DELETE FROM waiters WHERE bucket = ? AND heartbeat < ?",
+                                 (self.name, now - STALE_SECONDS))
+                    tokens, blocked_until = self._refill(conn, now)
+                    head = conn.execute("SELECT id FROM waiters WHERE bucket = ? ORDER BY priority, id LIMIT 1",
+                                        (self.name,)).fetchone()
+                    is_head = head is not None and head[0] == waiter_id
+                    if is_head and tokens >= 1 and now >= blocked_until:
+                        conn.execute("UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?",
+                                     (tokens - 1, now, self.name))
+                        conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+                        waited = now - start
+                        self._stat(conn, lane, "grants", waited)
+                        waiter_id = None
+                        if waited >= 1.0:
+                            logger.info(f"Rate limit '{self.name}' [{lane}]: waited {waited:.1f}s")
+                        return waited
+                    conn.execute("UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?",
+                                 (tokens, now, self.name))
+                    if not conn.execute("UPDATE waiters SET heartbeat = ? WHERE id = ?", (now, waiter_id)).rowcount:
+                        # Reaped as stale (process was suspended): queue again
+                        waiter_id = conn.execute(
+                            "INSERT INTO waiters (bucket, priority, lane, pid, enqueued, heartbeat) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            (self.name, LANES[lane], lane, os.getpid(), now, now)).lastrowid
+
+                if timeout is not None and now - start >= timeout:
+                    raise RateLimitTimeout(f"No '{self.name}' token within {timeout}s (lane {lane})")
+                if is_head:
+                    delay = max(blocked_until - now, (1 - tokens) / self.rate if self.rate > 0 else MAX_POLL_SECONDS)
+                    delay = min(MAX_POLL_SECONDS, max(QUEUE_POLL_SECONDS, delay))
+                else:
+                    delay = QUEUE_POLL_SECONDS * 4
+                if timeout is not None:
+                    delay = min(delay, max(0.0, start + timeout - now))
+                time.sleep(delay)
+        finally:
+            if waiter_id is not None:
+                timed_out = timeout is not None and time.time() - start >= timeout
+                with self._transaction() as conn:
+                    conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+                    if timed_out:
+                        self._stat(conn, lane, "timeouts")
+
+    def block(self, seconds: float, lane: str = "interactive"):
+        """Stop granting tokens to every process for `seconds` (the server said 429)."""
+        now = time.time()
+        with self._transaction() as conn:
+            self._refill(conn, now)
+            conn.execute("UPDATE buckets SET tokens = 0, updated = ?, blocked_until = MAX(blocked_until, ?) "
+                         "WHERE name = ?", (now, now + seconds, self.name))
+            self._stat(conn, lane, "throttled")
+        logger.warning(f"Rate limit '{self.name}': server throttled, pausing all callers for {seconds:.1f}s")
+
+    def lane(self, lane: str, timeout: Optional[float] = None) -> "Throttle":
+        """A throttle for one lane, as accepted by HTTPClient.request(throttle=...)."""
+        return Throttle(self, lane, timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Tokens available, queue depth per lane, and grant/wait counters per lane."""
+        now = time.time()
+        with self._transaction() as conn:
+            tokens, blocked_until = self._refill(conn, now)
+            depth = dict(conn.execute("SELECT lane, COUNT(*) FROM waiters WHERE bucket = ? AND heartbeat >= ? "
+                                      "GROUP BY lane", (self.name, now - STALE_SECONDS)).fetchall())
+            rows = conn.execute("SELECT lane, grants, total_wait, max_wait, timeouts, throttled FROM lane_stats "
+                                "WHERE bucket = ?", (self.name,)).fetchall()
+        lanes = {}
+        for lane in LANES:
+            lanes[lane] = {"queue_depth": depth.get(lane, 0), "grants": 0, "mean_wait_s": 0.0,
+                           "max_wait_s": 0.0, "timeouts": 0, "throttled": 0}
+        for lane, grants, total_wait, max_wait, timeouts, throttled in rows:
+            lanes[lane].update({
+                "grants": grants,
+                "mean_wait_s": round(total_wait / grants, 3) if grants else 0.0,
+                "max_wait_s": round(max_wait, 3),
+                "timeouts": timeouts,
+                "throttled": throttled
+            })
+        return {
+            "bucket": self.name,
+            "rate_per_s": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(tokens, 2),
+            "blocked_for_s": round(max(0.0, blocked_until - now), 1),
+            "lanes": lanes
+        }
+
+    def reset(self):
+        """Refill the bucket and clear its queue and counters."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM buckets WHERE name = ?", (self.name,))
+            conn.execute("DELETE FROM waiters WHERE bucket = ?", (self.name,))
+            conn.execute("DELETE FROM lane_stats WHERE bucket = ?", (self.name,))
+
+
+class Throttle:
+    """A RateLimiter bound to one lane: acquire() before each attempt, block() on 429."""
+
+    def __init__(self, limiter: RateLimiter, lane: str, timeout: Optional[float] = None):
+        self.limiter = limiter
+        self.lane = lane
+        self.timeout = timeout
+
+    def acquire(self) -> float:
+        return self.limiter.acquire(self.lane, self.timeout)
+
+    def block(self, seconds: float):
+        self.limiter.block(seconds, self.lane)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_limiter(name: str) -> Optional[RateLimiter]:
+    """
+    The process-wide limiter for `name`, or None if RATE_LIMIT=0.
+
+    Limits come from <NAME>_RPM and <NAME>_BURST (e.g. OPENROUTER_RPM=20),
+    defaulting to DEFAULT_LIMITS; RATE_LIMIT_DB overrides the shared file.
+    """
+    if rate_limit_disabled():
+        return None
+    if name not in _limiters:
+        rate, capacity = DEFAULT_LIMITS.get(name, (1.0, 1))
+        prefix = name.upper()
+        if os.getenv(f"{prefix}_RPM"):
+            rate = float(os.getenv(f"{prefix}_RPM")) / 60.0
+        capacity = float(os.getenv(f"{prefix}_BURST", capacity))
+        _limiters[name] = RateLimiter(name, rate, capacity, os.getenv("RATE_LIMIT_DB", DEFAULT_DB_PATH))
+    return _limiters[name]
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Inspect or reset the shared API rate limiter')
+    parser.add_argument('command', choices=['stats', 'reset'])
+    parser.add_argument('--bucket', default='openrouter', help='Limit name (default: openrouter)')
+    args = parser.parse_args()
+
+    limiter = get_limiter(args.bucket)
+    if limiter is None:
+        print("Rate limiting is disabled (RATE_LIMIT=0)")
+    elif args.command == 'reset':
+        limiter.reset()
+        print(f"Reset '{args.bucket}' in {limiter.db_path}")
+    else:
+        print(json.dumps(limiter.metrics(), indent=2))
+
+
+if __name__ == "__main__":
+    main()